@@ -0,0 +1,18 @@
+# Generated migration for workspace generation cache opt-out
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='ai_cache_enabled',
+            field=models.BooleanField(default=True, help_text='Serve repeated AI generations from the response cache'),
+        ),
+    ]
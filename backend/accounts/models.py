@@ -113,6 +113,35 @@ class Organization(models.Model):
         return self.name
 
 
+class OrganizationMemberQuerySet(models.QuerySet):
+    """
+    Memberships whose bulk writes invalidate the cached role maps.
+    
+    Saves and deletes, including queryset deletes and cascades, are
+    handled by signal receivers (accounts.signals); update() and
+    bulk_create() send no signals.
+    """
+    
+    def update(self, **kwargs):
+        from .tenancy import invalidate_organization_roles
+        user_ids = set(self.values_list('user_id', flat=True))
+        result = super().update(**kwargs)
+        # A membership moved to another user changes their roles too
+        user = kwargs.get('user_id', kwargs.get('user'))
+        if user is not None:
+            user_ids.add(getattr(user, 'pk', user))
+        for user_id in user_ids:
+            invalidate_organization_roles(user_id)
+        return result
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from .tenancy import invalidate_organization_roles
+        objs = super().bulk_create(objs, *args, **kwargs)
+        for user_id in {obj.user_id for obj in objs}:
+            invalidate_organization_roles(user_id)
+        return objs
+
+
 class OrganizationMember(models.Model):
     """Membership relationship between User and Organization with role."""
     
@@ -135,6 +164,8 @@ class OrganizationMember(models.Model):
     role = models.CharField(max_length=20, choices=Role.choices)
     joined_at = models.DateTimeField(auto_now_add=True)
     
+    objects = OrganizationMemberQuerySet.as_manager()
+    
     class Meta:
         db_table = 'organization_members'
         unique_together = [['user', 'organization']]
@@ -158,6 +189,10 @@ class Workspace(models.Model):
         related_name='workspaces'
     )
     description = models.TextField(blank=True, null=True)
+    ai_cache_enabled = models.BooleanField(
+        default=True,
+        help_text='Serve repeated AI generations from the response cache'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -170,5 +205,24 @@ class Workspace(models.Model):
             models.Index(fields=['is_active']),
         ]
     
+    # organization_id as loaded, to notice moves
+    _loaded_organization_id = None
+    
     def __str__(self):
         return f"{self.organization.name} - {self.name}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_organization_id = instance.__dict__.get('organization_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Re-sync the organization of the workspace's contents and jobs when it moves."""
+        moved = not self._state.adding and self.organization_id != self._loaded_organization_id
+        super().save(*args, **kwargs)
+        self._loaded_organization_id = self.organization_id
+        
+        if moved:
+            from .tenancy import sync_organization_ids
+            sync_organization_ids(self.organization_id, workspace_id=self.id)
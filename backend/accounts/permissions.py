@@ -1,55 +1,72 @@
 """
 Custom permissions for accounts app.
+
+Roles come from the requesting user's cached role map (see
+accounts.tenancy), so object checks run no queries for objects that carry
+their organization_id or have their workspace loaded.
 """
 from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied
 from .models import OrganizationMember
+from .tenancy import get_organization_id, get_organization_roles
+
+
+def get_role(request, obj):
+    """
+    Get the requesting user's role in the organization of an object.
+
+    Args:
+        request: Request
+        obj: Object to check, see get_organization_id()
+
+    Returns:
+        OrganizationMember.Role value, or None if the user isn't a member
+    """
+    organization_id = get_organization_id(obj)
+    if organization_id is None:
+        return None
+    return get_organization_roles(request.user, request).get(organization_id)
+
+
+def check_organization_admin(request, obj):
+    """
+    Deny a write unless the user administers an organization.
+
+    Args:
+        request: Request
+        obj: Organization ID, or object, see get_organization_id()
+
+    Raises:
+        PermissionDenied: The user isn't an admin of the organization
+    """
+    organization_id = obj if isinstance(obj, int) else get_organization_id(obj)
+    if get_organization_roles(request.user, request).get(organization_id) != OrganizationMember.Role.ADMIN:
+        raise PermissionDenied('Only organization admins can make this change.')
+
+
+def get_content_role(request, obj):
+    """Like get_role(), for content-like objects (ones with a project) only."""
+    if getattr(obj, 'project_id', None) is None:
+        return None
+    return get_role(request, obj)
 
 
 class IsOrganizationAdmin(permissions.BasePermission):
     """
     Permission to check if user is an admin of the organization.
     """
-    
+
     def has_object_permission(self, request, view, obj):
-        # Get organization from object
-        if hasattr(obj, 'organization'):
-            organization = obj.organization
-        elif hasattr(obj, 'workspace'):
-            organization = obj.workspace.organization
-        elif hasattr(obj, 'project'):
-            organization = obj.project.workspace.organization
-        else:
-            return False
-        
-        # Check if user is admin
-        return OrganizationMember.objects.filter(
-            user=request.user,
-            organization=organization,
-            role=OrganizationMember.Role.ADMIN
-        ).exists()
+        return get_role(request, obj) == OrganizationMember.Role.ADMIN
 
 
 class IsOrganizationMember(permissions.BasePermission):
     """
     Permission to check if user is a member of the organization.
     """
-    
+
     def has_object_permission(self, request, view, obj):
-        # Get organization from object
-        if hasattr(obj, 'organization'):
-            organization = obj.organization
-        elif hasattr(obj, 'workspace'):
-            organization = obj.workspace.organization
-        elif hasattr(obj, 'project'):
-            organization = obj.project.workspace.organization
-        else:
-            return False
-        
-        # Check if user is member
-        return OrganizationMember.objects.filter(
-            user=request.user,
-            organization=organization
-        ).exists()
+        return get_role(request, obj) is not None
 
 
 class CanEditContent(permissions.BasePermission):
@@ -57,30 +74,16 @@ class CanEditContent(permissions.BasePermission):
     Permission to check if user can edit content.
     Admins and Editors can edit, Writers and Viewers cannot.
     """
-    
+
     def has_object_permission(self, request, view, obj):
         # GET, HEAD, OPTIONS are allowed for all members
         if request.method in permissions.SAFE_METHODS:
             return True
-        
-        # Get organization from object
-        if hasattr(obj, 'project'):
-            organization = obj.project.workspace.organization
-        else:
-            return False
-        
-        # Check role
-        try:
-            member = OrganizationMember.objects.get(
-                user=request.user,
-                organization=organization
-            )
-            return member.role in [
-                OrganizationMember.Role.ADMIN,
-                OrganizationMember.Role.EDITOR
-            ]
-        except OrganizationMember.DoesNotExist:
-            return False
+
+        return get_content_role(request, obj) in [
+            OrganizationMember.Role.ADMIN,
+            OrganizationMember.Role.EDITOR
+        ]
 
 
 class CanCreateContent(permissions.BasePermission):
@@ -88,30 +91,18 @@ class CanCreateContent(permissions.BasePermission):
     Permission to check if user can create content.
     Admins, Editors, and Writers can create.
     """
-    
+
     def has_permission(self, request, view):
         # All authenticated users can create (will check organization membership in view)
         return request.user and request.user.is_authenticated
-    
+
     def has_object_permission(self, request, view, obj):
         # For creation, check if user has write access
-        if hasattr(obj, 'project'):
-            organization = obj.project.workspace.organization
-        else:
-            return False
-        
-        try:
-            member = OrganizationMember.objects.get(
-                user=request.user,
-                organization=organization
-            )
-            return member.role in [
-                OrganizationMember.Role.ADMIN,
-                OrganizationMember.Role.EDITOR,
-                OrganizationMember.Role.WRITER
-            ]
-        except OrganizationMember.DoesNotExist:
-            return False
+        return get_content_role(request, obj) in [
+            OrganizationMember.Role.ADMIN,
+            OrganizationMember.Role.EDITOR,
+            OrganizationMember.Role.WRITER
+        ]
 
 
 class CanApproveContent(permissions.BasePermission):
@@ -119,21 +110,42 @@ class CanApproveContent(permissions.BasePermission):
     Permission to check if user can approve/reject content.
     Only Admins and Editors can approve.
     """
-    
+
     def has_object_permission(self, request, view, obj):
-        if hasattr(obj, 'project'):
-            organization = obj.project.workspace.organization
-        else:
-            return False
-        
-        try:
-            member = OrganizationMember.objects.get(
-                user=request.user,
-                organization=organization
-            )
-            return member.role in [
-                OrganizationMember.Role.ADMIN,
-                OrganizationMember.Role.EDITOR
-            ]
-        except OrganizationMember.DoesNotExist:
-            return False
+        return get_content_role(request, obj) in [
+            OrganizationMember.Role.ADMIN,
+            OrganizationMember.Role.EDITOR
+        ]
+
+
+class OrganizationAdminWritesMixin:
+    """
+    ViewSet mixin letting members read and organization admins write.
+
+    Changed and deleted rows are checked with IsOrganizationAdmin, and the
+    organization in organization_field of created and updated rows with
+    check_organization_admin(), so rows can't be created in or moved to an
+    organization the user doesn't administer.
+    """
+
+    organization_field = 'organization'
+
+    def get_permissions(self):
+        permission_classes = super().get_permissions()
+        if self.request.method not in permissions.SAFE_METHODS:
+            permission_classes.append(IsOrganizationAdmin())
+        return permission_classes
+
+    def check_written_organization(self, serializer):
+        organization = serializer.validated_data.get(self.organization_field)
+        if organization is None and serializer.instance is not None:
+            organization = getattr(serializer.instance, self.organization_field)
+        check_organization_admin(self.request, organization)
+
+    def perform_create(self, serializer):
+        self.check_written_organization(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.check_written_organization(serializer)
+        super().perform_update(serializer)
@@ -76,10 +76,13 @@ class OrganizationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        # Annotated by OrganizationViewSet
+        count = getattr(obj, 'member_count', None)
+        return obj.members.count() if count is None else count
     
     def get_workspace_count(self, obj):
-        return obj.workspaces.filter(is_active=True).count()
+        count = getattr(obj, 'workspace_count', None)
+        return obj.workspaces.filter(is_active=True).count() if count is None else count
 
 
 class OrganizationMemberSerializer(serializers.ModelSerializer):
@@ -104,9 +107,12 @@ class WorkspaceSerializer(serializers.ModelSerializer):
         model = Workspace
         fields = [
             'id', 'name', 'slug', 'organization', 'organization_name',
-            'description', 'is_active', 'created_at', 'updated_at', 'project_count'
+            'description', 'ai_cache_enabled', 'is_active',
+            'created_at', 'updated_at', 'project_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_project_count(self, obj):
-        return obj.projects.filter(is_active=True).count()
+        # Annotated by WorkspaceViewSet
+        count = getattr(obj, 'project_count', None)
+        return obj.projects.filter(is_active=True).count() if count is None else count
@@ -0,0 +1,19 @@
+"""
+Signal receivers for accounts app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import OrganizationMember
+from .tenancy import invalidate_organization_roles
+
+
+@receiver([post_save, post_delete], sender=OrganizationMember)
+def invalidate_member_roles(sender, instance, **kwargs):
+    """
+    Invalidate a member's cached organization roles.
+
+    post_delete is also sent for queryset deletes (e.g. the admin's
+    delete action) and cascades, which skip Model.delete().
+    """
+    invalidate_organization_roles(instance.user_id)
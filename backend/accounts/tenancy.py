@@ -0,0 +1,184 @@
+"""
+Organization (tenant) scoping.
+
+Content, ContentVersion and AiJob carry a denormalized organization_id, so
+limiting them to the caller's organizations is a single indexed predicate
+instead of a join through project -> workspace -> organization. The models
+set it on save, and moving a project or workspace re-syncs the rows below
+it (see sync_organization_ids()).
+
+A user's memberships are loaded once per request as a role map,
+{organization ID: role}, cached under a per-user version that membership
+changes bump, so stale maps are never read again and just expire.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Organization, OrganizationMember
+
+ROLES_KEY = 'organization_roles:{}:{}'
+ROLES_VERSION_KEY = 'organization_roles_version:{}'
+
+
+def get_organization_roles(user, request=None) -> dict:
+    """
+    Get a user's role in each of their organizations.
+
+    Args:
+        user: User instance
+        request: Optional request the map is kept on, so it's loaded at
+                 most once per request
+
+    Returns:
+        Dict of organization ID to OrganizationMember.Role value
+    """
+    user_id = getattr(user, 'pk', None)
+    loaded = getattr(request, '_organization_roles', None)
+    if loaded is not None and loaded[0] == user_id:
+        return loaded[1]
+
+    roles = {}
+    if user_id is not None and user.is_authenticated:
+        version = cache.get(ROLES_VERSION_KEY.format(user_id), 0)
+        key = ROLES_KEY.format(user_id, version)
+        roles = cache.get(key)
+        if roles is None:
+            roles = dict(OrganizationMember.objects.filter(user=user).values_list('organization_id', 'role'))
+            cache.set(key, roles, getattr(settings, 'ORGANIZATION_ROLES_CACHE_TTL', 3600))
+
+    if request is not None:
+        request._organization_roles = (user_id, roles)
+    return roles
+
+
+def invalidate_organization_roles(user_id):
+    """
+    Make a user's cached role map stale after their memberships change.
+
+    The version is bumped now and again on commit, so a map cached from
+    the old memberships before the change committed isn't kept either.
+
+    Args:
+        user_id: User ID
+    """
+    def bump():
+        key = ROLES_VERSION_KEY.format(user_id)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_member_organization_ids(user, request=None) -> list:
+    """
+    Get the organizations a user is a member of.
+
+    Args:
+        user: User instance
+        request: Optional request, see get_organization_roles()
+
+    Returns:
+        List of organization IDs
+    """
+    return list(get_organization_roles(user, request))
+
+
+def get_organization_id(obj):
+    """
+    Get the ID of the organization an object belongs to.
+
+    Uses the denormalized organization_id where there is one, so checking
+    contents, versions and jobs loads nothing.
+
+    Args:
+        obj: Organization, or a model instance with an organization,
+             workspace or project
+
+    Returns:
+        Organization ID, or None if obj isn't tied to one
+    """
+    if isinstance(obj, Organization):
+        return obj.pk
+    if getattr(obj, 'organization_id', None) is not None:
+        return obj.organization_id
+    if getattr(obj, 'workspace_id', None) is not None:
+        return obj.workspace.organization_id
+    if getattr(obj, 'project_id', None) is not None:
+        return obj.project.workspace.organization_id
+    return None
+
+
+def check_member_organization(obj, request):
+    """
+    Validate a related object written through a serializer.
+
+    Objects of other organizations are rejected as if they didn't exist,
+    so rows can't be created in or moved to another tenant.
+
+    Args:
+        obj: Related instance or None, see get_organization_id()
+        request: Request being validated
+
+    Returns:
+        obj
+
+    Raises:
+        serializers.ValidationError: obj isn't in one of the caller's organizations
+    """
+    if obj is not None and get_organization_id(obj) not in get_organization_roles(request.user, request):
+        raise serializers.ValidationError(f'Invalid pk "{obj.pk}" - object does not exist.')
+    return obj
+
+
+def sync_organization_ids(organization_id, workspace_id=None, project_id=None) -> int:
+    """
+    Re-sync the denormalized organization_id below a moved workspace or project.
+
+    Args:
+        organization_id: Organization the workspace or project now belongs to
+        workspace_id: Moved workspace, whose contents, versions and jobs are updated
+        project_id: Moved project, whose contents and versions are updated
+
+    Returns:
+        Number of rows updated
+    """
+    Content = apps.get_model('contentmgmt', 'Content')
+    ContentVersion = apps.get_model('contentmgmt', 'ContentVersion')
+    AiJob = apps.get_model('ai', 'AiJob')
+
+    if project_id is not None:
+        contents = Content.objects.filter(project_id=project_id)
+        querysets = [contents, ContentVersion.objects.filter(content__project_id=project_id)]
+    else:
+        contents = Content.objects.filter(project__workspace_id=workspace_id)
+        querysets = [
+            contents,
+            ContentVersion.objects.filter(content__project__workspace_id=workspace_id),
+            AiJob.objects.filter(workspace_id=workspace_id),
+        ]
+
+    return sum(
+        queryset.exclude(organization_id=organization_id).update(organization_id=organization_id)
+        for queryset in querysets
+    )
+
+
+class TenantScopedMixin:
+    """
+    ViewSet mixin limiting the queryset to the caller's organizations.
+
+    tenant_field is the lookup of the row's organization, e.g.
+    'organization' on models with the denormalized column, or
+    'workspace__organization' on ones reached through their workspace.
+    """
+
+    tenant_field = 'organization'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        organization_ids = get_member_organization_ids(self.request.user, self.request)
+        return queryset.filter(**{f'{self.tenant_field}__in': organization_ids})
@@ -3,18 +3,25 @@ Views for accounts app.
 """
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db import transaction
+
+from contentmgmt.models import Project
+from core.counts import AnnotatedCountsMixin, count_related
+from core.fieldsets import SparseFieldsetsMixin
 
 from .models import User, Organization, OrganizationMember, Workspace
+from .permissions import IsOrganizationAdmin, OrganizationAdminWritesMixin
 from .serializers import (
     OTPRequestSerializer, OTPVerifySerializer,
     UserSerializer, OrganizationSerializer,
     OrganizationMemberSerializer, WorkspaceSerializer
 )
 from .services.otp import OTPService
+from .tenancy import TenantScopedMixin
 
 
 @api_view(['POST'])
@@ -89,10 +96,21 @@ def current_user(request):
     return Response(serializer.data)
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
-    """ViewSet for Organization CRUD."""
+class OrganizationViewSet(TenantScopedMixin, SparseFieldsetsMixin, AnnotatedCountsMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Organization CRUD. ?counts=false leaves out the counts.
+    
+    Users see the organizations they are members of; any user can create
+    one, which they then administer, and only its admins can change or
+    delete it.
+    """
     
+    tenant_field = 'pk'
     queryset = Organization.objects.all()
+    count_annotations = {
+        'member_count': count_related(OrganizationMember.objects.all(), 'organization'),
+        'workspace_count': count_related(Workspace.objects.filter(is_active=True), 'organization'),
+    }
     serializer_class = OrganizationSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -100,10 +118,31 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'slug', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
+    
+    def get_permissions(self):
+        if self.request.method in SAFE_METHODS:
+            return super().get_permissions()
+        return [IsAuthenticated(), IsOrganizationAdmin()]
+    
+    @transaction.atomic
+    def perform_create(self, serializer):
+        # The creator administers the new organization
+        organization = serializer.save()
+        OrganizationMember.objects.create(
+            user=self.request.user,
+            organization=organization,
+            role=OrganizationMember.Role.ADMIN
+        )
 
 
-class OrganizationMemberViewSet(viewsets.ModelViewSet):
-    """ViewSet for OrganizationMember CRUD."""
+class OrganizationMemberViewSet(OrganizationAdminWritesMixin, TenantScopedMixin, SparseFieldsetsMixin,
+                                 viewsets.ModelViewSet):
+    """
+    ViewSet for OrganizationMember CRUD.
+    
+    Members see the members of their organizations; only an organization's
+    admins can add, change or remove its members.
+    """
     
     queryset = OrganizationMember.objects.select_related('user', 'organization')
     serializer_class = OrganizationMemberSerializer
@@ -115,10 +154,19 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
     ordering = ['-joined_at']
 
 
-class WorkspaceViewSet(viewsets.ModelViewSet):
-    """ViewSet for Workspace CRUD."""
+class WorkspaceViewSet(OrganizationAdminWritesMixin, TenantScopedMixin, SparseFieldsetsMixin,
+                       AnnotatedCountsMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Workspace CRUD. ?counts=false leaves out the counts.
+    
+    Members see their organizations' workspaces; only an organization's
+    admins can create, change or delete them.
+    """
     
     queryset = Workspace.objects.select_related('organization')
+    count_annotations = {
+        'project_count': count_related(Project.objects.filter(is_active=True), 'workspace'),
+    }
     serializer_class = WorkspaceSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -2,7 +2,7 @@
 Admin configuration for AI app.
 """
 from django.contrib import admin
-from .models import AiJob, UsageLog, UsageLimit, AuditLog
+from .models import AiJob, AiJobBatch, ProviderBatch, BudgetReservation, UsageLog, UsageLimit, AuditLog
 from .prompts.models import PromptTemplate
 
 
@@ -10,19 +10,51 @@ from .prompts.models import PromptTemplate
 class AiJobAdmin(admin.ModelAdmin):
     """Admin for AiJob model."""
     
-    list_display = ['id', 'content', 'kind', 'status', 'user', 'workspace', 'created_at']
-    list_filter = ['status', 'kind', 'workspace', 'created_at']
+    list_display = ['id', 'content', 'kind', 'status', 'execution_mode', 'user', 'workspace', 'created_at']
+    list_filter = ['status', 'execution_mode', 'kind', 'workspace', 'created_at']
     search_fields = ['content__title', 'user__phone_number', 'workspace__name']
     readonly_fields = ['created_at', 'updated_at', 'started_at', 'completed_at']
     date_hierarchy = 'created_at'
 
 
+@admin.register(AiJobBatch)
+class AiJobBatchAdmin(admin.ModelAdmin):
+    """Admin for AiJobBatch model."""
+    
+    list_display = ['id', 'project', 'kind', 'status', 'total_jobs', 'completed_jobs', 'failed_jobs', 'created_at']
+    list_filter = ['status', 'kind', 'workspace', 'created_at']
+    search_fields = ['project__name', 'workspace__name']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(ProviderBatch)
+class ProviderBatchAdmin(admin.ModelAdmin):
+    """Admin for ProviderBatch model."""
+    
+    list_display = ['id', 'provider_batch_id', 'backend', 'status', 'request_count', 'completed_count', 'failed_count', 'created_at']
+    list_filter = ['status', 'backend', 'created_at']
+    search_fields = ['provider_batch_id']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(BudgetReservation)
+class BudgetReservationAdmin(admin.ModelAdmin):
+    """Admin for BudgetReservation model."""
+    
+    list_display = ['id', 'workspace', 'ai_job', 'status', 'amount', 'actual_cost', 'expires_at', 'created_at']
+    list_filter = ['status', 'workspace', 'created_at']
+    readonly_fields = ['created_at', 'settled_at']
+    date_hierarchy = 'created_at'
+
+
 @admin.register(UsageLog)
 class UsageLogAdmin(admin.ModelAdmin):
     """Admin for UsageLog model."""
     
-    list_display = ['id', 'model', 'total_tokens', 'estimated_cost', 'success', 'workspace', 'timestamp']
-    list_filter = ['model', 'success', 'workspace', 'timestamp']
+    list_display = ['id', 'model', 'total_tokens', 'estimated_cost', 'success', 'cache_hit', 'workspace', 'timestamp']
+    list_filter = ['model', 'success', 'cache_hit', 'workspace', 'timestamp']
     search_fields = ['content__title', 'user__phone_number', 'workspace__name']
     readonly_fields = ['timestamp']
     date_hierarchy = 'timestamp'
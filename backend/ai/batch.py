@@ -0,0 +1,202 @@
+"""
+Provider batch API backends for offline generation.
+
+Non-urgent jobs are collected into a JSONL file of chat completion
+requests and submitted to a batch endpoint, which is polled until the
+results file is ready. The local backend is a file-based stand-in of the
+OpenAI batch endpoint for development and tests.
+"""
+import json
+import logging
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+
+# Provider statuses after which a batch will not change anymore
+FINISHED_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+def make_custom_id(job_id):
+    """Batch request ID for an AiJob."""
+    return f'job-{job_id}'
+
+
+def parse_custom_id(custom_id):
+    """AiJob ID from a batch request ID, or None if it isn't one of ours."""
+    prefix, _, job_id = (custom_id or '').partition('-')
+    if prefix != 'job' or not job_id.isdigit():
+        return None
+    return int(job_id)
+
+
+def build_batch_request(job_id, request_kwargs):
+    """
+    Build one JSONL line of a batch input file.
+
+    Args:
+        job_id: AiJob ID
+        request_kwargs: Chat completion request arguments
+
+    Returns:
+        Dict in the batch API request format
+    """
+    return {
+        'custom_id': make_custom_id(job_id),
+        'method': 'POST',
+        'url': BATCH_ENDPOINT,
+        'body': request_kwargs,
+    }
+
+
+def dump_jsonl(lines):
+    """Serialize dicts as JSONL."""
+    return ''.join(json.dumps(line, ensure_ascii=False) + '\n' for line in lines)
+
+
+def parse_jsonl(text):
+    """Parse JSONL text into dicts, skipping blank lines."""
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class OpenAIBatchBackend:
+    """Submit batches through the OpenAI Files and Batches APIs."""
+
+    name = 'openai'
+
+    def __init__(self, client=None):
+        from ai.client import get_openai_client
+        self.client = client or get_openai_client()
+
+    def submit(self, requests):
+        """
+        Upload the input file and create the batch.
+
+        Args:
+            requests: List of batch request dicts
+
+        Returns:
+            Dict with the provider batch id and input file id
+        """
+        input_file = self.client.files.create(
+            file=('batch.jsonl', dump_jsonl(requests).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=getattr(settings, 'AI_BATCH_COMPLETION_WINDOW', '24h')
+        )
+        return {'id': batch.id, 'input_file_id': input_file.id}
+
+    def retrieve(self, batch_id):
+        """
+        Get the current state of a batch.
+
+        Returns:
+            Dict with status, output_file_id and error_file_id
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            'status': batch.status,
+            'output_file_id': batch.output_file_id,
+            'error_file_id': batch.error_file_id,
+        }
+
+    def read_results(self, file_id):
+        """Download a results file as a list of dicts."""
+        return parse_jsonl(self.client.files.content(file_id).text)
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in of the batch endpoint.
+
+    Each batch is a directory holding input.jsonl. A batch is completed
+    once output.jsonl exists next to it, written by complete() or by any
+    external process that follows the OpenAI output format.
+    """
+
+    name = 'local'
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or getattr(settings, 'AI_BATCH_LOCAL_DIR', 'batches'))
+
+    def _batch_dir(self, batch_id):
+        return self.directory / batch_id
+
+    def submit(self, requests):
+        """Write the input file into a new batch directory."""
+        batch_id = f'batch_{uuid.uuid4().hex}'
+        batch_dir = self._batch_dir(batch_id)
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        (batch_dir / 'input.jsonl').write_text(dump_jsonl(requests), encoding='utf-8')
+        return {'id': batch_id, 'input_file_id': f'{batch_id}/input.jsonl'}
+
+    def retrieve(self, batch_id):
+        """A batch is in progress until its output file exists."""
+        if (self._batch_dir(batch_id) / 'output.jsonl').exists():
+            return {
+                'status': 'completed',
+                'output_file_id': f'{batch_id}/output.jsonl',
+                'error_file_id': None,
+            }
+        return {'status': 'in_progress', 'output_file_id': None, 'error_file_id': None}
+
+    def read_results(self, file_id):
+        """Read a results file relative to the batch directory."""
+        return parse_jsonl((self.directory / file_id).read_text(encoding='utf-8'))
+
+    def read_requests(self, batch_id):
+        """Read the submitted requests of a batch."""
+        return self.read_results(f'{batch_id}/input.jsonl')
+
+    def complete(self, batch_id, responder):
+        """
+        Answer every request of a batch and write the output file.
+
+        Args:
+            batch_id: Local batch ID
+            responder: Callable taking a request body and returning a chat
+                       completion response body; exceptions become
+                       per-request errors
+        """
+        results = []
+        for request in self.read_requests(batch_id):
+            result = {'id': f'batch_req_{uuid.uuid4().hex}', 'custom_id': request['custom_id']}
+            try:
+                result['response'] = {'status_code': 200, 'body': responder(request['body'])}
+                result['error'] = None
+            except Exception as e:
+                result['response'] = None
+                result['error'] = {'code': 'server_error', 'message': str(e)}
+            results.append(result)
+
+        (self._batch_dir(batch_id) / 'output.jsonl').write_text(dump_jsonl(results), encoding='utf-8')
+
+
+BATCH_BACKENDS = {
+    OpenAIBatchBackend.name: OpenAIBatchBackend,
+    LocalBatchBackend.name: LocalBatchBackend,
+}
+
+
+def get_batch_backend(name=None):
+    """
+    Get a batch backend instance.
+
+    Args:
+        name: Backend name, defaults to the AI_BATCH_BACKEND setting
+
+    Returns:
+        Backend instance
+    """
+    name = name or getattr(settings, 'AI_BATCH_BACKEND', 'openai')
+    try:
+        return BATCH_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown batch backend: {name}")
@@ -0,0 +1,155 @@
+"""
+Exact-match response cache for AI content generation.
+
+Completions are cached under a content-addressed key built from the
+request (model, messages, temperature, top_p and max_tokens), so the same
+prompt regenerated by a team is served without a new OpenAI call.
+"""
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+
+from django.conf import settings
+
+from core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt_text(text):
+    """
+    Normalize prompt text for cache keying.
+
+    Applies Unicode NFC normalization and collapses whitespace so prompts
+    that only differ in spacing share a key.
+    """
+    return ' '.join(unicodedata.normalize('NFC', text or '').split())
+
+
+def is_generation_cache_enabled(workspace):
+    """
+    Check if the generation cache may be used for a workspace.
+
+    Args:
+        workspace: Workspace instance
+
+    Returns:
+        True if caching is enabled globally and for the workspace
+    """
+    if not getattr(settings, 'AI_GENERATION_CACHE_ENABLED', True):
+        return False
+    return getattr(workspace, 'ai_cache_enabled', True)
+
+
+class GenerationCache:
+    """
+    Redis-backed generation cache with TTL and LRU-style eviction.
+
+    Entries are stored as JSON strings with a TTL. A sorted set scored by
+    last access time tracks recency; when it grows past the size cap the
+    least recently used entries are evicted.
+    """
+
+    KEY_PREFIX = 'ai_generation_cache'
+
+    def __init__(self, ttl=None, max_entries=None):
+        """
+        Args:
+            ttl: Entry lifetime in seconds
+            max_entries: Maximum number of cached entries
+        """
+        self.ttl = ttl or getattr(settings, 'AI_GENERATION_CACHE_TTL', 7 * 24 * 3600)
+        self.max_entries = max_entries or getattr(settings, 'AI_GENERATION_CACHE_MAX_ENTRIES', 10000)
+        self.index_key = f'{self.KEY_PREFIX}:lru'
+
+    @staticmethod
+    def make_key(model, messages, temperature=None, top_p=None, max_tokens=None, **kwargs):
+        """
+        Build the content-addressed key for a completion request.
+
+        Args:
+            model: Model name
+            messages: Chat messages
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            max_tokens: Completion token limit
+            **kwargs: Other request arguments (ignored)
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = {
+            'model': model,
+            'messages': [
+                {'role': message['role'], 'content': normalize_prompt_text(message['content'])}
+                for message in messages
+            ],
+            'temperature': temperature,
+            'top_p': top_p,
+            'max_tokens': max_tokens,
+        }
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _entry_key(self, key):
+        return f'{self.KEY_PREFIX}:{key}'
+
+    def get(self, key):
+        """
+        Get a cached entry and mark it as recently used.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached entry dict or None on a miss
+        """
+        try:
+            client = get_redis_client()
+            raw = client.get(self._entry_key(key))
+            if raw is None:
+                return None
+
+            client.zadd(self.index_key, {key: time.time()})
+            return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Generation cache lookup failed: {str(e)}")
+            return None
+
+    def set(self, key, entry):
+        """
+        Store an entry and evict the least recently used ones over the cap.
+
+        Args:
+            key: Key from make_key()
+            entry: JSON-serializable dict (text, token counts, cost)
+        """
+        try:
+            client = get_redis_client()
+            now = time.time()
+
+            pipe = client.pipeline()
+            pipe.set(self._entry_key(key), json.dumps(entry, ensure_ascii=False), ex=self.ttl)
+            pipe.zadd(self.index_key, {key: now})
+            # Drop index members whose entries have already expired
+            pipe.zremrangebyscore(self.index_key, '-inf', now - self.ttl)
+            pipe.zcard(self.index_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [member for member, _ in client.zpopmin(self.index_key, overflow)]
+                client.delete(*[self._entry_key(member) for member in evicted])
+                logger.info(f"Generation cache evicted {len(evicted)} entries")
+        except Exception as e:
+            logger.warning(f"Generation cache store failed: {str(e)}")
+
+    def clear(self):
+        """Remove all cached entries."""
+        client = get_redis_client()
+        keys = client.zrange(self.index_key, 0, -1)
+        if keys:
+            client.delete(*[self._entry_key(key) for key in keys])
+        client.delete(self.index_key)
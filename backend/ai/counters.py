@@ -0,0 +1,256 @@
+"""
+Real-time usage counters kept in Redis.
+
+Requests, tokens and cost are counted per scope (user, workspace,
+organization) and period (monthly, daily) as usage is logged, so limit
+checks read one hash instead of aggregating usage_logs. A counter that
+doesn't exist yet is built from UsageLog on first read, and
+reconcile_usage_counters() periodically rebuilds the current periods to
+correct any drift.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ai_usage'
+
+# UsageLimit scopes and the UsageLog field holding their ID
+SCOPE_FIELDS = {
+    'user': 'user_id',
+    'workspace': 'workspace_id',
+    'organization': 'organization_id',
+}
+
+PERIODS = ('monthly', 'daily')
+
+# Cost is counted in micro-dollars so increments stay exact integers
+MICROS = Decimal('1000000')
+
+
+def get_period_start(period, when=None):
+    """Start of the monthly or daily period containing a time."""
+    when = when or timezone.now()
+    start = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'monthly':
+        start = start.replace(day=1)
+    return start
+
+
+def get_period_end(period, start):
+    """End (exclusive) of a period."""
+    if period == 'monthly':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def get_counter_key(scope, scope_id, period, start):
+    """Redis key of a usage counter."""
+    return f'{KEY_PREFIX}:{scope}:{scope_id}:{period}:{start:%Y%m%d}'
+
+
+def _get_expiry(period, start):
+    """Counters outlive their period by a grace window."""
+    grace = getattr(settings, 'AI_USAGE_COUNTER_GRACE', 24 * 3600)
+    return int(get_period_end(period, start).timestamp()) + grace
+
+
+def _counter_mapping(requests, tokens, cost):
+    return {
+        'requests': requests or 0,
+        'tokens': tokens or 0,
+        'cost_micros': int((cost or 0) * MICROS),
+        'built': 1,
+    }
+
+
+def _parse_counters(raw):
+    return {
+        'requests': int(raw.get('requests', 0)),
+        'tokens': int(raw.get('tokens', 0)),
+        'cost': Decimal(int(raw.get('cost_micros', 0))) / MICROS,
+    }
+
+
+def increment_usage_counters(log):
+    """
+    Add a usage log to the counters of every scope and period it belongs to.
+
+    Every log counts as a request; tokens and cost only count on success,
+    matching how limits are evaluated.
+
+    Args:
+        log: UsageLog instance
+    """
+    cost_micros = int(Decimal(str(log.estimated_cost)) * MICROS)
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for scope, field in SCOPE_FIELDS.items():
+            scope_id = getattr(log, field)
+            if not scope_id:
+                continue
+
+            for period in PERIODS:
+                start = get_period_start(period, log.timestamp)
+                key = get_counter_key(scope, scope_id, period, start)
+                pipe.hincrby(key, 'requests', 1)
+                if log.success:
+                    pipe.hincrby(key, 'tokens', log.total_tokens)
+                    pipe.hincrby(key, 'cost_micros', cost_micros)
+                pipe.expireat(key, _get_expiry(period, start))
+        pipe.execute()
+    except Exception as e:
+        # The next reconciliation rebuilds the counters from UsageLog
+        logger.warning(f"Failed to update usage counters for log {log.id}: {str(e)}")
+
+
+def aggregate_usage(scope, scope_id, period, start=None):
+    """
+    Aggregate usage of a scope and period from UsageLog.
+
+    Args:
+        scope: 'user', 'workspace' or 'organization'
+        scope_id: ID of the scope entity
+        period: 'monthly' or 'daily'
+        start: Period start, defaults to the current period
+
+    Returns:
+        Dict with requests, tokens and cost
+    """
+    from ai.models import UsageLog
+
+    start = start or get_period_start(period)
+    result = UsageLog.objects.filter(
+        **{SCOPE_FIELDS[scope]: scope_id},
+        timestamp__gte=start,
+        timestamp__lt=get_period_end(period, start)
+    ).aggregate(
+        requests=Count('id'),
+        tokens=Sum('total_tokens', filter=Q(success=True)),
+        cost=Sum('estimated_cost', filter=Q(success=True))
+    )
+
+    return {
+        'requests': result['requests'] or 0,
+        'tokens': result['tokens'] or 0,
+        'cost': result['cost'] or Decimal('0'),
+    }
+
+
+def rebuild_usage_counters(scope, scope_id, period, start=None):
+    """
+    Rebuild one counter from UsageLog.
+
+    Returns:
+        Dict with requests, tokens and cost
+    """
+    start = start or get_period_start(period)
+    usage = aggregate_usage(scope, scope_id, period, start)
+
+    key = get_counter_key(scope, scope_id, period, start)
+    pipe = get_redis_client().pipeline()
+    pipe.hset(key, mapping=_counter_mapping(usage['requests'], usage['tokens'], usage['cost']))
+    pipe.expireat(key, _get_expiry(period, start))
+    pipe.execute()
+
+    return usage
+
+
+def get_usage_counters(scope, scope_id, period):
+    """
+    Get current-period usage of a scope.
+
+    Args:
+        scope: 'user', 'workspace' or 'organization'
+        scope_id: ID of the scope entity
+        period: 'monthly' or 'daily'
+
+    Returns:
+        Dict with requests, tokens and cost
+    """
+    return get_usage_counters_many([(scope, scope_id, period)])[0]
+
+
+def get_usage_counters_many(counters):
+    """
+    Get current-period usage of several scopes in one Redis round trip.
+
+    Args:
+        counters: List of (scope, scope_id, period) tuples
+
+    Returns:
+        List of dicts with requests, tokens and cost, in the same order
+    """
+    starts = [get_period_start(period) for _, _, period in counters]
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for (scope, scope_id, period), start in zip(counters, starts):
+            pipe.hgetall(get_counter_key(scope, scope_id, period, start))
+        raw_counters = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Usage counters unavailable: {str(e)}")
+        return [
+            aggregate_usage(scope, scope_id, period, start)
+            for (scope, scope_id, period), start in zip(counters, starts)
+        ]
+
+    results = []
+    for (scope, scope_id, period), start, raw in zip(counters, starts, raw_counters):
+        if raw.get('built'):
+            results.append(_parse_counters(raw))
+            continue
+
+        try:
+            results.append(rebuild_usage_counters(scope, scope_id, period, start))
+        except Exception as e:
+            logger.warning(f"Failed to rebuild usage counter for {scope} {scope_id}: {str(e)}")
+            results.append(aggregate_usage(scope, scope_id, period, start))
+
+    return results
+
+
+def reconcile_usage_counters():
+    """
+    Rebuild the current-period counters of every scope with usage.
+
+    Uses one grouped aggregate per scope and period.
+
+    Returns:
+        Number of counters written
+    """
+    from ai.models import UsageLog
+
+    written = 0
+    pipe = get_redis_client().pipeline()
+
+    for period in PERIODS:
+        start = get_period_start(period)
+        logs = UsageLog.objects.filter(
+            timestamp__gte=start,
+            timestamp__lt=get_period_end(period, start)
+        )
+
+        for scope, field in SCOPE_FIELDS.items():
+            rows = logs.exclude(**{f'{field}__isnull': True}).values(field).annotate(
+                requests=Count('id'),
+                tokens=Sum('total_tokens', filter=Q(success=True)),
+                cost=Sum('estimated_cost', filter=Q(success=True))
+            ).order_by()
+
+            for row in rows:
+                key = get_counter_key(scope, row[field], period, start)
+                pipe.hset(key, mapping=_counter_mapping(row['requests'], row['tokens'], row['cost']))
+                pipe.expireat(key, _get_expiry(period, start))
+                written += 1
+
+    pipe.execute()
+    return written
@@ -0,0 +1,162 @@
+"""
+Pre-flight token and cost estimation for content generation.
+
+The prompt side is counted with a local tokenizer on the rendered request.
+The completion side is predicted from recent completion sizes of the same
+kind in UsageLog, falling back to the request's max_tokens.
+"""
+import logging
+import math
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, StdDev
+from django.utils import timezone
+
+try:
+    import tiktoken
+except ImportError:
+    # Fall back to a byte-length estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead (role markers and reply priming)
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+# Without a tokenizer, assume about four bytes of UTF-8 per token
+BYTES_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model):
+    """Tokenizer encoding for a model, or None if it can't be loaded."""
+    if tiktoken is None:
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        # Encodings are downloaded on first use; don't retry on every call
+        logger.warning(f"Tokenizer unavailable for {model}, using byte estimate: {str(e)}")
+        return None
+
+
+def count_tokens(text, model):
+    """
+    Count the tokens of a text for a model.
+
+    Args:
+        text: Text to count
+        model: Model name
+
+    Returns:
+        Token count
+    """
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    return math.ceil(len(text.encode('utf-8')) / BYTES_PER_TOKEN)
+
+
+def count_message_tokens(messages, model):
+    """Count the prompt tokens of a list of chat messages."""
+    return sum(
+        TOKENS_PER_MESSAGE + count_tokens(message['content'], model)
+        for message in messages
+    ) + TOKENS_PER_REPLY
+
+
+def get_completion_token_stats(kind):
+    """
+    Get recent completion size statistics for a generation kind.
+
+    Args:
+        kind: Generation kind (outline, draft, rewrite, caption)
+
+    Returns:
+        Dict with samples, mean and stddev of completion tokens
+    """
+    from ai.models import UsageLog
+
+    cache_key = f'ai_completion_stats:{kind}'
+    stats = cache.get(cache_key)
+    if stats is not None:
+        return stats
+
+    since = timezone.now() - timedelta(days=getattr(settings, 'AI_ESTIMATE_HISTORY_DAYS', 30))
+    result = UsageLog.objects.filter(
+        ai_job__kind=kind,
+        success=True,
+        cache_hit=False,
+        timestamp__gte=since
+    ).aggregate(
+        samples=Count('id'),
+        mean=Avg('completion_tokens'),
+        stddev=StdDev('completion_tokens')
+    )
+    stats = {
+        'samples': result['samples'],
+        'mean': float(result['mean'] or 0),
+        'stddev': float(result['stddev'] or 0),
+    }
+
+    cache.set(cache_key, stats, getattr(settings, 'AI_ESTIMATE_STATS_TTL', 3600))
+    return stats
+
+
+def predict_completion_tokens(kind, max_tokens):
+    """
+    Predict the completion size of a request.
+
+    Uses mean plus one standard deviation of recent completions so most
+    jobs settle below their reservation, capped at max_tokens. With too
+    little history the full max_tokens is assumed.
+    """
+    stats = get_completion_token_stats(kind)
+    if stats['samples'] < getattr(settings, 'AI_ESTIMATE_MIN_SAMPLES', 10):
+        return max_tokens
+
+    return min(max_tokens, math.ceil(stats['mean'] + stats['stddev']))
+
+
+def estimate_generation_cost(content, params):
+    """
+    Estimate tokens and cost of a generation job before it is queued.
+
+    Args:
+        content: Content instance
+        params: Dict with generation parameters
+
+    Returns:
+        Dict with model, prompt_tokens, completion_tokens and estimated_cost
+    """
+    from ai.client import calculate_cost
+    from ai.tasks import render_generation_request
+
+    request_kwargs = render_generation_request(content, params)
+    model = request_kwargs['model']
+
+    prompt_tokens = count_message_tokens(request_kwargs['messages'], model)
+    completion_tokens = predict_completion_tokens(
+        params.get('kind', 'draft'), request_kwargs['max_tokens']
+    )
+
+    cost = calculate_cost(model, prompt_tokens, completion_tokens)
+    if params.get('execution_mode') == 'batch':
+        cost *= getattr(settings, 'AI_BATCH_COST_DISCOUNT', 0.5)
+
+    return {
+        'model': model,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'estimated_cost': Decimal(str(round(cost, 6))),
+    }
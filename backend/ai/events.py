@@ -0,0 +1,76 @@
+"""
+Real-time AiJob events published over Redis pub/sub.
+
+Events are consumed by the Server-Sent Events endpoint so clients don't
+have to poll the jobs API.
+"""
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Job statuses after which no more events are published
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def get_job_channel(job_id):
+    """Pub/sub channel for a job's events."""
+    return f'ai_job_events:{job_id}'
+
+
+def publish_job_event(job_id, event, data):
+    """
+    Publish an event for a job.
+
+    Publishing is best-effort: a Redis outage must never fail the job.
+
+    Args:
+        job_id: AiJob ID
+        event: Event name ('status' or 'partial')
+        data: JSON-serializable event payload
+    """
+    try:
+        get_redis_client().publish(
+            get_job_channel(job_id),
+            json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to publish {event} event for job {job_id}: {str(e)}")
+
+
+def get_job_status_payload(job):
+    """
+    Build the status event payload for a job.
+
+    Args:
+        job: AiJob instance
+
+    Returns:
+        Dict describing the job's current state
+    """
+    return {
+        'id': job.id,
+        'status': job.status,
+        'started_at': job.started_at,
+        'completed_at': job.completed_at,
+        'result_data': job.result_data,
+        'error_message': job.error_message,
+    }
+
+
+def format_sse(event, data):
+    """
+    Format a Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        SSE-formatted string
+    """
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
@@ -0,0 +1,52 @@
+"""
+Rebuild hourly and daily usage rollups from usage_logs.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.models import UsageLog
+from ai.rollups import rebuild_usage_rollups, truncate
+
+
+class Command(BaseCommand):
+    help = 'Rebuild usage rollups from usage_logs, one day per transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First day to rebuild (YYYY-MM-DD), defaults to the oldest usage log'
+        )
+        parser.add_argument(
+            '--end',
+            help='Last day to rebuild (YYYY-MM-DD), defaults to today'
+        )
+
+    def handle(self, *args, **options):
+        start = self._parse_day(options['start']) if options['start'] else None
+        end = self._parse_day(options['end']) if options['end'] else truncate('day', datetime.now(dt_timezone.utc))
+
+        if start is None:
+            oldest = UsageLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+            if oldest is None:
+                self.stdout.write('No usage logs to roll up')
+                return
+            start = truncate('day', oldest)
+
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        day = start
+        written = 0
+        while day <= end:
+            written += rebuild_usage_rollups(day, day + timedelta(days=1))
+            day += timedelta(days=1)
+
+        days = (end - start).days + 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} rollup rows over {days} days'))
+
+    def _parse_day(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value}')
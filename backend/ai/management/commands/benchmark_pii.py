@@ -0,0 +1,106 @@
+"""
+Measure PII redaction throughput on large bodies.
+"""
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai.pii import PIIRedactor
+
+
+WORDS = ['این', 'یک', 'متن', 'نمونه', 'برای', 'تولید', 'محتوا', 'است', 'content', 'marketing', 'و', 'با']
+SAMPLE_PII = [
+    '09123456789', '+989351234567', '۰۹۱۲۳۴۵۶۷۸۹', 'test@example.com', 'info@company.ir',
+    'IR123456789012345678901234', '1234567890',
+]
+
+
+def build_body(size, pii_every=200, seed=0):
+    """Build a Persian-heavy body of size characters with PII every pii_every words on average."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        has_pii = pii_every and rng.randrange(pii_every) == 0
+        word = rng.choice(SAMPLE_PII) if has_pii else rng.choice(WORDS)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+
+def legacy_redact(text, redact_national_id=False):
+    """The previous redactor: findall then sub for every pattern."""
+    patterns = [PIIRedactor.PHONE_PATTERN, PIIRedactor.EMAIL_PATTERN, PIIRedactor.IBAN_PATTERN]
+    if redact_national_id:
+        patterns.append(PIIRedactor.NATIONAL_ID_PATTERN)
+
+    mapping = {}
+    for pattern in patterns:
+        if pattern.findall(text):
+            text = pattern.sub(lambda match: mapping.setdefault(match.group(0), f'[PII_{len(mapping)}]'), text)
+    return text
+
+
+def legacy_has_pii(text):
+    """The previous detector: one search per pattern."""
+    patterns = [PIIRedactor.PHONE_PATTERN, PIIRedactor.EMAIL_PATTERN, PIIRedactor.IBAN_PATTERN]
+    return any(pattern.search(text) for pattern in patterns)
+
+
+def legacy_restore(text, reverse_mapping):
+    """The previous restore: one str.replace per placeholder."""
+    for placeholder, original in reverse_mapping.items():
+        text = text.replace(placeholder, original)
+    return text
+
+
+class Command(BaseCommand):
+    help = 'Compare single-pass PII redaction and restore with the previous implementations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50_000, help='Body size in characters')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--national-id', action='store_true', help='Also redact national IDs')
+
+    def handle(self, *args, **options):
+        body = build_body(options['size'])
+        clean_body = build_body(options['size'], pii_every=None)
+        iterations = options['iterations']
+        national_id = options['national_id']
+        redactor = PIIRedactor()
+        # The per-call redaction logs would dominate the output
+        logging.getLogger('ai.pii').setLevel(logging.WARNING)
+
+        results = {
+            'per-pattern': self._measure(lambda: legacy_redact(body, national_id), iterations),
+            'single-pass': self._measure(lambda: redactor.redact(body, national_id), iterations),
+            'per-pattern has_pii': self._measure(lambda: legacy_has_pii(clean_body), iterations),
+            'single-pass has_pii': self._measure(lambda: redactor.has_pii(clean_body), iterations),
+        }
+        redacted, _ = redactor.redact(body, national_id)
+        reverse_mapping = redactor.get_reverse_mapping()
+        results['per-placeholder restore'] = self._measure(
+            lambda: legacy_restore(redacted, reverse_mapping), iterations
+        )
+        results['single-pass restore'] = self._measure(lambda: redactor.restore(redacted), iterations)
+
+        size_mb = len(body.encode()) / 1_000_000
+        for name, seconds in results.items():
+            self.stdout.write(f'{name:>24}: {seconds * 1000:8.2f} ms/body  {size_mb / seconds:8.1f} MB/s')
+        speedup = results['per-pattern'] / results['single-pass']
+        self.stdout.write(self.style.SUCCESS(f'Single-pass redaction is {speedup:.1f}x faster'))
+        speedup = results['per-pattern has_pii'] / results['single-pass has_pii']
+        self.stdout.write(self.style.SUCCESS(f'Single-pass detection is {speedup:.1f}x faster'))
+        speedup = results['per-placeholder restore'] / results['single-pass restore']
+        self.stdout.write(self.style.SUCCESS(
+            f'Single-pass restore of {len(reverse_mapping)} placeholders is {speedup:.1f}x faster'
+        ))
+
+    def _measure(self, func, iterations):
+        func()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations
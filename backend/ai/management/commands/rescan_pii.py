@@ -0,0 +1,164 @@
+"""
+Re-scan content bodies and versions for PII and update the content flags.
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.pii import count_pii_many, format_pii_warnings
+from contentmgmt.models import Content, ContentVersion
+from contentmgmt.versioning import fill_version_bodies
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-scan Content.body and ContentVersion.body_markdown for PII and update '
+        'has_pii/pii_warnings, resumable from a checkpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Contents per scanning batch and bulk update'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched per round trip while streaming'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Scanning processes, 0 to scan in this process'
+        )
+        parser.add_argument(
+            '--start-after', type=int,
+            help='Resume after this content ID, overriding the checkpoint file'
+        )
+        parser.add_argument(
+            '--checkpoint-file',
+            help='File holding the last content ID written, read on start and updated after every batch'
+        )
+        parser.add_argument(
+            '--national-id', action='store_true',
+            help='Also flag national IDs'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Set the flags from the scan alone, clearing them where no PII is found; '
+                 'by default PII found is only added to the existing flags'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+        checkpoint_file = options['checkpoint_file']
+        if batch_size < 1 or chunk_size < 1:
+            raise CommandError('--batch-size and --chunk-size must be positive')
+
+        start_after = options['start_after']
+        if start_after is None and checkpoint_file and os.path.exists(checkpoint_file):
+            with open(checkpoint_file) as f:
+                start_after = int(f.read().strip() or 0)
+        start_after = start_after or 0
+
+        if workers:
+            # Spawned rather than forked, so workers don't share the database connection
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+        # Batches are written in order, so the checkpoint only ever covers finished batches
+        pending = deque()
+        max_pending = max(workers, 1) * 2
+        self.stats = {'contents': 0, 'versions': 0, 'updated': 0}
+        self.start_time = time.monotonic()
+        self.checkpoint = start_after
+
+        try:
+            for batch in self._read_batches(start_after, batch_size, chunk_size):
+                items = [(content_id, texts) for content_id, (texts, _, _) in batch.items()]
+                future = executor.submit(count_pii_many, items, options['national_id'])
+                pending.append((batch, future))
+
+                if len(pending) >= max_pending:
+                    self._write_batch(*pending.popleft(), options['reset'], checkpoint_file)
+
+            while pending:
+                self._write_batch(*pending.popleft(), options['reset'], checkpoint_file)
+        finally:
+            executor.shutdown(wait=True)
+
+        elapsed = time.monotonic() - self.start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {self.stats['contents']} contents and {self.stats['versions']} versions "
+            f"in {elapsed:.1f}s, updated {self.stats['updated']} contents"
+        ))
+
+    def _read_batches(self, start_after, batch_size, chunk_size):
+        """
+        Stream contents after a checkpoint in batches with their version bodies.
+
+        Yields:
+            Dict mapping content ID to (texts, has_pii, pii_warnings)
+        """
+        contents = Content.objects.filter(id__gt=start_after).order_by('id').values_list(
+            'id', 'body', 'has_pii', 'pii_warnings'
+        )
+
+        batch = {}
+        for content_id, body, has_pii, pii_warnings in contents.iterator(chunk_size=chunk_size):
+            batch[content_id] = ([body] if body else [], has_pii, pii_warnings)
+            if len(batch) >= batch_size:
+                self._add_versions(batch, chunk_size)
+                yield batch
+                batch = {}
+
+        if batch:
+            self._add_versions(batch, chunk_size)
+            yield batch
+
+    def _add_versions(self, batch, chunk_size):
+        # Loading every version of the batch lets delta versions rebuild in memory
+        versions = list(ContentVersion.objects.filter(content_id__in=list(batch)).only(
+            'id', 'content_id', 'version_number', 'stored_body', 'delta', 'base_version_id'
+        ).iterator(chunk_size=chunk_size))
+        fill_version_bodies(versions)
+        for version in versions:
+            if version.body_markdown:
+                batch[version.content_id][0].append(version.body_markdown)
+                self.stats['versions'] += 1
+
+    def _write_batch(self, batch, future, reset, checkpoint_file):
+        """Write the flags that changed in a scanned batch and move the checkpoint."""
+        updates = []
+        for content_id, found in future.result():
+            _, has_pii, pii_warnings = batch[content_id]
+            warnings = format_pii_warnings(found)
+            if not reset:
+                # Keep flags raised by earlier scans, e.g. of the generation input
+                warnings = {**(pii_warnings if isinstance(pii_warnings, dict) else {}), **warnings}
+
+            new_has_pii = bool(warnings) or (has_pii and not reset)
+            if new_has_pii != has_pii or warnings != (pii_warnings or {}):
+                updates.append(Content(id=content_id, has_pii=new_has_pii, pii_warnings=warnings))
+
+        if updates:
+            Content.objects.bulk_update(updates, ['has_pii', 'pii_warnings'])
+
+        self.stats['contents'] += len(batch)
+        self.stats['updated'] += len(updates)
+        self.checkpoint = max(batch)
+        if checkpoint_file:
+            with open(checkpoint_file, 'w') as f:
+                f.write(str(self.checkpoint))
+
+        elapsed = time.monotonic() - self.start_time
+        rows = self.stats['contents'] + self.stats['versions']
+        self.stdout.write(
+            f"{self.stats['contents']} contents, {self.stats['versions']} versions, "
+            f"{self.stats['updated']} updated, {rows / elapsed if elapsed else 0:.0f} rows/s, "
+            f"checkpoint {self.checkpoint}"
+        )
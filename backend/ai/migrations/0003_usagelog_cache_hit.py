@@ -0,0 +1,18 @@
+# Generated migration for generation response cache
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_aijob_auditlog_aiusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usagelog',
+            name='cache_hit',
+            field=models.BooleanField(default=False, help_text='Served from the generation cache without an API call'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated migration for bulk generation batches
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_usagelog_cache_hit'),
+        ('accounts', '0002_workspace_ai_cache_enabled'),
+        ('contentmgmt', '0002_contentversion_content_current_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiJobBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=20)),
+                ('kind', models.CharField(max_length=20)),
+                ('params', models.JSONField(default=dict)),
+                ('total_jobs', models.IntegerField(default=0)),
+                ('completed_jobs', models.IntegerField(default=0)),
+                ('failed_jobs', models.IntegerField(default=0)),
+                ('group_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_job_batches', to='contentmgmt.project')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_job_batches', to=settings.AUTH_USER_MODEL)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_job_batches', to='accounts.workspace')),
+            ],
+            options={
+                'db_table': 'ai_job_batches',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['project'], name='ai_job_batc_project_b3b488_idx'),
+                    models.Index(fields=['workspace'], name='ai_job_batc_workspa_06b919_idx'),
+                    models.Index(fields=['-created_at'], name='ai_job_batc_created_95eb09_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='aijob',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='ai.aijobbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='aijob',
+            index=models.Index(fields=['batch', 'status'], name='ai_jobs_batch_i_dcafb9_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated migration for provider batch API execution
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_aijobbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(max_length=20)),
+                ('provider_batch_id', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('completed', 'Completed'), ('failed', 'Failed')], default='submitted', max_length=20)),
+                ('model', models.CharField(max_length=100)),
+                ('input_file_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('output_file_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('error_file_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('request_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ai_provider_batches',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['status'], name='ai_provider_status_8fbd40_idx'),
+                    models.Index(fields=['provider_batch_id'], name='ai_provider_provide_f84283_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='aijob',
+            name='provider_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='ai.providerbatch'),
+        ),
+        migrations.AddField(
+            model_name='aijob',
+            name='execution_mode',
+            field=models.CharField(choices=[('realtime', 'Realtime'), ('batch', 'Batch')], default='realtime', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='aijob',
+            index=models.Index(fields=['execution_mode', 'status'], name='ai_jobs_executi_b24b64_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated migration for budget reservations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_providerbatch'),
+        ('accounts', '0002_workspace_ai_cache_enabled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('settled', 'Settled'), ('released', 'Released')], default='active', max_length=20)),
+                ('amount', models.DecimalField(decimal_places=6, max_digits=10)),
+                ('actual_cost', models.DecimalField(blank=True, decimal_places=6, max_digits=10, null=True)),
+                ('estimated_prompt_tokens', models.IntegerField(default=0)),
+                ('estimated_completion_tokens', models.IntegerField(default=0)),
+                ('expires_at', models.DateTimeField()),
+                ('settled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ai_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='budget_reservations', to='ai.aijob')),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budget_reservations', to='accounts.workspace')),
+            ],
+            options={
+                'db_table': 'budget_reservations',
+                'indexes': [
+                    models.Index(fields=['workspace', 'status'], name='budget_rese_workspa_7bcc86_idx'),
+                    models.Index(fields=['ai_job'], name='budget_rese_ai_job__1b1800_idx'),
+                ],
+            },
+        ),
+    ]
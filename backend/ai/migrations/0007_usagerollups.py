@@ -0,0 +1,81 @@
+# Generated migration for hourly and daily usage rollups
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0006_budgetreservation'),
+        ('accounts', '0002_workspace_ai_cache_enabled'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollupHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('model', models.CharField(max_length=100)),
+                ('requests', models.IntegerField(default=0)),
+                ('failed_requests', models.IntegerField(default=0)),
+                ('prompt_tokens', models.BigIntegerField(default=0)),
+                ('completion_tokens', models.BigIntegerField(default=0)),
+                ('total_tokens', models.BigIntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=6, default=0, max_digits=14)),
+                ('cache_hits', models.IntegerField(default=0)),
+                ('cache_prompt_tokens', models.BigIntegerField(default=0)),
+                ('cache_completion_tokens', models.BigIntegerField(default=0)),
+                ('organization', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.organization')),
+                ('user', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('workspace', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.workspace')),
+            ],
+            options={
+                'db_table': 'usage_rollups_hourly',
+                'indexes': [
+                    models.Index(fields=['organization', 'bucket'], name='usage_rollu_organiz_57198e_idx'),
+                    models.Index(fields=['workspace', 'bucket'], name='usage_rollu_workspa_9a3319_idx'),
+                    models.Index(fields=['user', 'bucket'], name='usage_rollu_user_id_69112b_idx'),
+                    models.Index(fields=['bucket'], name='usage_rollu_bucket_f88a24_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('bucket', 'organization', 'workspace', 'user', 'model'), name='usage_rollups_hourly_key', nulls_distinct=False),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='UsageRollupDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('model', models.CharField(max_length=100)),
+                ('requests', models.IntegerField(default=0)),
+                ('failed_requests', models.IntegerField(default=0)),
+                ('prompt_tokens', models.BigIntegerField(default=0)),
+                ('completion_tokens', models.BigIntegerField(default=0)),
+                ('total_tokens', models.BigIntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=6, default=0, max_digits=14)),
+                ('cache_hits', models.IntegerField(default=0)),
+                ('cache_prompt_tokens', models.BigIntegerField(default=0)),
+                ('cache_completion_tokens', models.BigIntegerField(default=0)),
+                ('organization', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.organization')),
+                ('user', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('workspace', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.workspace')),
+            ],
+            options={
+                'db_table': 'usage_rollups_daily',
+                'indexes': [
+                    models.Index(fields=['organization', 'bucket'], name='usage_rollu_organiz_69724f_idx'),
+                    models.Index(fields=['workspace', 'bucket'], name='usage_rollu_workspa_08eba7_idx'),
+                    models.Index(fields=['user', 'bucket'], name='usage_rollu_user_id_8af582_idx'),
+                    models.Index(fields=['bucket'], name='usage_rollu_bucket_6ddd1a_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('bucket', 'organization', 'workspace', 'user', 'model'), name='usage_rollups_daily_key', nulls_distinct=False),
+                ],
+            },
+        ),
+    ]
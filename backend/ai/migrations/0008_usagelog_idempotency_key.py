@@ -0,0 +1,24 @@
+# Generated migration for buffered usage log writes
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0007_usagerollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usagelog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Identifies the usage so retried or redelivered writes count once', max_length=100, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='usagelog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated migration for monthly partitioning of usage_logs and audit_logs
+
+from django.db import migrations, models
+
+
+PARTITIONED_TABLES = ('usage_logs', 'audit_logs')
+
+
+def partition_log_tables(apps, schema_editor):
+    from ai.partitions import partition_table
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in PARTITIONED_TABLES:
+        partition_table(schema_editor, table)
+
+
+def unpartition_log_tables(apps, schema_editor):
+    from ai.partitions import unpartition_table
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in PARTITIONED_TABLES:
+        unpartition_table(schema_editor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0008_usagelog_idempotency_key'),
+    ]
+
+    operations = [
+        # Unique constraints on a partitioned table must include the partition key
+        migrations.AlterField(
+            model_name='usagelog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Identifies the usage so retried or redelivered writes count once', max_length=100, null=True),
+        ),
+        migrations.RunPython(partition_log_tables, unpartition_log_tables),
+        migrations.AddConstraint(
+            model_name='usagelog',
+            constraint=models.UniqueConstraint(fields=('idempotency_key', 'timestamp'), name='usage_logs_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated migration for the denormalized organization on AI jobs
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_JOBS = """
+UPDATE ai_jobs
+SET organization_id = workspaces.organization_id
+FROM workspaces
+WHERE workspaces.id = ai_jobs.workspace_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_workspace_ai_cache_enabled'),
+        ('ai', '0009_partition_log_tables'),
+    ]
+
+    operations = [
+        # Added nullable, backfilled, then made required
+        migrations.AddField(
+            model_name='aijob',
+            name='organization',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Denormalized workspace.organization, for tenant scoping', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_jobs', to='accounts.organization'),
+        ),
+        migrations.RunSQL(BACKFILL_JOBS, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='aijob',
+            name='organization',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Denormalized workspace.organization, for tenant scoping', on_delete=django.db.models.deletion.CASCADE, related_name='ai_jobs', to='accounts.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='aijob',
+            index=models.Index(fields=['organization', '-created_at'], name='ai_jobs_organiz_8a01fe_idx'),
+        ),
+    ]
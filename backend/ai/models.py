@@ -1,12 +1,131 @@
 """
 Models for AI usage tracking, limits, and jobs.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from accounts.models import Organization, Workspace
 
 
+class AiJobBatch(models.Model):
+    """Aggregate progress record for a bulk generation request."""
+    
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+    
+    project = models.ForeignKey(
+        'contentmgmt.Project',
+        on_delete=models.CASCADE,
+        related_name='ai_job_batches'
+    )
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.CASCADE,
+        related_name='ai_job_batches'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='ai_job_batches'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.RUNNING
+    )
+    kind = models.CharField(max_length=20)
+    params = models.JSONField(default=dict)
+    total_jobs = models.IntegerField(default=0)
+    completed_jobs = models.IntegerField(default=0)
+    failed_jobs = models.IntegerField(default=0)
+    group_id = models.CharField(max_length=255, blank=True, null=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ai_job_batches'
+        indexes = [
+            models.Index(fields=['project']),
+            models.Index(fields=['workspace']),
+            models.Index(fields=['-created_at']),
+        ]
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"AiJobBatch {self.id} - {self.kind} - {self.completed_jobs + self.failed_jobs}/{self.total_jobs}"
+    
+    @property
+    def progress(self):
+        """Fraction of jobs that have finished."""
+        if not self.total_jobs:
+            return 1.0
+        return (self.completed_jobs + self.failed_jobs) / self.total_jobs
+    
+    def refresh_progress(self):
+        """
+        Recount finished jobs and complete the batch when all are done.
+        
+        Counts are derived from job statuses in one aggregate query, so
+        retried or re-marked jobs are never counted twice.
+        """
+        counts = self.jobs.aggregate(
+            completed=models.Count('id', filter=models.Q(status=AiJob.Status.COMPLETED)),
+            failed=models.Count('id', filter=models.Q(status=AiJob.Status.FAILED)),
+        )
+        self.completed_jobs = counts['completed']
+        self.failed_jobs = counts['failed']
+        
+        update_fields = ['completed_jobs', 'failed_jobs', 'updated_at']
+        if self.completed_jobs + self.failed_jobs >= self.total_jobs and self.status != self.Status.COMPLETED:
+            self.status = self.Status.COMPLETED
+            self.completed_at = timezone.now()
+            update_fields += ['status', 'completed_at']
+        
+        self.save(update_fields=update_fields)
+
+
+class ProviderBatch(models.Model):
+    """A JSONL batch of generation requests submitted to a provider batch API."""
+    
+    class Status(models.TextChoices):
+        SUBMITTED = 'submitted', 'Submitted'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+    
+    backend = models.CharField(max_length=20)  # openai, local
+    provider_batch_id = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.SUBMITTED
+    )
+    model = models.CharField(max_length=100)
+    input_file_id = models.CharField(max_length=255, blank=True, null=True)
+    output_file_id = models.CharField(max_length=255, blank=True, null=True)
+    error_file_id = models.CharField(max_length=255, blank=True, null=True)
+    request_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ai_provider_batches'
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['provider_batch_id']),
+        ]
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"ProviderBatch {self.provider_batch_id} - {self.status}"
+
+
 class AiJob(models.Model):
     """Track AI content generation jobs."""
     
@@ -17,6 +136,10 @@ class AiJob(models.Model):
         FAILED = 'failed', 'Failed'
         CANCELLED = 'cancelled', 'Cancelled'
     
+    class ExecutionMode(models.TextChoices):
+        REALTIME = 'realtime', 'Realtime'
+        BATCH = 'batch', 'Batch'
+    
     content = models.ForeignKey(
         'contentmgmt.Content',
         on_delete=models.CASCADE,
@@ -33,11 +156,38 @@ class AiJob(models.Model):
         on_delete=models.CASCADE,
         related_name='ai_jobs'
     )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        editable=False,
+        db_index=False,
+        related_name='ai_jobs',
+        help_text="Denormalized workspace.organization, for tenant scoping"
+    )
+    batch = models.ForeignKey(
+        AiJobBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    provider_batch = models.ForeignKey(
+        ProviderBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
     status = models.CharField(
         max_length=20,
         choices=Status.choices,
         default=Status.PENDING
     )
+    execution_mode = models.CharField(
+        max_length=20,
+        choices=ExecutionMode.choices,
+        default=ExecutionMode.REALTIME
+    )
     kind = models.CharField(max_length=20)  # outline, draft, rewrite, caption
     params = models.JSONField(default=dict)
     result_data = models.JSONField(default=dict, blank=True, null=True)
@@ -55,18 +205,28 @@ class AiJob(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['workspace']),
             models.Index(fields=['status']),
+            models.Index(fields=['batch', 'status']),
+            models.Index(fields=['execution_mode', 'status']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['organization', '-created_at']),
         ]
         ordering = ['-created_at']
     
     def __str__(self):
         return f"AiJob {self.id} - {self.kind} - {self.status}"
     
+    def save(self, *args, **kwargs):
+        """Set the organization from the workspace."""
+        if self.organization_id is None:
+            self.organization_id = self.workspace.organization_id
+        super().save(*args, **kwargs)
+    
     def mark_running(self):
         """Mark job as running."""
         self.status = self.Status.RUNNING
         self.started_at = timezone.now()
         self.save(update_fields=['status', 'started_at', 'updated_at'])
+        self.publish_status()
     
     def mark_completed(self, result_data=None):
         """Mark job as completed."""
@@ -75,6 +235,8 @@ class AiJob(models.Model):
         if result_data:
             self.result_data = result_data
         self.save(update_fields=['status', 'completed_at', 'result_data', 'updated_at'])
+        self.publish_status()
+        self.update_batch_progress()
     
     def mark_failed(self, error_message):
         """Mark job as failed."""
@@ -83,6 +245,28 @@ class AiJob(models.Model):
         self.completed_at = timezone.now()
         self.retry_count += 1
         self.save(update_fields=['status', 'error_message', 'completed_at', 'retry_count', 'updated_at'])
+        self.publish_status()
+        self.update_batch_progress()
+        self.release_budget_reservation()
+    
+    def publish_status(self):
+        """Publish the current status to event subscribers once committed."""
+        from ai.events import publish_job_event, get_job_status_payload
+        
+        payload = get_job_status_payload(self)
+        transaction.on_commit(lambda: publish_job_event(self.id, 'status', payload))
+    
+    def update_batch_progress(self):
+        """Refresh the progress of the batch this job belongs to."""
+        if self.batch_id:
+            self.batch.refresh_progress()
+    
+    def release_budget_reservation(self):
+        """Give back the budget reserved for this job."""
+        self.budget_reservations.filter(status=BudgetReservation.Status.ACTIVE).update(
+            status=BudgetReservation.Status.RELEASED,
+            settled_at=timezone.now()
+        )
 
 
 class UsageLog(models.Model):
@@ -133,10 +317,28 @@ class UsageLog(models.Model):
     )
     success = models.BooleanField(default=True)
     error_message = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    cache_hit = models.BooleanField(
+        default=False,
+        help_text='Served from the generation cache without an API call'
+    )
+    idempotency_key = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text='Identifies the usage so retried or redelivered writes count once'
+    )
+    # Set when the usage happens, which precedes the insert of buffered logs
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'usage_logs'
+        # Partitioned by month on timestamp, which every unique constraint must include
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key', 'timestamp'],
+                name='usage_logs_idempotency_key'
+            ),
+        ]
         indexes = [
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['workspace', '-timestamp']),
@@ -149,6 +351,95 @@ class UsageLog(models.Model):
         return f"{self.model} - {self.total_tokens} tokens - {self.timestamp}"
 
 
+class UsageRollup(models.Model):
+    """
+    Usage of one organization, workspace, user and model in a time bucket.
+    
+    Rollups are aggregates, so the scope references carry no database
+    constraint and keep the IDs of deleted entities.
+    """
+    
+    bucket = models.DateTimeField()
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    model = models.CharField(max_length=100)
+    # Tokens and cost only count successful requests
+    requests = models.IntegerField(default=0)
+    failed_requests = models.IntegerField(default=0)
+    prompt_tokens = models.BigIntegerField(default=0)
+    completion_tokens = models.BigIntegerField(default=0)
+    total_tokens = models.BigIntegerField(default=0)
+    cost = models.DecimalField(max_digits=14, decimal_places=6, default=0)
+    cache_hits = models.IntegerField(default=0)
+    cache_prompt_tokens = models.BigIntegerField(default=0)
+    cache_completion_tokens = models.BigIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    def __str__(self):
+        return f"{self.model} - {self.bucket} - {self.requests} requests"
+
+
+class UsageRollupHourly(UsageRollup):
+    """Hourly usage rollup."""
+    
+    class Meta:
+        db_table = 'usage_rollups_hourly'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'organization', 'workspace', 'user', 'model'],
+                name='usage_rollups_hourly_key',
+                nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['organization', 'bucket']),
+            models.Index(fields=['workspace', 'bucket']),
+            models.Index(fields=['user', 'bucket']),
+            models.Index(fields=['bucket']),
+        ]
+
+
+class UsageRollupDaily(UsageRollup):
+    """Daily usage rollup."""
+    
+    class Meta:
+        db_table = 'usage_rollups_daily'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'organization', 'workspace', 'user', 'model'],
+                name='usage_rollups_daily_key',
+                nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['organization', 'bucket']),
+            models.Index(fields=['workspace', 'bucket']),
+            models.Index(fields=['user', 'bucket']),
+            models.Index(fields=['bucket']),
+        ]
+
+
 class UsageLimit(models.Model):
     """Usage limits for users, workspaces, or organizations."""
     
@@ -190,6 +481,50 @@ class UsageLimit(models.Model):
         return f"{self.scope} {self.scope_id} - {self.period} limit"
 
 
+class BudgetReservation(models.Model):
+    """Estimated cost of a queued job held against the workspace budget."""
+    
+    class Status(models.TextChoices):
+        ACTIVE = 'active', 'Active'
+        SETTLED = 'settled', 'Settled'
+        RELEASED = 'released', 'Released'
+    
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.CASCADE,
+        related_name='budget_reservations'
+    )
+    ai_job = models.ForeignKey(
+        AiJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='budget_reservations'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.ACTIVE
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=6)
+    actual_cost = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+    estimated_prompt_tokens = models.IntegerField(default=0)
+    estimated_completion_tokens = models.IntegerField(default=0)
+    expires_at = models.DateTimeField()
+    settled_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'budget_reservations'
+        indexes = [
+            models.Index(fields=['workspace', 'status']),
+            models.Index(fields=['ai_job']),
+        ]
+    
+    def __str__(self):
+        return f"Reservation {self.id} - ${self.amount} - {self.status}"
+
+
 class AuditLog(models.Model):
     """Audit log for content approval and status changes."""
     
@@ -223,6 +558,7 @@ class AuditLog(models.Model):
     
     class Meta:
         db_table = 'audit_logs'
+        # Partitioned by month on timestamp
         indexes = [
             models.Index(fields=['content']),
             models.Index(fields=['user']),
@@ -0,0 +1,268 @@
+"""
+Monthly range partitioning of usage_logs and audit_logs.
+
+On PostgreSQL both tables are partitioned by timestamp into one partition
+per month (usage_logs_p2026_03, ...) plus a default partition for rows
+outside every monthly partition. Queries filtering on timestamp only scan
+the partitions of the months they cover. The maintain_log_partitions task
+creates partitions ahead of time and drops whole partitions once they fall
+out of the retention period, instead of deleting rows.
+"""
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .rollups import next_bucket, truncate
+
+logger = logging.getLogger(__name__)
+
+# Partitioned tables and the settings holding their retention in months
+PARTITIONED_TABLES = {
+    'usage_logs': 'AI_USAGE_LOG_RETENTION_MONTHS',
+    'audit_logs': 'AI_AUDIT_LOG_RETENTION_MONTHS',
+}
+
+_PARTITION_SUFFIX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def partition_name(table, month):
+    """Name of the partition of a table holding one month."""
+    return f'{table}_p{month:%Y_%m}'
+
+
+def add_months(month, months):
+    """First day of the month some months after (or before) a month."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def is_partitioned(table, using=None):
+    """Whether a table is partitioned in the database."""
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return False
+
+    with using.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+        return cursor.fetchone() is not None
+
+
+def get_partitions(table, using=None):
+    """
+    List the monthly partitions of a table.
+
+    Returns:
+        Dict mapping the first day of each month to its partition name
+    """
+    using = using or connection
+    with using.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)',
+            [table]
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            month = datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def create_partition(table, month, using=None):
+    """
+    Create the partition of a table for one month.
+
+    PostgreSQL refuses a new partition while the default partition holds
+    rows belonging to it, so such rows are moved into the new partition.
+
+    Args:
+        table: Partitioned table name
+        month: First day of the month (UTC)
+        using: Optional database connection
+    """
+    using = using or connection
+    name = partition_name(table, month)
+    default = f'{table}_default'
+    bounds = [month, next_bucket('month', month)]
+
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {default} WHERE timestamp >= %s AND timestamp < %s)', bounds
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)', bounds)
+            return
+
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)', bounds)
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {default} WHERE timestamp >= %s AND timestamp < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            bounds
+        )
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+
+    logger.info(f"Created partition {name}")
+
+
+def create_partitions(table, start=None, months_ahead=None, using=None):
+    """
+    Create the missing monthly partitions of a table up to some months ahead.
+
+    Args:
+        table: Partitioned table name
+        start: Optional first month to cover, defaults to the current month
+        months_ahead: Months to create after the current one, defaults to
+                      AI_LOG_PARTITIONS_AHEAD
+        using: Optional database connection
+
+    Returns:
+        List of the created partition names
+    """
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'AI_LOG_PARTITIONS_AHEAD', 3)
+
+    current = truncate('month', datetime.now(dt_timezone.utc))
+    month = truncate('month', start) if start else current
+    last = add_months(current, months_ahead)
+    existing = get_partitions(table, using)
+
+    created = []
+    while month <= last:
+        if month not in existing:
+            create_partition(table, month, using)
+            created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_expired_partitions(table, retention_months, using=None):
+    """
+    Drop the monthly partitions of a table older than the retention period.
+
+    A partition is dropped once its whole month lies more than
+    retention_months before the current month. Rows in the default
+    partition are left alone.
+
+    Args:
+        table: Partitioned table name
+        retention_months: Number of full months to keep before the current one
+        using: Optional database connection
+
+    Returns:
+        List of the dropped partition names
+    """
+    using = using or connection
+    cutoff = add_months(truncate('month', datetime.now(dt_timezone.utc)), -retention_months)
+
+    dropped = []
+    for month, name in sorted(get_partitions(table, using).items()):
+        if month >= cutoff:
+            break
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+        logger.info(f"Dropped expired partition {name}")
+        dropped.append(name)
+    return dropped
+
+
+def maintain_log_partitions():
+    """
+    Create upcoming partitions and drop expired ones for every partitioned table.
+
+    Tables that aren't partitioned, e.g. on other databases, are skipped.
+
+    Returns:
+        Dict mapping each table to its created and dropped partition names
+    """
+    results = {}
+    for table, retention_setting in PARTITIONED_TABLES.items():
+        if not is_partitioned(table):
+            continue
+
+        retention_months = getattr(settings, retention_setting, None)
+        results[table] = {
+            'created': create_partitions(table),
+            'dropped': drop_expired_partitions(table, retention_months) if retention_months else [],
+        }
+    return results
+
+
+def _rebuild_table(schema_editor, table, partitioned):
+    """
+    Recreate a table with or without monthly partitioning, keeping its rows.
+
+    The table is renamed and replaced by a copy with the same columns,
+    identity sequence, indexes and constraints. A partitioned table's
+    primary key includes timestamp, as PostgreSQL requires of every unique
+    constraint on it.
+    """
+    old = f'{table}_old'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+
+        # Constraints other than the primary key, and indexes not backing a constraint
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype <> 'p'",
+            [table]
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = %s::regclass '
+            'AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid)',
+            [table]
+        )
+        indexes = [definition for definition, in cursor.fetchall()]
+
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        cursor.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE)'
+            + (' PARTITION BY RANGE (timestamp)' if partitioned else '')
+        )
+
+        if partitioned:
+            cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+            cursor.execute(f'SELECT min(timestamp) FROM {old}')
+            oldest, = cursor.fetchone()
+            create_partitions(table, start=oldest, using=schema_editor.connection)
+
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        cursor.execute(f'DROP TABLE {old}')
+
+        cursor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY '
+            + ('(id, timestamp)' if partitioned else '(id)')
+        )
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+        # Continue the ids where the old table stopped, under the old sequence name
+        cursor.execute(
+            f"SELECT pg_get_serial_sequence('{table}', 'id'), "
+            f"setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1), max(id) IS NOT NULL) "
+            f"FROM {table}"
+        )
+        sequence, _ = cursor.fetchone()
+        if sequence.split('.')[-1] != f'{table}_id_seq':
+            cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {table}_id_seq')
+
+
+def partition_table(schema_editor, table):
+    """Convert a table into one partitioned by month on timestamp."""
+    _rebuild_table(schema_editor, table, partitioned=True)
+
+
+def unpartition_table(schema_editor, table):
+    """Convert a partitioned table back into a plain table."""
+    _rebuild_table(schema_editor, table, partitioned=False)
@@ -1,76 +1,171 @@
 """
 PII (Personally Identifiable Information) redaction and restoration.
+
+All PII types are matched by one compiled alternation of named groups, so
+redaction and detection scan the text once whatever the number of types.
+Digits may be ASCII, Persian (۰-۹) or Arabic-Indic (٠-٩).
 """
 import re
-import uuid
 import logging
 from typing import Tuple, Dict, List
 
 logger = logging.getLogger(__name__)
 
 
-class PIIRedactor:
+def _digit(value: str) -> str:
+    """Character class matching an ASCII digit or its Persian and Arabic-Indic forms."""
+    return f'[{value}{chr(0x06f0 + int(value))}{chr(0x0660 + int(value))}]'
+
+
+DIGIT = r'[0-9\u06f0-\u06f9\u0660-\u0669]'
+
+# Iranian phone number: +98 or 0 followed by 9 and 9 digits
+PHONE_REGEX = rf'(?:\+?{_digit("9")}{_digit("8")}|{_digit("0")})?{_digit("9")}{DIGIT}{{9}}'
+
+# Email (RFC 5322 simplified)
+EMAIL_REGEX = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+# Iranian IBAN: IR followed by 24 digits
+IBAN_REGEX = rf'\bIR{DIGIT}{{24}}\b'
+
+# National ID (کد ملی): 10 digits
+NATIONAL_ID_REGEX = rf'\b{DIGIT}{{10}}\b'
+
+# PII types with their pattern and warning noun, in order of precedence
+# where matches start at the same place
+PII_TYPES = {
+    'email': (EMAIL_REGEX, 'email address(es)'),
+    'iban': (IBAN_REGEX, 'IBAN(s)'),
+    'phone': (PHONE_REGEX, 'phone number(s)'),
+    'national_id': (NATIONAL_ID_REGEX, 'potential national ID(s)'),
+}
+
+
+def _compile_scanner(pii_types) -> re.Pattern:
+    return re.compile('|'.join(f'(?P<{pii_type}>{PII_TYPES[pii_type][0]})' for pii_type in pii_types))
+
+
+# National IDs are only redacted on request, as any 10 digits match
+SCANNER = _compile_scanner(['email', 'iban', 'phone'])
+SCANNER_WITH_NATIONAL_ID = _compile_scanner(PII_TYPES)
+
+# Placeholders put in place of PII, e.g. [PHONE_12]
+PLACEHOLDER = re.compile(r'\[(?:' + '|'.join(pii_type.upper() for pii_type in PII_TYPES) + r')_\d+\]')
+
+# Every PII match lies within a run of these characters and contains a
+# digit or an @. Finding runs is a fast character-class search, so the
+# scanner only runs over the few runs that aren't plain words.
+CANDIDATE_RUN = re.compile(r'[A-Za-z0-9._%+\-@|\u06f0-\u06f9\u0660-\u0669]+')
+
+
+def scan(scanner: re.Pattern, text: str):
     """
-    Handles PII redaction and restoration with secure mapping.
+    Find PII in text in one pass.
+    
+    Args:
+        scanner: SCANNER or SCANNER_WITH_NATIONAL_ID
+        text: Text to scan
+        
+    Yields:
+        Matches in order, with the PII type as match.lastgroup
+    """
+    for run in CANDIDATE_RUN.finditer(text):
+        if run.group().isalpha():
+            continue
+        # One more character so word boundaries at the end of the run see past it
+        yield from scanner.finditer(text, run.start(), run.end() + 1)
+
+
+def count_pii(text: str, redact_national_id: bool = False) -> Dict[str, int]:
     """
+    Count the PII of each type in text without redacting it.
     
-    # Iranian phone number pattern: +98 or 0 followed by 9 and 9 digits
-    PHONE_PATTERN = re.compile(r'(?:\+?98|0)?9\d{9}')
+    Args:
+        text: Text to scan
+        redact_national_id: Whether to count national IDs
+        
+    Returns:
+        Dict mapping PII type to its number of matches, for types found
+    """
+    found = {}
+    if text:
+        for match in scan(SCANNER_WITH_NATIONAL_ID if redact_national_id else SCANNER, text):
+            found[match.lastgroup] = found.get(match.lastgroup, 0) + 1
+    return found
+
+
+def count_pii_many(items, redact_national_id: bool = False) -> List[Tuple[object, Dict[str, int]]]:
+    """
+    Count PII in groups of texts, e.g. in a worker process.
     
-    # Email pattern (RFC 5322 simplified)
-    EMAIL_PATTERN = re.compile(
-        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    )
+    Args:
+        items: List of (key, texts)
+        redact_national_id: Whether to count national IDs
+        
+    Returns:
+        List of (key, found) with the PII counts over all texts of each key
+    """
+    results = []
+    for key, texts in items:
+        found = {}
+        for text in texts:
+            for pii_type, count in count_pii(text, redact_national_id).items():
+                found[pii_type] = found.get(pii_type, 0) + count
+        results.append((key, found))
+    return results
+
+
+def format_pii_warnings(found: Dict[str, int]) -> Dict[str, List[str]]:
+    """
+    Build the PII warnings stored on content from PII counts.
     
-    # Iranian IBAN pattern: IR followed by 24 digits
-    IBAN_PATTERN = re.compile(r'\bIR[0-9]{24}\b')
+    Args:
+        found: Dict mapping PII type to its number of matches
+        
+    Returns:
+        Dict mapping PII type to its warning messages
+    """
+    return {
+        pii_type: [f"Found {found[pii_type]} {noun}"]
+        for pii_type, (_, noun) in PII_TYPES.items() if found.get(pii_type)
+    }
+
+
+class PIIRedactor:
+    """
+    Handles PII redaction and restoration with secure mapping.
+    """
     
-    # National ID (کد ملی) pattern: 10 digits
-    NATIONAL_ID_PATTERN = re.compile(r'\b\d{10}\b')
+    PHONE_PATTERN = re.compile(PHONE_REGEX)
+    EMAIL_PATTERN = re.compile(EMAIL_REGEX)
+    IBAN_PATTERN = re.compile(IBAN_REGEX)
+    NATIONAL_ID_PATTERN = re.compile(NATIONAL_ID_REGEX)
     
     def __init__(self):
         """Initialize with empty mapping."""
         self.mapping: Dict[str, str] = {}
         self.reverse_mapping: Dict[str, str] = {}
+        self.counters: Dict[str, int] = {}
     
     def _generate_placeholder(self, pii_type: str) -> str:
         """
-        Generate a unique placeholder for redacted PII.
+        Generate the next placeholder for redacted PII.
         
-        Args:
-            pii_type: Type of PII (phone, email, iban, national_id)
-            
-        Returns:
-            Unique placeholder string
-        """
-        unique_id = str(uuid.uuid4())[:8]
-        return f"[{pii_type.upper()}_{unique_id}]"
-    
-    def _redact_pattern(self, text: str, pattern: re.Pattern, pii_type: str) -> str:
-        """
-        Redact all matches of a pattern in text.
+        Placeholders are numbered per type in order of appearance, so the
+        same text always redacts to the same output.
         
         Args:
-            text: Text to redact
-            pattern: Regex pattern to match
-            pii_type: Type of PII
+            pii_type: Type of PII (phone, email, iban, national_id)
             
         Returns:
-            Text with redacted PII
+            Unique placeholder string, e.g. [PHONE_1]
         """
-        def replace_match(match):
-            original = match.group(0)
-            if original not in self.mapping:
-                placeholder = self._generate_placeholder(pii_type)
-                self.mapping[original] = placeholder
-                self.reverse_mapping[placeholder] = original
-            return self.mapping[original]
-        
-        return pattern.sub(replace_match, text)
+        self.counters[pii_type] = self.counters.get(pii_type, 0) + 1
+        return f"[{pii_type.upper()}_{self.counters[pii_type]}]"
     
     def redact(self, text: str, redact_national_id: bool = False) -> Tuple[str, Dict[str, List[str]]]:
         """
-        Redact PII from text.
+        Redact PII from text in a single pass.
         
         Args:
             text: Text to redact
@@ -86,50 +181,39 @@ class PIIRedactor:
         # Reset mappings
         self.mapping = {}
         self.reverse_mapping = {}
+        self.counters = {}
         
-        redacted_text = text
-        pii_warnings = {}
-        
-        # Redact Iranian phone numbers
-        phone_matches = self.PHONE_PATTERN.findall(text)
-        if phone_matches:
-            redacted_text = self._redact_pattern(redacted_text, self.PHONE_PATTERN, 'phone')
-            pii_warnings['phone'] = [f"Found {len(phone_matches)} phone number(s)"]
-            logger.info(f"Redacted {len(phone_matches)} phone numbers")
-        
-        # Redact emails
-        email_matches = self.EMAIL_PATTERN.findall(text)
-        if email_matches:
-            redacted_text = self._redact_pattern(redacted_text, self.EMAIL_PATTERN, 'email')
-            pii_warnings['email'] = [f"Found {len(email_matches)} email address(es)"]
-            logger.info(f"Redacted {len(email_matches)} email addresses")
-        
-        # Redact IBANs
-        iban_matches = self.IBAN_PATTERN.findall(text)
-        if iban_matches:
-            redacted_text = self._redact_pattern(redacted_text, self.IBAN_PATTERN, 'iban')
-            pii_warnings['iban'] = [f"Found {len(iban_matches)} IBAN(s)"]
-            logger.info(f"Redacted {len(iban_matches)} IBANs")
-        
-        # Optionally redact national IDs
-        if redact_national_id:
-            national_id_matches = self.NATIONAL_ID_PATTERN.findall(text)
-            if national_id_matches:
-                redacted_text = self._redact_pattern(
-                    redacted_text, 
-                    self.NATIONAL_ID_PATTERN, 
-                    'national_id'
-                )
-                pii_warnings['national_id'] = [
-                    f"Found {len(national_id_matches)} potential national ID(s)"
-                ]
-                logger.info(f"Redacted {len(national_id_matches)} national IDs")
+        scanner = SCANNER_WITH_NATIONAL_ID if redact_national_id else SCANNER
+        found = {}
+        
+        def replace_match(match):
+            pii_type = match.lastgroup
+            found[pii_type] = found.get(pii_type, 0) + 1
+            original = match.group(0)
+            if original not in self.mapping:
+                placeholder = self._generate_placeholder(pii_type)
+                self.mapping[original] = placeholder
+                self.reverse_mapping[placeholder] = original
+            return self.mapping[original]
+        
+        parts = []
+        position = 0
+        for match in scan(scanner, text):
+            parts.append(text[position:match.start()])
+            parts.append(replace_match(match))
+            position = match.end()
+        parts.append(text[position:])
+        redacted_text = ''.join(parts)
+        
+        pii_warnings = format_pii_warnings(found)
+        for pii_type, messages in pii_warnings.items():
+            logger.info(f"Redacted: {messages[0]}")
         
         return redacted_text, pii_warnings
     
     def restore(self, text: str) -> str:
         """
-        Restore PII in redacted text using the mapping.
+        Restore PII in redacted text using the mapping, in one pass.
         
         Args:
             text: Redacted text with placeholders
@@ -140,11 +224,17 @@ class PIIRedactor:
         if not text or not self.reverse_mapping:
             return text
         
-        restored_text = text
-        for placeholder, original in self.reverse_mapping.items():
-            restored_text = restored_text.replace(placeholder, original)
+        reverse_mapping = self.reverse_mapping
+        return PLACEHOLDER.sub(lambda match: reverse_mapping.get(match.group(0), match.group(0)), text)
+    
+    def restore_stream(self) -> 'PIIRestoreStream':
+        """
+        Start restoring PII in text that arrives in chunks.
         
-        return restored_text
+        Returns:
+            PIIRestoreStream using the current mapping
+        """
+        return PIIRestoreStream(self)
     
     def get_mapping(self) -> Dict[str, str]:
         """
@@ -182,17 +272,53 @@ class PIIRedactor:
         if not text:
             return False
         
-        patterns = [
-            self.PHONE_PATTERN,
-            self.EMAIL_PATTERN,
-            self.IBAN_PATTERN,
-        ]
+        return next(scan(SCANNER, text), None) is not None
+
+
+class PIIRestoreStream:
+    """
+    Restores PII in chunked text, e.g. a streamed completion.
+    
+    A placeholder split across chunks is held back until the chunk that
+    completes it, so at most one placeholder's worth of text is buffered.
+    """
+    
+    def __init__(self, redactor: PIIRedactor):
+        """
+        Args:
+            redactor: PIIRedactor whose mapping is restored
+        """
+        self.redactor = redactor
+        placeholders = redactor.reverse_mapping
+        # Incomplete placeholders a chunk may end with
+        self._prefixes = {
+            placeholder[:length] for placeholder in placeholders for length in range(1, len(placeholder))
+        }
+        self._longest = max(map(len, placeholders), default=0)
+        self._pending = ''
+    
+    def feed(self, text: str, final: bool = False) -> str:
+        """
+        Restore PII in the next chunk.
+        
+        Args:
+            text: Next chunk of redacted text
+            final: Whether this is the last chunk, so nothing is held back
+            
+        Returns:
+            Restored text that is safe to emit; concatenated over all
+            chunks, it equals restore() of the whole text
+        """
+        text = self._pending + text
+        self._pending = ''
         
-        for pattern in patterns:
-            if pattern.search(text):
-                return True
+        if not final:
+            start = text.rfind('[', max(len(text) - self._longest + 1, 0))
+            if start != -1 and text[start:] in self._prefixes:
+                self._pending = text[start:]
+                text = text[:start]
         
-        return False
+        return self.redactor.restore(text)
 
 
 def redact_pii(text: str, redact_national_id: bool = False) -> Tuple[str, Dict[str, List[str]], PIIRedactor]:
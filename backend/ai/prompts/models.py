@@ -92,33 +92,33 @@ DEFAULT_BLOG_DRAFT_PROMPT = """شما یک نویسنده فارسی‌زبان
 
 **قالب خروجی (Markdown):**
 
-# {عنوان اصلی}
+# {{عنوان اصلی}}
 
-{مقدمه}
+{{مقدمه}}
 
 ## بخش اول
 
-{محتوا}
+{{محتوا}}
 
 ### زیرعنوان (اختیاری)
 
-{محتوا}
+{{محتوا}}
 
 ## بخش دوم
 
-{محتوا}
+{{محتوا}}
 
 ## بخش سوم
 
-{محتوا}
+{{محتوا}}
 
 ## نتیجه‌گیری
 
-{جمع‌بندی و CTA}
+{{جمع‌بندی و CTA}}
 
 ---
 
-**متادیسکریپشن:** {متادیسکریپشن فارسی}
+**متادیسکریپشن:** {{متادیسکریپشن فارسی}}
 
 **نکات مهم:**
 - از زبان فارسی استانداد و روان استفاده کنید
@@ -0,0 +1,420 @@
+"""
+Hourly and daily usage rollups.
+
+Usage is summed per organization, workspace, user and model into hourly
+and daily buckets (UTC) as it is logged, in the same transaction as the
+UsageLog rows, so dashboards and summaries read a few rollup rows instead
+of scanning usage_logs. rebuild_usage_rollups() recomputes a time range
+from UsageLog and backs the backfill_usage_rollups command.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc
+
+from .models import UsageLog, UsageRollupDaily, UsageRollupHourly
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = {
+    'hour': UsageRollupHourly,
+    'day': UsageRollupDaily,
+}
+
+KEY_FIELDS = ('organization_id', 'workspace_id', 'user_id', 'model')
+
+SUM_FIELDS = (
+    'requests', 'failed_requests', 'prompt_tokens', 'completion_tokens', 'total_tokens',
+    'cost', 'cache_hits', 'cache_prompt_tokens', 'cache_completion_tokens',
+)
+
+# Rollup fields aggregated from UsageLog; tokens and cost only count on success
+_SUCCESS = Q(success=True)
+_CACHE_HIT = Q(success=True, cache_hit=True)
+USAGE_AGGREGATES = {
+    'requests': Count('id', filter=_SUCCESS),
+    'failed_requests': Count('id', filter=Q(success=False)),
+    'prompt_tokens': Sum('prompt_tokens', filter=_SUCCESS),
+    'completion_tokens': Sum('completion_tokens', filter=_SUCCESS),
+    'total_tokens': Sum('total_tokens', filter=_SUCCESS),
+    'cost': Sum('estimated_cost', filter=_SUCCESS),
+    'cache_hits': Count('id', filter=_CACHE_HIT),
+    'cache_prompt_tokens': Sum('prompt_tokens', filter=_CACHE_HIT),
+    'cache_completion_tokens': Sum('completion_tokens', filter=_CACHE_HIT),
+}
+
+# Rollup fields aggregated from rollup rows
+ROLLUP_AGGREGATES = {field: Sum(field) for field in SUM_FIELDS}
+
+
+def truncate(granularity, when):
+    """Start of the hour, day, week or month (UTC) containing a time."""
+    when = when.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity != 'hour':
+        when = when.replace(hour=0)
+    if granularity == 'week':
+        # Weeks start on Monday, as with date_trunc
+        when -= timedelta(days=when.weekday())
+    elif granularity == 'month':
+        when = when.replace(day=1)
+    return when
+
+
+def next_bucket(granularity, start):
+    """Start of the bucket following the one starting at start."""
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _ceil(granularity, when):
+    """Start of the first hour or day beginning at or after a time."""
+    start = truncate(granularity, when)
+    if start < when:
+        start = next_bucket(granularity, start)
+    return start
+
+
+def _aggregate(queryset, aggregates, *group_by):
+    """
+    Group usage logs or rollups and aggregate them into rollup fields.
+
+    Aggregates are annotated under a prefix since they share their names
+    with model fields.
+    """
+    rows = queryset.values(*group_by).annotate(**{
+        f'usage_{field}': aggregate for field, aggregate in aggregates.items()
+    }).order_by()
+
+    for row in rows:
+        yield {
+            **{field: row[field] for field in group_by},
+            **{field: row[f'usage_{field}'] or 0 for field in SUM_FIELDS},
+        }
+
+
+def _log_values(log):
+    """Rollup field values contributed by one usage log."""
+    success = bool(log.success)
+    cache_hit = success and bool(log.cache_hit)
+    return {
+        'requests': int(success),
+        'failed_requests': int(not success),
+        'prompt_tokens': log.prompt_tokens if success else 0,
+        'completion_tokens': log.completion_tokens if success else 0,
+        'total_tokens': log.total_tokens if success else 0,
+        'cost': Decimal(str(log.estimated_cost)) if success else Decimal('0'),
+        'cache_hits': int(cache_hit),
+        'cache_prompt_tokens': log.prompt_tokens if cache_hit else 0,
+        'cache_completion_tokens': log.completion_tokens if cache_hit else 0,
+    }
+
+
+def _upsert(rollup_model, rows):
+    """Add rows to existing rollups in one INSERT ... ON CONFLICT statement."""
+    table = rollup_model._meta.db_table
+    columns = ('bucket',) + KEY_FIELDS + SUM_FIELDS
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    updates = ', '.join(f'{field} = {table}.{field} + EXCLUDED.{field}' for field in SUM_FIELDS)
+
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) '
+        f'VALUES {", ".join([placeholders] * len(rows))} '
+        f'ON CONFLICT ON CONSTRAINT {table}_key DO UPDATE SET {updates}'
+    )
+    params = []
+    for key, values in rows:
+        params.extend(key)
+        params.extend(values[field] for field in SUM_FIELDS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def apply_usage_to_rollups(logs):
+    """
+    Add usage logs to the hourly and daily rollups.
+
+    Call it in the transaction that creates the logs so the rollups
+    commit or roll back with them. A failure is logged and doesn't fail
+    the caller; backfill_usage_rollups repairs the affected range.
+
+    Args:
+        logs: Iterable of UsageLog instances
+    """
+    logs = list(logs)
+    if not logs:
+        return
+
+    try:
+        with transaction.atomic():
+            for granularity, rollup_model in ROLLUP_MODELS.items():
+                rows = {}
+                for log in logs:
+                    key = (truncate(granularity, log.timestamp),) + tuple(
+                        getattr(log, field) for field in KEY_FIELDS
+                    )
+                    values = _log_values(log)
+                    if key in rows:
+                        for field in SUM_FIELDS:
+                            rows[key][field] += values[field]
+                    else:
+                        rows[key] = values
+
+                # A stable row order keeps concurrent upserts from deadlocking
+                _upsert(rollup_model, sorted(rows.items(), key=lambda row: repr(row[0])))
+    except Exception as e:
+        logger.warning(f"Failed to update usage rollups for {len(logs)} logs: {str(e)}")
+
+
+def rebuild_usage_rollups(start, end):
+    """
+    Recompute the rollups of a time range from UsageLog.
+
+    The rollup tables are locked against concurrent writes while the
+    range is rebuilt, so usage logged meanwhile is added once afterwards.
+
+    Args:
+        start: Range start, aligned to a day
+        end: Range end (exclusive), aligned to a day
+
+    Returns:
+        Number of rollup rows written
+    """
+    written = 0
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            tables = ', '.join(model._meta.db_table for model in ROLLUP_MODELS.values())
+            cursor.execute(f'LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE')
+
+        logs = UsageLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+        for granularity, rollup_model in ROLLUP_MODELS.items():
+            rollup_model.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+
+            rows = _aggregate(
+                logs.annotate(bucket=Trunc('timestamp', granularity, tzinfo=dt_timezone.utc)),
+                USAGE_AGGREGATES, 'bucket', *KEY_FIELDS
+            )
+            rollups = [rollup_model(**row) for row in rows]
+            rollup_model.objects.bulk_create(rollups, batch_size=1000)
+            written += len(rollups)
+
+    return written
+
+
+def _any(conditions):
+    query = Q()
+    for condition in conditions:
+        query |= condition
+    return query
+
+
+def _empty_usage():
+    usage = dict.fromkeys(SUM_FIELDS, 0)
+    usage['cost'] = Decimal('0')
+    return usage
+
+
+def get_usage_by_model(start=None, end=None, **filters):
+    """
+    Get usage per model in a time range.
+
+    Whole days are read from the daily rollups, whole hours at the edges
+    from the hourly rollups, and only the partial hours at either end
+    from UsageLog, so at most three grouped queries run.
+
+    Args:
+        start: Optional range start
+        end: Optional range end (inclusive), defaults to now
+        **filters: organization, workspace and/or user to filter by
+
+    Returns:
+        Dict mapping model name to a dict of rollup fields
+    """
+    end = end or datetime.now(dt_timezone.utc)
+    raw_ranges = []
+    hour_ranges = []
+    day_range = None
+
+    hour_start = _ceil('hour', start) if start else None
+    hour_end = truncate('hour', end)
+
+    if hour_start is not None and hour_start >= hour_end:
+        # The range lies within an hour or two
+        raw_ranges.append(Q(timestamp__gte=start, timestamp__lte=end))
+    else:
+        if start and start < hour_start:
+            raw_ranges.append(Q(timestamp__gte=start, timestamp__lt=hour_start))
+        raw_ranges.append(Q(timestamp__gte=hour_end, timestamp__lte=end))
+
+        day_start = _ceil('day', hour_start) if hour_start else None
+        day_end = truncate('day', hour_end)
+        if day_start is None or day_start < day_end:
+            day_range = Q(bucket__lt=day_end)
+            if day_start:
+                day_range &= Q(bucket__gte=day_start)
+                if hour_start < day_start:
+                    hour_ranges.append(Q(bucket__gte=hour_start, bucket__lt=day_start))
+            if day_end < hour_end:
+                hour_ranges.append(Q(bucket__gte=day_end, bucket__lt=hour_end))
+        else:
+            hour_ranges.append(Q(bucket__gte=hour_start, bucket__lt=hour_end))
+
+    sources = []
+    if day_range is not None:
+        sources.append(_aggregate(
+            UsageRollupDaily.objects.filter(day_range, **filters), ROLLUP_AGGREGATES, 'model'
+        ))
+    if hour_ranges:
+        sources.append(_aggregate(
+            UsageRollupHourly.objects.filter(_any(hour_ranges), **filters), ROLLUP_AGGREGATES, 'model'
+        ))
+    sources.append(_aggregate(
+        UsageLog.objects.filter(_any(raw_ranges), **filters), USAGE_AGGREGATES, 'model'
+    ))
+
+    usage_by_model = {}
+    for source in sources:
+        for row in source:
+            usage = usage_by_model.setdefault(row['model'], _empty_usage())
+            for field in SUM_FIELDS:
+                usage[field] += row[field]
+
+    return usage_by_model
+
+
+# Time-series buckets and the rollup table each is read from
+TIMESERIES_BUCKETS = {
+    'hour': UsageRollupHourly,
+    'day': UsageRollupDaily,
+    'week': UsageRollupDaily,
+    'month': UsageRollupDaily,
+}
+
+# Time-series groupings and the UsageLog field they group by. Rollups
+# have no project, so project series are aggregated from usage_logs.
+TIMESERIES_GROUPS = {
+    'model': 'model',
+    'user': 'user_id',
+    'workspace': 'workspace_id',
+    'project': 'content__project_id',
+}
+
+TIMESERIES_FIELDS = (
+    'requests', 'failed_requests', 'prompt_tokens', 'completion_tokens', 'total_tokens',
+    'cost', 'cache_hits',
+)
+
+
+def count_buckets(granularity, start, end):
+    """Number of buckets between two times, both ends included."""
+    start = truncate(granularity, start)
+    end = truncate(granularity, end)
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1 if granularity == 'day' else 7)
+    return (end - start) // step + 1
+
+
+def _group_labels(group_by, keys):
+    """Display labels of time-series groups."""
+    from accounts.models import User, Workspace
+    from contentmgmt.models import Project
+
+    if group_by == 'model':
+        return {key: key for key in keys}
+
+    ids = [key for key in keys if key is not None]
+    if group_by == 'user':
+        labels = {
+            user['id']: user['full_name'] or user['phone_number']
+            for user in User.objects.filter(id__in=ids).values('id', 'full_name', 'phone_number')
+        }
+    else:
+        model = Workspace if group_by == 'workspace' else Project
+        labels = dict(model.objects.filter(id__in=ids).values_list('id', 'name'))
+
+    return {key: labels.get(key) for key in keys}
+
+
+def _timeseries_point(timestamp, row=None):
+    point = {'timestamp': timestamp}
+    for field in TIMESERIES_FIELDS:
+        value = row[field] if row else 0
+        point[field] = float(value) if field == 'cost' else value
+    return point
+
+
+def get_usage_timeseries(granularity, start, end, group_by=None, organization_ids=None, **filters):
+    """
+    Get usage per time bucket, optionally split into series.
+
+    Buckets are truncated and aggregated in the database, from the hourly
+    rollups for hours, the daily rollups for days, weeks and months, or
+    usage_logs for project series. Buckets without usage are zero-filled.
+
+    Args:
+        granularity: 'hour', 'day', 'week' or 'month'
+        start: Range start, extended to the start of its bucket
+        end: Range end (inclusive)
+        group_by: Optional 'model', 'user', 'workspace' or 'project'
+        organization_ids: Optional organization IDs to limit usage to
+        **filters: organization, workspace and/or user to filter by
+
+    Returns:
+        List of series dicts with group, label and points, one series
+        with a None group when not grouped
+    """
+    start = truncate(granularity, start)
+    if organization_ids is not None:
+        filters['organization__in'] = organization_ids
+    group_field = TIMESERIES_GROUPS[group_by] if group_by else None
+    group_values = (group_field,) if group_field else ()
+
+    if group_by == 'project':
+        queryset = UsageLog.objects.filter(timestamp__gte=start, timestamp__lte=end, **filters).annotate(
+            point=Trunc('timestamp', granularity, tzinfo=dt_timezone.utc)
+        )
+        aggregates = USAGE_AGGREGATES
+    else:
+        queryset = TIMESERIES_BUCKETS[granularity].objects.filter(
+            bucket__gte=start, bucket__lte=end, **filters
+        ).annotate(point=Trunc('bucket', granularity, tzinfo=dt_timezone.utc))
+        aggregates = ROLLUP_AGGREGATES
+
+    points = {}
+    for row in _aggregate(queryset, aggregates, 'point', *group_values):
+        group = row[group_field] if group_field else None
+        points.setdefault(group, {})[row['point']] = row
+
+    if not points and not group_by:
+        points[None] = {}
+
+    buckets = []
+    bucket = start
+    while bucket <= end:
+        buckets.append(bucket)
+        bucket = next_bucket(granularity, bucket)
+
+    labels = _group_labels(group_by, list(points)) if group_by else {None: None}
+    series = [
+        {
+            'group': group,
+            'label': labels[group],
+            'points': [_timeseries_point(bucket, rows.get(bucket)) for bucket in buckets],
+        }
+        for group, rows in points.items()
+    ]
+
+    # Largest series first
+    series.sort(key=lambda item: sum(point['requests'] for point in item['points']), reverse=True)
+    return series
@@ -1,8 +1,11 @@
 """
 Serializers for AI models.
 """
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from .models import AiJob, UsageLog, UsageLimit, AuditLog
+from .models import AiJob, AiJobBatch, UsageLog, UsageLimit, AuditLog
 
 
 class AiJobSerializer(serializers.ModelSerializer):
@@ -16,16 +19,32 @@ class AiJobSerializer(serializers.ModelSerializer):
         model = AiJob
         fields = [
             'id', 'content', 'content_title', 'user', 'user_name',
-            'workspace', 'workspace_name', 'status', 'kind', 'params',
+            'workspace', 'workspace_name', 'status', 'execution_mode', 'kind', 'params',
             'result_data', 'error_message', 'retry_count',
             'started_at', 'completed_at', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'status', 'result_data', 'error_message', 'retry_count',
+            'id', 'status', 'execution_mode', 'result_data', 'error_message', 'retry_count',
             'started_at', 'completed_at', 'created_at', 'updated_at'
         ]
 
 
+class AiJobBatchSerializer(serializers.ModelSerializer):
+    """Serializer for AiJobBatch progress."""
+    
+    project_name = serializers.CharField(source='project.name', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = AiJobBatch
+        fields = [
+            'id', 'project', 'project_name', 'workspace', 'user', 'status',
+            'kind', 'params', 'total_jobs', 'completed_jobs', 'failed_jobs',
+            'progress', 'completed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class UsageLogSerializer(serializers.ModelSerializer):
     """Serializer for UsageLog model."""
     
@@ -38,9 +57,9 @@ class UsageLogSerializer(serializers.ModelSerializer):
             'id', 'content', 'content_title', 'ai_job', 'user', 'user_name',
             'workspace', 'organization', 'model', 'prompt_tokens',
             'completion_tokens', 'total_tokens', 'estimated_cost',
-            'request_duration', 'success', 'error_message', 'timestamp'
+            'request_duration', 'success', 'error_message', 'cache_hit', 'timestamp'
         ]
-        read_only_fields = '__all__'
+        read_only_fields = fields
 
 
 class UsageLimitSerializer(serializers.ModelSerializer):
@@ -69,7 +88,7 @@ class AuditLogSerializer(serializers.ModelSerializer):
             'action', 'old_status', 'new_status', 'changes', 'notes',
             'ip_address', 'user_agent', 'timestamp'
         ]
-        read_only_fields = '__all__'
+        read_only_fields = fields
 
 
 class UsageSummarySerializer(serializers.Serializer):
@@ -80,4 +99,40 @@ class UsageSummarySerializer(serializers.Serializer):
     total_completion_tokens = serializers.IntegerField()
     total_tokens = serializers.IntegerField()
     total_cost = serializers.FloatField()
+    cache_hits = serializers.IntegerField()
+    cache_saved_cost = serializers.FloatField()
     model_breakdown = serializers.DictField()
+
+
+class UsageTimeseriesQuerySerializer(serializers.Serializer):
+    """Serializer for usage time-series query params."""
+    
+    bucket = serializers.ChoiceField(choices=['hour', 'day', 'week', 'month'], default='day')
+    group_by = serializers.ChoiceField(
+        choices=['model', 'user', 'workspace', 'project'],
+        required=False,
+        allow_null=True
+    )
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    
+    def validate(self, data):
+        end = data.get('end') or timezone.now()
+        start = data.get('start') or end - timedelta(
+            days=getattr(settings, 'AI_USAGE_TIMESERIES_DEFAULT_DAYS', 30)
+        )
+        
+        if start > end:
+            raise serializers.ValidationError({'start': 'Start must be before end.'})
+        
+        from .rollups import count_buckets
+        max_points = getattr(settings, 'AI_USAGE_TIMESERIES_MAX_POINTS', 2000)
+        points = count_buckets(data['bucket'], start, end)
+        if points > max_points:
+            raise serializers.ValidationError(
+                f'Too many {data["bucket"]} buckets: {points}/{max_points}. Use a larger bucket or a shorter range.'
+            )
+        
+        data['start'] = start
+        data['end'] = end
+        return data
@@ -3,152 +3,291 @@ Services for AI operations including usage limits and content generation.
 """
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from datetime import timedelta
 from decimal import Decimal
 import logging
 
-from .models import UsageLog, UsageLimit
+from .models import UsageLog, UsageLimit, BudgetReservation
+from .counters import get_usage_counters, get_usage_counters_many, increment_usage_counters
+from .rollups import get_usage_by_model
+from .usage_writer import build_usage_log, buffer_usage_log, is_usage_buffer_enabled, write_usage_logs
 from accounts.models import Workspace
 
 logger = logging.getLogger(__name__)
 
 
-def check_workspace_usage_limits(workspace):
+def get_workspace_budget_window(workspace):
     """
-    Check if workspace has exceeded usage limits.
+    Get the configured limit and budget period of a workspace.
     
     Args:
         workspace: Workspace instance
         
     Returns:
-        Tuple of (bool, str) - (limits_ok, message)
+        Tuple of (limit, period, cost_budget) where limit is the
+        UsageLimit or None and cost_budget is None when cost is unlimited
     """
-    # Get current month's usage
-    now = timezone.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Check for configured limits
     try:
         limit = UsageLimit.objects.get(
             scope=UsageLimit.Scope.WORKSPACE,
             scope_id=workspace.id
         )
-        has_custom_limit = True
     except UsageLimit.DoesNotExist:
-        # Use default budget from settings
-        has_custom_limit = False
-        limit = None
-    
-    # Determine start date based on period
-    if has_custom_limit:
-        if limit.period == UsageLimit.Period.MONTHLY:
-            start_date = start_of_month
-        else:  # DAILY
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    else:
-        # Default to monthly
-        start_date = start_of_month
-    
-    # Aggregate usage
-    usage = UsageLog.objects.filter(
+        # Use default budget from settings, monthly
+        budget = getattr(settings, 'AI_WORKSPACE_MONTHLY_BUDGET_USD', 100.0)
+        return None, UsageLimit.Period.MONTHLY, Decimal(str(budget))
+    
+    return limit, limit.period, limit.cost_limit
+
+
+def get_reserved_budget(workspace, exclude_job=None):
+    """
+    Get the budget held by active reservations of a workspace.
+    
+    Args:
+        workspace: Workspace instance
+        exclude_job: Optional AiJob whose own reservation is not counted
+        
+    Returns:
+        Reserved amount in USD as Decimal
+    """
+    reservations = BudgetReservation.objects.filter(
         workspace=workspace,
-        timestamp__gte=start_date,
-        success=True
-    ).aggregate(
-        total_requests=Sum('id'),
-        total_tokens=Sum('total_tokens'),
-        total_cost=Sum('estimated_cost')
+        status=BudgetReservation.Status.ACTIVE,
+        expires_at__gt=timezone.now()
     )
+    if exclude_job is not None:
+        reservations = reservations.exclude(ai_job=exclude_job)
     
-    current_requests = UsageLog.objects.filter(
-        workspace=workspace,
-        timestamp__gte=start_date
-    ).count()
+    reserved = reservations.aggregate(total=Sum('amount'))['total']
+    
+    return reserved or Decimal('0')
+
+
+# Setting and default of the cost budget of scopes without a UsageLimit
+# (a None budget is unlimited)
+DEFAULT_SCOPE_BUDGETS = {
+    UsageLimit.Scope.USER: ('AI_USER_MONTHLY_BUDGET_USD', 50.0),
+    UsageLimit.Scope.WORKSPACE: ('AI_WORKSPACE_MONTHLY_BUDGET_USD', 100.0),
+    UsageLimit.Scope.ORGANIZATION: ('AI_ORGANIZATION_MONTHLY_BUDGET_USD', None),
+}
+
+
+def _check_scope_limit(scope, limit, usage, reserved):
+    """
+    Check one scope's usage against its limit.
     
-    current_tokens = usage['total_tokens'] or 0
-    current_cost = float(usage['total_cost'] or 0)
+    Returns:
+        Message describing the exceeded limit, or None
+    """
+    label = UsageLimit.Scope(scope).label
+    current_cost = float(usage['cost'] + reserved)
     
-    # Check limits
-    if has_custom_limit:
+    if limit:
         # Check custom configured limits
-        if limit.requests_limit and current_requests >= limit.requests_limit:
-            return False, f"Request limit exceeded: {current_requests}/{limit.requests_limit}"
+        if limit.requests_limit and usage['requests'] >= limit.requests_limit:
+            return f"{label} request limit exceeded: {usage['requests']}/{limit.requests_limit}"
         
-        if limit.tokens_limit and current_tokens >= limit.tokens_limit:
-            return False, f"Token limit exceeded: {current_tokens}/{limit.tokens_limit}"
+        if limit.tokens_limit and usage['tokens'] >= limit.tokens_limit:
+            return f"{label} token limit exceeded: {usage['tokens']}/{limit.tokens_limit}"
         
         if limit.cost_limit and current_cost >= float(limit.cost_limit):
-            return False, f"Monthly budget exceeded: ${current_cost:.2f}/${limit.cost_limit}"
-    else:
-        # Check default budget from settings
-        workspace_budget = getattr(settings, 'AI_WORKSPACE_MONTHLY_BUDGET_USD', 100.0)
-        if current_cost >= workspace_budget:
-            return False, f"Monthly budget exceeded: ${current_cost:.2f}/${workspace_budget:.2f}. Please upgrade your plan or wait until next month."
-    
-    return True, "Within limits"
+            return f"{label} {limit.period} budget exceeded: ${current_cost:.2f} of ${limit.cost_limit} limit"
+        
+        return None
+    
+    # Check default budget from settings
+    setting, default = DEFAULT_SCOPE_BUDGETS[scope]
+    budget = getattr(settings, setting, default)
+    if budget is not None and current_cost >= budget:
+        return f"{label} monthly budget exceeded: ${current_cost:.2f}/${budget:.2f}. Please upgrade your plan or wait until next month."
+    
+    return None
 
 
-def check_user_usage_limits(user):
+def evaluate_usage_limits(user=None, workspace=None, organization=None, ai_job=None, scopes=None):
     """
-    Check if user has exceeded usage limits.
+    Check user, workspace and organization limits together.
+    
+    All configured limits are loaded in one query and the usage of every
+    scope is read from the real-time counters in one Redis round trip.
+    Workspace cost includes budget reserved by queued jobs.
     
     Args:
-        user: User instance
+        user: Optional User instance
+        workspace: Optional Workspace instance
+        organization: Optional Organization instance, defaults to the
+                      workspace's organization
+        ai_job: Optional AiJob being run, whose own reservation is not counted
+        scopes: Optional list of scopes to check, defaults to all
         
     Returns:
-        Tuple of (bool, str) - (limits_ok, message)
+        Tuple of (limits_ok, message, scope) where scope is the UsageLimit
+        scope that blocks the request, or None
     """
-    # Get current month's usage
-    now = timezone.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    scope_ids = {
+        UsageLimit.Scope.USER: user.id if user else None,
+        UsageLimit.Scope.WORKSPACE: workspace.id if workspace else None,
+        UsageLimit.Scope.ORGANIZATION: (
+            organization.id if organization else getattr(workspace, 'organization_id', None)
+        ),
+    }
+    scope_ids = {
+        scope: scope_id for scope, scope_id in scope_ids.items()
+        if scope_id and (scopes is None or scope in scopes)
+    }
+    if not scope_ids:
+        return True, "Within limits", None
     
-    # Check for configured limits
-    try:
-        limit = UsageLimit.objects.get(
-            scope=UsageLimit.Scope.USER,
-            scope_id=user.id
-        )
-        has_custom_limit = True
-    except UsageLimit.DoesNotExist:
-        # Use default budget from settings
-        has_custom_limit = False
-        limit = None
-    
-    # Determine start date
-    if has_custom_limit:
-        if limit.period == UsageLimit.Period.MONTHLY:
-            start_date = start_of_month
-        else:  # DAILY
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    else:
-        # Default to monthly
-        start_date = start_of_month
-    
-    # Aggregate usage
-    usage = UsageLog.objects.filter(
-        user=user,
-        timestamp__gte=start_date,
-        success=True
-    ).aggregate(
-        total_cost=Sum('estimated_cost')
+    # One query for every configured limit
+    query = Q()
+    for scope, scope_id in scope_ids.items():
+        query |= Q(scope=scope, scope_id=scope_id)
+    limits = {limit.scope: limit for limit in UsageLimit.objects.filter(query)}
+    
+    # One Redis round trip for every scope's usage
+    periods = {
+        scope: limits[scope].period if scope in limits else UsageLimit.Period.MONTHLY
+        for scope in scope_ids
+    }
+    usages = get_usage_counters_many([
+        (scope, scope_id, periods[scope]) for scope, scope_id in scope_ids.items()
+    ])
+    
+    for (scope, scope_id), usage in zip(scope_ids.items(), usages):
+        reserved = Decimal('0')
+        if scope == UsageLimit.Scope.WORKSPACE:
+            reserved = get_reserved_budget(workspace, exclude_job=ai_job)
+        
+        message = _check_scope_limit(scope, limits.get(scope), usage, reserved)
+        if message:
+            return False, message, scope
+    
+    return True, "Within limits", None
+
+
+def check_workspace_usage_limits(workspace):
+    """
+    Check if workspace has exceeded usage limits.
+    
+    Cost includes budget reserved by queued jobs.
+    
+    Args:
+        workspace: Workspace instance
+        
+    Returns:
+        Tuple of (bool, str) - (limits_ok, message)
+    """
+    limits_ok, message, _ = evaluate_usage_limits(
+        workspace=workspace, scopes=[UsageLimit.Scope.WORKSPACE]
     )
+    return limits_ok, message
+
+
+def get_workspace_budget_status(workspace):
+    """
+    Get spent, reserved and remaining budget of a workspace.
+    
+    Args:
+        workspace: Workspace instance
+        
+    Returns:
+        Dict with budget, spent, reserved and remaining in USD
+        (budget and remaining are None when cost is unlimited)
+    """
+    _, period, cost_budget = get_workspace_budget_window(workspace)
+    
+    spent = get_usage_counters(UsageLimit.Scope.WORKSPACE, workspace.id, period)['cost']
+    reserved = get_reserved_budget(workspace)
+    
+    return {
+        'budget': cost_budget,
+        'spent': spent,
+        'reserved': reserved,
+        'remaining': cost_budget - spent - reserved if cost_budget is not None else None,
+    }
+
+
+def reserve_workspace_budget(workspace, estimates):
+    """
+    Atomically reserve estimated job costs against the workspace budget.
+    
+    The workspace row is locked so concurrent requests are checked one
+    after another and cannot overspend together.
+    
+    Args:
+        workspace: Workspace instance
+        estimates: List of estimate dicts from estimate_generation_cost(),
+                   one per job
+        
+    Returns:
+        Tuple of (reservations, message) - reservations is None when the
+        budget would be exceeded
+    """
+    total = sum((estimate['estimated_cost'] for estimate in estimates), Decimal('0'))
+    ttl = getattr(settings, 'AI_BUDGET_RESERVATION_TTL', 24 * 3600)
+    
+    with transaction.atomic():
+        Workspace.objects.select_for_update().only('id').get(id=workspace.id)
+        
+        status = get_workspace_budget_status(workspace)
+        if status['remaining'] is not None and total > status['remaining']:
+            return None, (
+                f"Estimated cost ${total:.4f} exceeds remaining budget "
+                f"${max(status['remaining'], Decimal('0')):.4f}"
+            )
+        
+        expires_at = timezone.now() + timedelta(seconds=ttl)
+        reservations = BudgetReservation.objects.bulk_create([
+            BudgetReservation(
+                workspace=workspace,
+                amount=estimate['estimated_cost'],
+                estimated_prompt_tokens=estimate['prompt_tokens'],
+                estimated_completion_tokens=estimate['completion_tokens'],
+                expires_at=expires_at
+            )
+            for estimate in estimates
+        ])
     
-    current_cost = float(usage['total_cost'] or 0)
+    return reservations, "Reserved"
+
+
+def settle_budget_reservation(ai_job, actual_cost):
+    """
+    Replace a job's reservation with its actual cost.
     
-    # Check limits
-    if has_custom_limit and limit.cost_limit:
-        if current_cost >= float(limit.cost_limit):
-            return False, f"User monthly budget exceeded: ${current_cost:.2f}/${limit.cost_limit}"
-    else:
-        # Check default user budget
-        user_budget = getattr(settings, 'AI_USER_MONTHLY_BUDGET_USD', 50.0)
-        if current_cost >= user_budget:
-            return False, f"User monthly budget exceeded: ${current_cost:.2f}/${user_budget:.2f}"
+    Args:
+        ai_job: AiJob instance
+        actual_cost: Cost in USD recorded in UsageLog
+    """
+    BudgetReservation.objects.filter(
+        ai_job=ai_job,
+        status=BudgetReservation.Status.ACTIVE
+    ).update(
+        status=BudgetReservation.Status.SETTLED,
+        actual_cost=Decimal(str(actual_cost)),
+        settled_at=timezone.now()
+    )
+
+
+def check_user_usage_limits(user):
+    """
+    Check if user has exceeded usage limits.
     
-    return True, "Within limits"
+    Args:
+        user: User instance
+        
+    Returns:
+        Tuple of (bool, str) - (limits_ok, message)
+    """
+    limits_ok, message, _ = evaluate_usage_limits(user=user, scopes=[UsageLimit.Scope.USER])
+    return limits_ok, message
 
 
-def get_usage_summary(workspace=None, user=None, organization=None, start_date=None, end_date=None):
+def get_usage_summary(workspace=None, user=None, organization=None, start_date=None, end_date=None,
+                      organization_ids=None):
     """
     Get usage summary for a given scope.
     
@@ -158,54 +297,53 @@ def get_usage_summary(workspace=None, user=None, organization=None, start_date=N
         organization: Optional Organization instance
         start_date: Optional start date
         end_date: Optional end date
+        organization_ids: Optional organization IDs to limit usage to
         
     Returns:
         Dict with usage statistics
     """
-    queryset = UsageLog.objects.filter(success=True)
-    
+    filters = {}
     if workspace:
-        queryset = queryset.filter(workspace=workspace)
+        filters['workspace'] = workspace
     if user:
-        queryset = queryset.filter(user=user)
+        filters['user'] = user
     if organization:
-        queryset = queryset.filter(organization=organization)
-    
-    if start_date:
-        queryset = queryset.filter(timestamp__gte=start_date)
-    if end_date:
-        queryset = queryset.filter(timestamp__lte=end_date)
-    
-    # Aggregate
-    summary = queryset.aggregate(
-        total_requests=Sum('id'),
-        total_prompt_tokens=Sum('prompt_tokens'),
-        total_completion_tokens=Sum('completion_tokens'),
-        total_tokens=Sum('total_tokens'),
-        total_cost=Sum('estimated_cost')
-    )
+        filters['organization'] = organization
+    if organization_ids is not None:
+        filters['organization__in'] = organization_ids
     
-    request_count = queryset.count()
+    # Per-model usage from the hourly and daily rollups
+    usage_by_model = get_usage_by_model(start_date, end_date, **filters)
     
-    # Model breakdown
+    from .client import calculate_cost
     model_breakdown = {}
-    for log in queryset.values('model').annotate(
-        count=Sum('id'),
-        tokens=Sum('total_tokens'),
-        cost=Sum('estimated_cost')
-    ):
-        model_breakdown[log['model']] = {
-            'requests': queryset.filter(model=log['model']).count(),
-            'tokens': log['tokens'] or 0,
-            'cost': float(log['cost'] or 0)
-        }
+    cache_hits = 0
+    cache_saved_cost = 0.0
     
+    for model, usage in usage_by_model.items():
+        if usage['requests']:
+            model_breakdown[model] = {
+                'requests': usage['requests'],
+                'tokens': usage['total_tokens'],
+                'cost': float(usage['cost'])
+            }
+        
+        # Cost saved by cache hits, priced as if the call had been made
+        if usage['cache_hits']:
+            cache_hits += usage['cache_hits']
+            cache_saved_cost += calculate_cost(
+                model, usage['cache_prompt_tokens'], usage['cache_completion_tokens']
+            )
+    
+    usages = usage_by_model.values()
     return {
-        'total_requests': request_count,
-        'total_prompt_tokens': summary['total_prompt_tokens'] or 0,
-        'total_completion_tokens': summary['total_completion_tokens'] or 0,
-        'total_tokens': summary['total_tokens'] or 0,
-        'total_cost': float(summary['total_cost'] or 0),
+        'total_requests': sum(usage['requests'] for usage in usages),
+        'total_prompt_tokens': sum(usage['prompt_tokens'] for usage in usages),
+        'total_completion_tokens': sum(usage['completion_tokens'] for usage in usages),
+        'total_tokens': sum(usage['total_tokens'] for usage in usages),
+        'total_cost': float(sum(usage['cost'] for usage in usages)),
+        'cache_hits': cache_hits,
+        'cache_saved_cost': cache_saved_cost,
         'model_breakdown': model_breakdown
     }
 
@@ -213,9 +351,12 @@ def get_usage_summary(workspace=None, user=None, organization=None, start_date=N
 def log_ai_usage(content=None, ai_job=None, user=None, workspace=None, organization=None,
                  model=None, prompt_tokens=0, completion_tokens=0, 
                  total_tokens=0, estimated_cost=0.0, request_duration=None,
-                 success=True, error_message=None):
+                 success=True, error_message=None, cache_hit=False, idempotency_key=None):
     """
-    Log AI usage synchronously.
+    Log AI usage.
+    
+    The log is inserted right away, or appended to the usage log buffer
+    when AI_USAGE_LOG_BUFFERED is on. Usage counters are updated either way.
     
     Args:
         content: Content instance
@@ -231,12 +372,16 @@ def log_ai_usage(content=None, ai_job=None, user=None, workspace=None, organizat
         request_duration: Request duration in seconds
         success: Whether request was successful
         error_message: Error message if failed
+        cache_hit: Whether the response came from the generation cache
+        idempotency_key: Optional key identifying the usage; a usage
+                         logged again under the same key counts once
         
     Returns:
-        UsageLog instance
+        UsageLog instance (unsaved when buffered)
     """
     try:
-        log = UsageLog.objects.create(
+        log = build_usage_log(
+            idempotency_key=idempotency_key,
             content=content,
             ai_job=ai_job,
             user=user,
@@ -249,10 +394,24 @@ def log_ai_usage(content=None, ai_job=None, user=None, workspace=None, organizat
             estimated_cost=Decimal(str(estimated_cost)),
             request_duration=Decimal(str(request_duration)) if request_duration else None,
             success=success,
-            error_message=error_message
+            error_message=error_message,
+            cache_hit=cache_hit
         )
         
-        logger.info(f"Usage logged: {log.id} - {total_tokens} tokens - ${estimated_cost:.6f}")
+        if is_usage_buffer_enabled():
+            transaction.on_commit(lambda: buffer_usage_log(log))
+            logger.info(f"Usage buffered: {log.idempotency_key} - {total_tokens} tokens - ${estimated_cost:.6f}")
+        elif write_usage_logs([log]):
+            logger.info(f"Usage logged: {log.id} - {total_tokens} tokens - ${estimated_cost:.6f}")
+        else:
+            logger.info(f"Usage {log.idempotency_key} already logged")
+            return UsageLog.objects.get(idempotency_key=log.idempotency_key)
+        
+        transaction.on_commit(lambda: increment_usage_counters(log))
+        
+        if ai_job is not None and success:
+            settle_budget_reservation(ai_job, estimated_cost)
+        
         return log
         
     except Exception as e:
@@ -0,0 +1,186 @@
+"""
+Streaming support for AI content generation.
+
+Consumes an OpenAI chat completion stream chunk by chunk and keeps the
+partial output in the cache (Redis) so editors can follow a job while it runs.
+Every flush is also published as a 'partial' job event.
+"""
+import time
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .events import publish_job_event
+
+logger = logging.getLogger(__name__)
+
+
+def get_partial_output_key(job_id):
+    """Cache key holding the partial output of a job."""
+    return f'ai_job_partial:{job_id}'
+
+
+def get_partial_output(job_id):
+    """
+    Get the latest partial output written for a job.
+
+    Args:
+        job_id: AiJob ID
+
+    Returns:
+        Dict with text, chunk count and update time, or None
+    """
+    return cache.get(get_partial_output_key(job_id))
+
+
+class PartialOutputWriter:
+    """
+    Accumulates streamed text and flushes it to the cache.
+
+    Writes are bounded by a flush interval so a fast stream does not turn
+    into one cache write per token.
+    """
+
+    def __init__(self, job_id, flush_interval=None, ttl=None, transform=None):
+        """
+        Args:
+            job_id: AiJob ID
+            flush_interval: Minimum seconds between two cache writes
+            ttl: Cache TTL for the partial output in seconds
+            transform: Optional callable applied to each new piece of text
+                       before it is written, called as transform(text, final)
+                       where final marks the last flush so text held back
+                       can be released (e.g. PIIRestoreStream.feed)
+        """
+        self.job_id = job_id
+        self.key = get_partial_output_key(job_id)
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else getattr(settings, 'AI_STREAM_FLUSH_INTERVAL', 0.5)
+        )
+        self.ttl = ttl if ttl is not None else getattr(settings, 'AI_STREAM_PARTIAL_TTL', 3600)
+        self.transform = transform
+        self.parts = []
+        self.chunk_count = 0
+        self.flush_count = 0
+        self._last_flush = 0.0
+        self._dirty = False
+        self._published_length = 0
+        # Transformed output and the number of parts it covers
+        self._output = []
+        self._flushed_parts = 0
+
+    @property
+    def text(self):
+        """Full text received so far."""
+        return ''.join(self.parts)
+
+    def append(self, text):
+        """
+        Append a chunk of text and flush if the interval has elapsed.
+
+        Args:
+            text: Text delta from the stream
+        """
+        if not text:
+            return
+
+        self.parts.append(text)
+        self.chunk_count += 1
+        self._dirty = True
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, final=False):
+        """
+        Write the accumulated text to the cache.
+
+        Args:
+            final: Whether the stream has ended
+        """
+        # Only the text received since the last flush is transformed and published
+        new_text = ''.join(self.parts[self._flushed_parts:])
+        self._flushed_parts = len(self.parts)
+        if self.transform:
+            new_text = self.transform(new_text, final=final)
+        if not (self._dirty or new_text):
+            return
+        self._output.append(new_text)
+        text = ''.join(self._output)
+
+        try:
+            cache.set(self.key, {
+                'text': text,
+                'chunks': self.chunk_count,
+                'updated_at': time.time(),
+            }, self.ttl)
+            self.flush_count += 1
+        except Exception as e:
+            # Partial output is best-effort, never fail the job because of it
+            logger.warning(f"Failed to flush partial output for job {self.job_id}: {str(e)}")
+
+        # Push only the new text to live subscribers, who append it at offset
+        publish_job_event(self.job_id, 'partial', {
+            'offset': self._published_length,
+            'text': new_text,
+        })
+        self._published_length += len(new_text)
+
+        self._last_flush = time.monotonic()
+        self._dirty = False
+
+    def clear(self):
+        """Remove the partial output from the cache."""
+        try:
+            cache.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to clear partial output for job {self.job_id}: {str(e)}")
+
+
+def consume_completion_stream(stream, writer, start_time):
+    """
+    Consume a chat completion stream.
+
+    Args:
+        stream: Iterable of chat completion chunks
+        writer: PartialOutputWriter receiving the text deltas
+        start_time: time.time() when the request was sent
+
+    Returns:
+        Tuple of (generated_text, usage, stats) where usage is the usage
+        object reported on the final chunk (or None) and stats contains
+        time-to-first-token and throughput figures
+    """
+    usage = None
+    first_token_time = None
+
+    for chunk in stream:
+        if getattr(chunk, 'usage', None):
+            usage = chunk.usage
+
+        if not chunk.choices:
+            continue
+
+        delta = chunk.choices[0].delta
+        text = getattr(delta, 'content', None)
+        if text:
+            if first_token_time is None:
+                first_token_time = time.time()
+            writer.append(text)
+
+    writer.flush(final=True)
+    end_time = time.time()
+
+    completion_tokens = usage.completion_tokens if usage else writer.chunk_count
+    generation_time = end_time - first_token_time if first_token_time else 0.0
+
+    stats = {
+        'time_to_first_token': round(first_token_time - start_time, 3) if first_token_time else None,
+        'tokens_per_second': round(completion_tokens / generation_time, 2) if generation_time > 0 else None,
+        'chunks': writer.chunk_count,
+        'flushes': writer.flush_count,
+    }
+
+    return writer.text, usage, stats
@@ -2,7 +2,9 @@
 Celery tasks for AI app.
 """
 from celery import shared_task
+from celery.exceptions import Retry
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Sum
 from django.conf import settings
 from decimal import Decimal
@@ -32,7 +34,8 @@ def monthly_usage_reset():
 def log_usage_task(content_id, user_id, workspace_id, organization_id,
                    model, prompt_tokens, completion_tokens, 
                    total_tokens, estimated_cost, request_duration=None,
-                   success=True, error_message=None):
+                   success=True, error_message=None, cache_hit=False,
+                   idempotency_key=None):
     """
     Log OpenAI API usage asynchronously.
     
@@ -49,11 +52,16 @@ def log_usage_task(content_id, user_id, workspace_id, organization_id,
         request_duration: Request duration in seconds
         success: Whether request was successful
         error_message: Error message if failed
+        cache_hit: Whether the response came from the generation cache
+        idempotency_key: Optional key identifying the usage, so a
+                         redelivered task logs it once
     """
     from ai.models import UsageLog
+    from ai.usage_writer import build_usage_log, write_usage_logs
     
     try:
-        log = UsageLog.objects.create(
+        log = build_usage_log(
+            idempotency_key=idempotency_key,
             content_id=content_id,
             user_id=user_id,
             workspace_id=workspace_id,
@@ -65,9 +73,17 @@ def log_usage_task(content_id, user_id, workspace_id, organization_id,
             estimated_cost=Decimal(str(estimated_cost)),
             request_duration=Decimal(str(request_duration)) if request_duration else None,
             success=success,
-            error_message=error_message
+            error_message=error_message,
+            cache_hit=cache_hit
         )
         
+        if not write_usage_logs([log]):
+            logger.info(f"Usage {log.idempotency_key} already logged")
+            return UsageLog.objects.get(idempotency_key=log.idempotency_key).id
+        
+        from ai.counters import increment_usage_counters
+        transaction.on_commit(lambda: increment_usage_counters(log))
+        
         logger.info(f"Usage logged: {log.id} - {total_tokens} tokens")
         return log.id
         
@@ -76,6 +92,42 @@ def log_usage_task(content_id, user_id, workspace_id, organization_id,
         raise
 
 
+@shared_task
+def flush_usage_log_buffer():
+    """
+    Insert buffered usage logs in bulk.
+    Runs periodically from Celery beat.
+    """
+    from ai.usage_writer import flush_usage_log_buffer as flush_buffer
+    
+    # Also drains events left over after buffering is switched off
+    return flush_buffer(max_batches=getattr(settings, 'AI_USAGE_LOG_FLUSH_MAX_BATCHES', 50))
+
+
+@shared_task
+def reconcile_usage_counters():
+    """
+    Rebuild the Redis usage counters from UsageLog.
+    Runs periodically to correct counters that drifted or were lost.
+    """
+    from ai.counters import reconcile_usage_counters as rebuild_counters
+    
+    written = rebuild_counters()
+    logger.info(f"Reconciled {written} usage counters")
+    return written
+
+
+@shared_task
+def maintain_log_partitions():
+    """
+    Create upcoming monthly partitions of usage_logs and audit_logs and
+    drop the ones past their retention period.
+    """
+    from ai.partitions import maintain_log_partitions as maintain_partitions
+    
+    return maintain_partitions()
+
+
 @shared_task
 def check_usage_limits(scope, scope_id, current_usage):
     """
@@ -127,6 +179,164 @@ def check_usage_limits(scope, scope_id, current_usage):
         raise
 
 
+def render_generation_request(content, params):
+    """
+    Render the chat completion request for a generation job.
+    
+    Args:
+        content: Content instance
+        params: Dict with generation parameters
+        
+    Returns:
+        Dict of chat completion request arguments
+    """
+    from ai.prompts.models import DEFAULT_BLOG_DRAFT_PROMPT
+    
+    # Get parameters
+    kind = params.get('kind', 'draft')
+    topic = params.get('topic', content.title)
+    tone = params.get('tone', 'حرفه‌ای')
+    audience = params.get('audience', 'عمومی')
+    keywords = params.get('keywords', '')
+    min_words = params.get('min_words', 500)
+    additional_instructions = params.get('additional_instructions', '')
+    
+    # Build prompt based on kind
+    if kind == 'draft':
+        # Use default Persian blog draft prompt
+        user_prompt = DEFAULT_BLOG_DRAFT_PROMPT.format(
+            topic=topic,
+            tone=tone,
+            audience=audience,
+            min_words=min_words,
+            keywords=keywords
+        )
+        
+        if additional_instructions:
+            user_prompt += f"\n\n**دستورالعمل‌های اضافی:**\n{additional_instructions}"
+    
+    else:
+        # Simple prompt for other kinds
+        user_prompt = f"موضوع: {topic}\nلحن: {tone}\nمخاطب: {audience}\nکلمات کلیدی: {keywords}"
+        if additional_instructions:
+            user_prompt += f"\n\n{additional_instructions}"
+    
+    return dict(
+        model=getattr(settings, 'OPENAI_DEFAULT_MODEL', 'gpt-4o-mini'),
+        messages=[
+            {
+                "role": "system",
+                "content": "شما یک نویسنده فارسی‌زبان حرفه‌ای هستید که در تولید محتوای باکیفیت تخصص دارید."
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ],
+        temperature=0.7,
+        max_tokens=2000,
+        top_p=0.9,
+        frequency_penalty=0.0,
+        presence_penalty=0.0
+    )
+
+
+def build_generation_request(content, params, job_id):
+    """
+    Build the chat completion request for a generation job.
+    
+    PII found in the user input is flagged on the content.
+    
+    Args:
+        content: Content instance
+        params: Dict with generation parameters
+        job_id: AiJob ID
+        
+    Returns:
+        Tuple of (request_kwargs, redactor) where redactor is the
+        PIIRedactor run over the input, or None
+    """
+    request_kwargs = render_generation_request(content, params)
+    
+    topic = params.get('topic', content.title)
+    keywords = params.get('keywords', '')
+    additional_instructions = params.get('additional_instructions', '')
+    
+    # Redact PII from user input
+    redactor = None
+    if topic or keywords or additional_instructions:
+        from ai.pii import PIIRedactor
+        redactor = PIIRedactor()
+        
+        input_text = f"{topic}\n{keywords}\n{additional_instructions}"
+        redacted_input, pii_warnings = redactor.redact(input_text)
+        
+        if pii_warnings:
+            logger.warning(f"PII detected in input for job {job_id}: {pii_warnings}")
+            content.has_pii = True
+            content.pii_warnings = pii_warnings
+            content.save(update_fields=['has_pii', 'pii_warnings'])
+    
+    return request_kwargs, redactor
+
+
+def save_generated_version(content, job, params, model, generated_text, total_tokens, cost, **metadata):
+    """
+    Save generated text as a new content version and complete the job.
+    
+    Args:
+        content: Content instance
+        job: AiJob instance
+        params: Dict with generation parameters
+        model: Model that generated the text
+        generated_text: Generated markdown
+        total_tokens: Total tokens used
+        cost: Cost in USD
+        **metadata: Extra fields stored on the version and the job result
+        
+    Returns:
+        ContentVersion instance
+    """
+    from contentmgmt.models import Content, ContentVersion
+    
+    # Create new version
+    version_number = content.versions.count() + 1
+    version = ContentVersion.objects.create(
+        content=content,
+        version_number=version_number,
+        title=content.title,
+        body_markdown=generated_text,
+        metadata={
+            'kind': params.get('kind', 'draft'),
+            'model': model,
+            'tokens': total_tokens,
+            'cost': float(cost),
+            'params': params,
+            **metadata
+        },
+        ai_job=job,
+        created_by=job.user
+    )
+    
+    # Update content
+    content.current_version = version
+    content.body = generated_text
+    content.word_count = version.word_count
+    content.status = Content.Status.REVIEW
+    content.save()
+    
+    # Mark job as completed
+    job.mark_completed({
+        'version_id': version.id,
+        'version_number': version_number,
+        'tokens': total_tokens,
+        'cost': float(cost),
+        **metadata
+    })
+    
+    return version
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def generate_content_task(self, content_id, params, job_id):
     """
@@ -140,12 +350,11 @@ def generate_content_task(self, content_id, params, job_id):
     Returns:
         Dict with generation result
     """
-    from contentmgmt.models import Content, ContentVersion
+    from contentmgmt.models import Content
     from ai.models import AiJob
     from ai.client import get_openai_client, calculate_cost
-    from ai.pii import redact_pii, restore_pii
-    from ai.services import log_ai_usage
-    from ai.prompts.models import DEFAULT_BLOG_DRAFT_PROMPT
+    from ai.services import evaluate_usage_limits, log_ai_usage
+    from ai.cache import GenerationCache, is_generation_cache_enabled
     
     try:
         # Get content and job
@@ -156,93 +365,99 @@ def generate_content_task(self, content_id, params, job_id):
         job.mark_running()
         logger.info(f"Starting content generation job {job_id} for content {content_id}")
         
-        # Get parameters
-        kind = params.get('kind', 'draft')
-        topic = params.get('topic', content.title)
-        tone = params.get('tone', 'حرفه‌ای')
-        audience = params.get('audience', 'عمومی')
-        keywords = params.get('keywords', '')
-        min_words = params.get('min_words', 500)
-        additional_instructions = params.get('additional_instructions', '')
-        
-        # Build prompt based on kind
-        if kind == 'draft':
-            # Use default Persian blog draft prompt
-            user_prompt = DEFAULT_BLOG_DRAFT_PROMPT.format(
-                topic=topic,
-                tone=tone,
-                audience=audience,
-                min_words=min_words,
-                keywords=keywords
-            )
-            
-            if additional_instructions:
-                user_prompt += f"\n\n**دستورالعمل‌های اضافی:**\n{additional_instructions}"
-        
-        else:
-            # Simple prompt for other kinds
-            user_prompt = f"موضوع: {topic}\nلحن: {tone}\nمخاطب: {audience}\nکلمات کلیدی: {keywords}"
-            if additional_instructions:
-                user_prompt += f"\n\n{additional_instructions}"
-        
-        # Redact PII from user input
-        redactor = None
-        if topic or keywords or additional_instructions:
-            from ai.pii import PIIRedactor
-            redactor = PIIRedactor()
-            
-            input_text = f"{topic}\n{keywords}\n{additional_instructions}"
-            redacted_input, pii_warnings = redactor.redact(input_text)
-            
-            if pii_warnings:
-                logger.warning(f"PII detected in input for job {job_id}: {pii_warnings}")
-                content.has_pii = True
-                content.pii_warnings = pii_warnings
-                content.save(update_fields=['has_pii', 'pii_warnings'])
+        # Re-check limits; usage may have grown while the job was queued
+        limits_ok, limits_message, _ = evaluate_usage_limits(
+            user=job.user,
+            workspace=job.workspace,
+            organization=content.project.workspace.organization,
+            ai_job=job
+        )
+        if not limits_ok:
+            logger.info(f"Job {job_id} refused: {limits_message}")
+            job.mark_failed(f"Usage limit exceeded: {limits_message}")
+            content.status = Content.Status.DRAFT
+            content.save(update_fields=['status'])
+            return {'success': False, 'error': limits_message}
+        
+        request_kwargs, redactor = build_generation_request(content, params, job_id)
+        model = request_kwargs['model']
         
         # Get OpenAI client
         client = get_openai_client()
-        model = getattr(settings, 'OPENAI_DEFAULT_MODEL', 'gpt-4o-mini')
+        
+        # Stream the completion if requested (falls back to the global setting)
+        stream = params.get('stream', getattr(settings, 'AI_STREAMING_ENABLED', False))
+        stream_stats = None
         
         # Call OpenAI API
         start_time = time.time()
         
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "شما یک نویسنده فارسی‌زبان حرفه‌ای هستید که در تولید محتوای باکیفیت تخصص دارید."
-                    },
-                    {
-                        "role": "user",
-                        "content": user_prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000,
-                top_p=0.9,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
-            )
+            # Look up the exact-match generation cache
+            generation_cache = None
+            cached = None
+            if params.get('use_cache', True) and is_generation_cache_enabled(job.workspace):
+                generation_cache = GenerationCache()
+                cache_key = generation_cache.make_key(**request_kwargs)
+                cached = generation_cache.get(cache_key)
+            
+            if cached:
+                logger.info(f"Generation cache hit for job {job_id}")
+                generated_text = cached['text']
+                usage = None
+            elif stream:
+                from ai.streaming import PartialOutputWriter, consume_completion_stream
+                
+                writer = PartialOutputWriter(
+                    job_id,
+                    transform=redactor.restore_stream().feed if redactor and redactor.get_mapping() else None
+                )
+                response_stream = client.chat.completions.create(
+                    **request_kwargs,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                generated_text, usage, stream_stats = consume_completion_stream(
+                    response_stream, writer, start_time
+                )
+                logger.info(
+                    f"Streamed job {job_id}: ttft={stream_stats['time_to_first_token']}s, "
+                    f"{stream_stats['tokens_per_second']} tokens/s"
+                )
+            else:
+                response = client.chat.completions.create(**request_kwargs)
+                
+                # Extract generated content
+                generated_text = response.choices[0].message.content
+                usage = response.usage
             
             request_duration = time.time() - start_time
             
-            # Extract generated content
-            generated_text = response.choices[0].message.content
+            # Calculate usage and cost
+            if cached:
+                # Report the original token counts; a cache hit costs nothing
+                input_tokens = cached['prompt_tokens']
+                output_tokens = cached['completion_tokens']
+                total_tokens = cached['total_tokens']
+                cost = 0.0
+            else:
+                input_tokens = usage.prompt_tokens if usage else 0
+                output_tokens = usage.completion_tokens if usage else 0
+                total_tokens = usage.total_tokens if usage else 0
+                cost = calculate_cost(model, input_tokens, output_tokens)
+                
+                if generation_cache:
+                    generation_cache.set(cache_key, {
+                        'text': generated_text,
+                        'prompt_tokens': input_tokens,
+                        'completion_tokens': output_tokens,
+                        'total_tokens': total_tokens,
+                    })
             
             # Restore PII if it was redacted
             if redactor and redactor.get_mapping():
                 generated_text = redactor.restore(generated_text)
             
-            # Calculate usage and cost
-            usage = response.usage
-            input_tokens = usage.prompt_tokens
-            output_tokens = usage.completion_tokens
-            total_tokens = usage.total_tokens
-            cost = calculate_cost(model, input_tokens, output_tokens)
-            
             # Log usage
             log_ai_usage(
                 content=content,
@@ -256,48 +471,27 @@ def generate_content_task(self, content_id, params, job_id):
                 total_tokens=total_tokens,
                 estimated_cost=cost,
                 request_duration=request_duration,
-                success=True
+                success=True,
+                cache_hit=bool(cached),
+                idempotency_key=f'job-{job.id}-{self.request.retries}'
             )
             
-            # Create new version
-            version_number = content.versions.count() + 1
-            version = ContentVersion.objects.create(
-                content=content,
-                version_number=version_number,
-                title=content.title,
-                body_markdown=generated_text,
-                metadata={
-                    'kind': kind,
-                    'model': model,
-                    'tokens': total_tokens,
-                    'cost': float(cost),
-                    'params': params
-                },
-                ai_job=job,
-                created_by=job.user
+            version = save_generated_version(
+                content, job, params, model, generated_text, total_tokens, cost,
+                stream_stats=stream_stats,
+                cache_hit=bool(cached)
             )
             
-            # Update content
-            content.current_version = version
-            content.body = generated_text
-            content.word_count = version.word_count
-            content.status = Content.Status.REVIEW
-            content.save()
-            
-            # Mark job as completed
-            job.mark_completed({
-                'version_id': version.id,
-                'version_number': version_number,
-                'tokens': total_tokens,
-                'cost': float(cost)
-            })
+            # Partial output is superseded by the saved version
+            if stream and not cached:
+                writer.clear()
             
             logger.info(f"Content generation job {job_id} completed successfully")
             
             return {
                 'success': True,
                 'version_id': version.id,
-                'version_number': version_number,
+                'version_number': version.version_number,
                 'tokens': total_tokens,
                 'cost': float(cost)
             }
@@ -319,7 +513,8 @@ def generate_content_task(self, content_id, params, job_id):
                 estimated_cost=0.0,
                 request_duration=time.time() - start_time,
                 success=False,
-                error_message=str(api_error)
+                error_message=str(api_error),
+                idempotency_key=f'job-{job.id}-{self.request.retries}-error'
             )
             
             # Retry if retries left
@@ -333,13 +528,251 @@ def generate_content_task(self, content_id, params, job_id):
                 content.save(update_fields=['status'])
                 raise
     
+    except Retry:
+        # Job stays running until the retry succeeds or gives up
+        raise
+    
     except Exception as e:
         logger.error(f"Error in generate_content_task: {str(e)}")
         
         try:
             job = AiJob.objects.get(id=job_id)
-            job.mark_failed(str(e))
+            if job.status != AiJob.Status.FAILED:
+                job.mark_failed(str(e))
         except:
             pass
         
         raise
+
+
+def _fail_batch_job(job, error_message):
+    """Mark a batch-mode job failed and return its content to draft."""
+    from contentmgmt.models import Content
+    
+    job.mark_failed(error_message)
+    Content.objects.filter(id=job.content_id).update(status=Content.Status.DRAFT)
+
+
+@shared_task
+def submit_batch_jobs():
+    """
+    Submit pending batch-mode jobs to the provider batch API.
+    
+    Collects jobs created with execution_mode="batch" into one JSONL batch.
+    Runs periodically from Celery beat.
+    
+    Returns:
+        ProviderBatch ID, or None if there was nothing to submit
+    """
+    from ai.models import AiJob, ProviderBatch
+    from ai.batch import build_batch_request, get_batch_backend
+    
+    max_requests = getattr(settings, 'AI_BATCH_MAX_REQUESTS', 50000)
+    jobs = list(
+        AiJob.objects.filter(
+            execution_mode=AiJob.ExecutionMode.BATCH,
+            status=AiJob.Status.PENDING,
+            provider_batch__isnull=True
+        ).select_related('content').order_by('created_at')[:max_requests]
+    )
+    
+    requests = []
+    submitted_jobs = []
+    for job in jobs:
+        try:
+            request_kwargs, _ = build_generation_request(job.content, job.params, job.id)
+        except Exception as e:
+            logger.error(f"Failed to build batch request for job {job.id}: {str(e)}")
+            _fail_batch_job(job, f"Failed to build request: {str(e)}")
+            continue
+        
+        requests.append(build_batch_request(job.id, request_kwargs))
+        submitted_jobs.append(job)
+    
+    if not requests:
+        return None
+    
+    backend = get_batch_backend()
+    submission = backend.submit(requests)
+    
+    with transaction.atomic():
+        provider_batch = ProviderBatch.objects.create(
+            backend=backend.name,
+            provider_batch_id=submission['id'],
+            model=requests[0]['body']['model'],
+            input_file_id=submission['input_file_id'],
+            request_count=len(requests)
+        )
+        AiJob.objects.filter(id__in=[job.id for job in submitted_jobs]).update(
+            provider_batch=provider_batch
+        )
+        for job in submitted_jobs:
+            job.mark_running()
+    
+    logger.info(f"Submitted {len(requests)} jobs as provider batch {provider_batch.provider_batch_id}")
+    return provider_batch.id
+
+
+def _save_batch_result(job, provider_batch, body):
+    """
+    Save one successful batch response as a content version.
+    
+    Args:
+        job: AiJob instance
+        provider_batch: ProviderBatch instance
+        body: Chat completion response body
+    """
+    from ai.models import AiJob
+    from ai.client import calculate_cost
+    from ai.services import log_ai_usage
+    
+    content = job.content
+    model = provider_batch.model
+    generated_text = body['choices'][0]['message']['content']
+    usage = body.get('usage') or {}
+    input_tokens = usage.get('prompt_tokens', 0)
+    output_tokens = usage.get('completion_tokens', 0)
+    total_tokens = usage.get('total_tokens', input_tokens + output_tokens)
+    
+    # Batch requests are billed at a discount
+    cost = calculate_cost(model, input_tokens, output_tokens) * getattr(settings, 'AI_BATCH_COST_DISCOUNT', 0.5)
+    
+    log_ai_usage(
+        content=content,
+        ai_job=job,
+        user=job.user,
+        workspace=job.workspace,
+        organization=content.project.workspace.organization,
+        model=model,
+        prompt_tokens=input_tokens,
+        completion_tokens=output_tokens,
+        total_tokens=total_tokens,
+        estimated_cost=cost,
+        success=True,
+        idempotency_key=f'batch-{provider_batch.id}-{job.id}'
+    )
+    
+    save_generated_version(
+        content, job, job.params, model, generated_text, total_tokens, cost,
+        execution_mode=AiJob.ExecutionMode.BATCH,
+        provider_batch_id=provider_batch.provider_batch_id
+    )
+
+
+def process_provider_batch(provider_batch, info, backend):
+    """
+    Write the results of a finished provider batch back to its jobs.
+    
+    Args:
+        provider_batch: ProviderBatch instance
+        info: Batch state from backend.retrieve()
+        backend: Batch backend the batch was submitted to
+        
+    Returns:
+        Tuple of (completed, failed) job counts
+    """
+    from ai.models import AiJob, ProviderBatch
+    from ai.batch import parse_custom_id
+    from ai.services import log_ai_usage
+    
+    results = []
+    for file_id in (info['output_file_id'], info['error_file_id']):
+        if file_id:
+            results.extend(backend.read_results(file_id))
+    
+    jobs = {
+        job.id: job
+        for job in provider_batch.jobs.filter(status=AiJob.Status.RUNNING).select_related(
+            'content__project__workspace__organization', 'user', 'workspace', 'batch'
+        )
+    }
+    
+    completed = failed = 0
+    for result in results:
+        job = jobs.pop(parse_custom_id(result.get('custom_id')), None)
+        if job is None:
+            continue
+        
+        response = result.get('response') or {}
+        error = result.get('error') or (response.get('body') or {}).get('error')
+        
+        if error or response.get('status_code') != 200:
+            message = error.get('message') if isinstance(error, dict) else str(error or 'Batch request failed')
+            log_ai_usage(
+                content=job.content,
+                ai_job=job,
+                user=job.user,
+                workspace=job.workspace,
+                organization=job.content.project.workspace.organization,
+                model=provider_batch.model,
+                success=False,
+                error_message=message,
+                idempotency_key=f'batch-{provider_batch.id}-{job.id}-error'
+            )
+            _fail_batch_job(job, f"Batch API error: {message}")
+            failed += 1
+            continue
+        
+        try:
+            with transaction.atomic():
+                _save_batch_result(job, provider_batch, response['body'])
+            completed += 1
+        except Exception as e:
+            logger.error(f"Failed to save batch result for job {job.id}: {str(e)}")
+            _fail_batch_job(job, f"Failed to save batch result: {str(e)}")
+            failed += 1
+    
+    # Jobs without a result expired or were cancelled with the batch
+    for job in jobs.values():
+        _fail_batch_job(job, f"No result returned by provider batch ({info['status']})")
+        failed += 1
+    
+    if info['status'] == 'completed':
+        provider_batch.status = ProviderBatch.Status.COMPLETED
+    else:
+        provider_batch.status = ProviderBatch.Status.FAILED
+        provider_batch.error_message = f"Provider batch {info['status']}"
+    provider_batch.output_file_id = info['output_file_id']
+    provider_batch.error_file_id = info['error_file_id']
+    provider_batch.completed_count = completed
+    provider_batch.failed_count = failed
+    provider_batch.completed_at = timezone.now()
+    provider_batch.save()
+    
+    return completed, failed
+
+
+@shared_task
+def poll_batch_jobs():
+    """
+    Poll submitted provider batches and collect finished results.
+    
+    Runs periodically from Celery beat.
+    
+    Returns:
+        Number of provider batches that finished
+    """
+    from ai.models import ProviderBatch
+    from ai.batch import FINISHED_STATUSES, get_batch_backend
+    
+    finished = 0
+    for provider_batch in ProviderBatch.objects.filter(status=ProviderBatch.Status.SUBMITTED):
+        backend = get_batch_backend(provider_batch.backend)
+        
+        try:
+            info = backend.retrieve(provider_batch.provider_batch_id)
+        except Exception as e:
+            logger.warning(f"Failed to poll provider batch {provider_batch.provider_batch_id}: {str(e)}")
+            continue
+        
+        if info['status'] not in FINISHED_STATUSES:
+            continue
+        
+        completed, failed = process_provider_batch(provider_batch, info, backend)
+        logger.info(
+            f"Provider batch {provider_batch.provider_batch_id} {info['status']}: "
+            f"{completed} completed, {failed} failed"
+        )
+        finished += 1
+    
+    return finished
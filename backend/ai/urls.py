@@ -7,11 +7,14 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'jobs', views.AiJobViewSet, basename='ai-job')
+router.register(r'job-batches', views.AiJobBatchViewSet, basename='ai-job-batch')
 router.register(r'usage-logs', views.UsageLogViewSet, basename='usage-log')
 router.register(r'usage-limits', views.UsageLimitViewSet, basename='usage-limit')
 router.register(r'audit-logs', views.AuditLogViewSet, basename='audit-log')
 
 urlpatterns = [
     path('usage/summary/', views.usage_summary, name='usage-summary'),
+    path('usage/timeseries/', views.usage_timeseries, name='usage-timeseries'),
+    path('jobs/<int:pk>/events/', views.job_events, name='ai-job-events'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,226 @@
+"""
+Usage log writing, optionally buffered through a Redis stream.
+
+With AI_USAGE_LOG_BUFFERED on, log_ai_usage() appends usage events to a
+Redis stream instead of inserting a row per API call, and the
+flush_usage_log_buffer task inserts them in bulk. Delivery is
+at-least-once: events are acknowledged only after their rows commit, and
+events left pending by a crashed flusher are reclaimed. Every log carries
+an idempotency key, so an event delivered twice is only inserted once.
+"""
+import json
+import logging
+import os
+import socket
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import ResponseError
+
+from core.redis import get_redis_client
+from .models import UsageLog
+from .rollups import apply_usage_to_rollups
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'ai_usage_log_stream'
+CONSUMER_GROUP = 'usage-log-writers'
+
+# First key of the advisory locks taken on idempotency keys
+IDEMPOTENCY_LOCK_NAMESPACE = 7301
+
+# UsageLog fields carried by a buffered event
+EVENT_FIELDS = (
+    'content_id', 'ai_job_id', 'user_id', 'workspace_id', 'organization_id', 'model',
+    'prompt_tokens', 'completion_tokens', 'total_tokens', 'estimated_cost',
+    'request_duration', 'success', 'error_message', 'cache_hit', 'timestamp',
+    'idempotency_key',
+)
+
+
+def is_usage_buffer_enabled():
+    """Whether usage logs are buffered instead of inserted one by one."""
+    return getattr(settings, 'AI_USAGE_LOG_BUFFERED', False)
+
+
+def build_usage_log(idempotency_key=None, **fields):
+    """
+    Build an unsaved UsageLog stamped with the current time.
+
+    Args:
+        idempotency_key: Optional key identifying the usage, defaults to a
+                         random key
+        **fields: UsageLog field values
+
+    Returns:
+        Unsaved UsageLog instance
+    """
+    return UsageLog(
+        idempotency_key=idempotency_key or uuid.uuid4().hex,
+        timestamp=timezone.now(),
+        **fields
+    )
+
+
+def _lock_idempotency_keys(keys):
+    """
+    Take transaction-level advisory locks on idempotency keys.
+
+    Keys are locked in sorted order so concurrent writers of overlapping
+    batches can't deadlock.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT pg_advisory_xact_lock(%s, hashtext(key))
+            FROM (SELECT DISTINCT key FROM unnest(%s::text[]) AS key ORDER BY key) AS keys
+            """,
+            [IDEMPOTENCY_LOCK_NAMESPACE, keys]
+        )
+
+
+def write_usage_logs(logs):
+    """
+    Insert usage logs whose idempotency key hasn't been written yet.
+
+    The logs and their rollups are written in one transaction. The keys
+    are locked before they are checked, so concurrent writers of the same
+    usage (e.g. a redelivered task) wait for each other and only the
+    first inserts it, whatever timestamps the logs carry.
+
+    Args:
+        logs: List of unsaved UsageLog instances
+
+    Returns:
+        List of the inserted UsageLog instances
+    """
+    if not logs:
+        return []
+
+    keys = [log.idempotency_key for log in logs]
+    with transaction.atomic():
+        _lock_idempotency_keys(keys)
+        seen = set(
+            UsageLog.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True)
+        )
+
+        new_logs = []
+        for log in logs:
+            if log.idempotency_key in seen:
+                continue
+            seen.add(log.idempotency_key)
+            new_logs.append(log)
+
+        if new_logs:
+            UsageLog.objects.bulk_create(new_logs)
+            apply_usage_to_rollups(new_logs)
+
+    return new_logs
+
+
+def _serialize(log):
+    event = {field: getattr(log, field) for field in EVENT_FIELDS}
+    # DjangoJSONEncoder would truncate the timestamp to milliseconds
+    event['timestamp'] = log.timestamp.isoformat()
+    return json.dumps(event, cls=DjangoJSONEncoder)
+
+
+def _deserialize(data):
+    event = json.loads(data)
+    event['timestamp'] = parse_datetime(event['timestamp'])
+    event['estimated_cost'] = Decimal(event['estimated_cost'])
+    if event['request_duration'] is not None:
+        event['request_duration'] = Decimal(event['request_duration'])
+    return UsageLog(**event)
+
+
+def buffer_usage_log(log):
+    """
+    Append an unsaved usage log to the buffer stream.
+
+    Args:
+        log: UsageLog built with build_usage_log()
+    """
+    get_redis_client().xadd(STREAM_KEY, {'event': _serialize(log)})
+
+
+def _ensure_consumer_group(client):
+    if client.exists(STREAM_KEY) and any(
+        group['name'] == CONSUMER_GROUP for group in client.xinfo_groups(STREAM_KEY)
+    ):
+        return
+
+    try:
+        client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def _read_events(client, consumer, count):
+    """Read events left pending by other flushers, then new events."""
+    claim_idle_ms = getattr(settings, 'AI_USAGE_LOG_CLAIM_IDLE', 60) * 1000
+
+    _, messages, _ = client.xautoclaim(
+        STREAM_KEY, CONSUMER_GROUP, consumer, min_idle_time=claim_idle_ms, start_id='0-0', count=count
+    )
+    if len(messages) < count:
+        for _, new_messages in client.xreadgroup(
+            CONSUMER_GROUP, consumer, {STREAM_KEY: '>'}, count=count - len(messages)
+        ) or []:
+            messages.extend(new_messages)
+
+    # Claimed entries deleted from the stream come back without fields
+    return [(message_id, fields) for message_id, fields in messages if fields]
+
+
+def flush_usage_log_buffer(max_batches=None):
+    """
+    Insert buffered usage events into usage_logs in bulk.
+
+    Args:
+        max_batches: Optional limit on the number of batches, so a flush
+                     under constant load ends
+
+    Returns:
+        Number of usage logs inserted
+    """
+    client = get_redis_client()
+    _ensure_consumer_group(client)
+
+    consumer = f'{socket.gethostname()}-{os.getpid()}'
+    batch_size = getattr(settings, 'AI_USAGE_LOG_FLUSH_BATCH_SIZE', 1000)
+    written = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        messages = _read_events(client, consumer, batch_size)
+        if not messages:
+            break
+
+        logs = []
+        for message_id, fields in messages:
+            try:
+                logs.append(_deserialize(fields['event']))
+            except Exception as e:
+                # A malformed event would block the buffer forever
+                logger.error(f"Dropping malformed usage event {message_id}: {str(e)}")
+
+        written += len(write_usage_logs(logs))
+
+        # Acknowledge only after the rows are committed
+        message_ids = [message_id for message_id, _ in messages]
+        pipe = client.pipeline()
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *message_ids)
+        pipe.xdel(STREAM_KEY, *message_ids)
+        pipe.execute()
+        batches += 1
+
+    if written:
+        logger.info(f"Flushed {written} buffered usage logs")
+    return written
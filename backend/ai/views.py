@@ -3,80 +3,209 @@ Views for AI operations and usage tracking.
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Q
 from django.utils import timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from datetime import timedelta
+import asyncio
+import json
 import logging
 
-from .models import AiJob, UsageLog, UsageLimit, AuditLog
+from accounts.permissions import check_organization_admin
+from accounts.tenancy import TenantScopedMixin, get_member_organization_ids
+from core.fieldsets import SparseFieldsetsMixin
+from core.pagination import KeysetPagination
+
+from .models import AiJob, AiJobBatch, UsageLog, UsageLimit, AuditLog
 from .serializers import (
-    AiJobSerializer, UsageLogSerializer, UsageLimitSerializer,
-    AuditLogSerializer, UsageSummarySerializer
+    AiJobSerializer, AiJobBatchSerializer, UsageLogSerializer, UsageLimitSerializer,
+    AuditLogSerializer, UsageSummarySerializer, UsageTimeseriesQuerySerializer
 )
 from .services import get_usage_summary
+from .events import (
+    TERMINAL_STATUSES, get_job_channel, get_job_status_payload, format_sse
+)
+from .streaming import get_partial_output_key
 
 logger = logging.getLogger(__name__)
 
 
-class AiJobViewSet(viewsets.ReadOnlyModelViewSet):
+class AiJobViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for AiJob (read-only)."""
     
     queryset = AiJob.objects.select_related('content', 'user', 'workspace')
     serializer_class = AiJobSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['content', 'user', 'workspace', 'status', 'kind']
     ordering_fields = ['created_at', 'started_at', 'completed_at']
     ordering = ['-created_at']
+
+
+class AiJobBatchViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for AiJobBatch progress (read-only)."""
     
-    def get_queryset(self):
-        """Filter by user's accessible workspaces."""
-        user = self.request.user
-        # For now, return all. In production, filter by user's workspaces
-        return self.queryset
+    queryset = AiJobBatch.objects.select_related('project')
+    serializer_class = AiJobBatchSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['project', 'workspace', 'status']
+    ordering_fields = ['created_at', 'completed_at']
+    ordering = ['-created_at']
+    tenant_field = 'workspace__organization'
 
 
-class UsageLogViewSet(viewsets.ReadOnlyModelViewSet):
+class UsageLogViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for UsageLog (read-only)."""
     
     queryset = UsageLog.objects.select_related('content', 'ai_job', 'user', 'workspace', 'organization')
     serializer_class = UsageLogSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['workspace', 'organization', 'user', 'model', 'success']
     ordering_fields = ['timestamp', 'total_tokens', 'estimated_cost']
     ordering = ['-timestamp']
-    
-    def get_queryset(self):
-        """Filter by user's accessible workspaces."""
-        user = self.request.user
-        # For now, return all. In production, filter by user's workspaces
-        return self.queryset
 
 
-class UsageLimitViewSet(viewsets.ModelViewSet):
-    """ViewSet for UsageLimit CRUD."""
+class UsageLimitViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for UsageLimit CRUD.
+    
+    Organization and workspace limits are visible to the organization's
+    members and set by its admins. User limits apply across organizations,
+    so users see only their own and only staff set them.
+    """
     
     queryset = UsageLimit.objects.all()
     serializer_class = UsageLimitSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['scope', 'scope_id', 'period']
+    
+    def get_queryset(self):
+        from accounts.models import Workspace
+        
+        organization_ids = get_member_organization_ids(self.request.user, self.request)
+        workspace_ids = Workspace.objects.filter(organization_id__in=organization_ids).values('id')
+        visible = (
+            Q(scope=UsageLimit.Scope.ORGANIZATION, scope_id__in=organization_ids)
+            | Q(scope=UsageLimit.Scope.WORKSPACE, scope_id__in=workspace_ids)
+            | Q(scope=UsageLimit.Scope.USER, scope_id=self.request.user.id)
+        )
+        if self.request.user.is_staff:
+            visible |= Q(scope=UsageLimit.Scope.USER)
+        return super().get_queryset().filter(visible)
+    
+    def check_limit_admin(self, scope, scope_id):
+        """
+        Deny setting a limit unless the user administers its scope.
+        
+        Args:
+            scope: UsageLimit.Scope value
+            scope_id: ID of the user, workspace or organization
+        
+        Raises:
+            PermissionDenied: The user can't set limits for the scope
+        """
+        from accounts.models import Workspace
+        
+        if scope == UsageLimit.Scope.USER:
+            if not self.request.user.is_staff:
+                raise PermissionDenied('Only staff can set user limits.')
+            return
+        if scope == UsageLimit.Scope.WORKSPACE:
+            scope_id = Workspace.objects.filter(id=scope_id).values_list('organization_id', flat=True).first()
+        check_organization_admin(self.request, scope_id)
+    
+    def perform_create(self, serializer):
+        self.check_limit_admin(serializer.validated_data['scope'], serializer.validated_data['scope_id'])
+        serializer.save()
+    
+    def perform_update(self, serializer):
+        # Check both the current scope and the one the limit moves to
+        instance = serializer.instance
+        self.check_limit_admin(instance.scope, instance.scope_id)
+        self.check_limit_admin(
+            serializer.validated_data.get('scope', instance.scope),
+            serializer.validated_data.get('scope_id', instance.scope_id)
+        )
+        serializer.save()
+    
+    def perform_destroy(self, instance):
+        self.check_limit_admin(instance.scope, instance.scope_id)
+        instance.delete()
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for AuditLog (read-only)."""
     
     queryset = AuditLog.objects.select_related('content', 'user')
     serializer_class = AuditLogSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['content', 'user', 'action']
+    # Time ranges only scan the monthly partitions they cover
+    filterset_fields = {
+        'content': ['exact'],
+        'user': ['exact'],
+        'action': ['exact'],
+        'timestamp': ['gte', 'lt'],
+    }
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
+    tenant_field = 'content__organization'
+
+
+def _get_usage_filters(request):
+    """
+    Resolve the workspace_id, user_id and organization_id query params.
+    
+    Only the caller's organizations are visible: an organization or
+    workspace outside them, or a user sharing none of them, is reported
+    as not found, and usage is always limited to those organizations.
+    
+    Returns:
+        Tuple of (filters, error_response) where filters maps workspace,
+        user and organization to instances plus organization_ids to the
+        caller's organization IDs, and error_response is a 404 Response
+        for an unknown or foreign ID, or None
+    """
+    from accounts.models import Organization, OrganizationMember, User, Workspace
+    
+    organization_ids = get_member_organization_ids(request.user, request)
+    visible = {
+        'workspace': Workspace.objects.filter(organization_id__in=organization_ids),
+        'user': User.objects.filter(
+            id__in=OrganizationMember.objects.filter(organization_id__in=organization_ids).values('user_id')
+        ),
+        'organization': Organization.objects.filter(id__in=organization_ids),
+    }
+    
+    filters = {'organization_ids': organization_ids}
+    for name, queryset in visible.items():
+        scope_id = request.query_params.get(f'{name}_id')
+        if not scope_id:
+            continue
+        
+        try:
+            filters[name] = queryset.get(id=scope_id)
+        except (queryset.model.DoesNotExist, ValueError):
+            return None, Response(
+                {'error': f'{name.capitalize()} not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    return filters, None
 
 
 @api_view(['GET'])
@@ -92,9 +221,6 @@ def usage_summary(request):
         - organization_id: Filter by organization
         - period: 'monthly' (default), 'weekly', 'daily', 'all'
     """
-    workspace_id = request.query_params.get('workspace_id')
-    user_id = request.query_params.get('user_id')
-    organization_id = request.query_params.get('organization_id')
     period = request.query_params.get('period', 'monthly')
     
     # Calculate date range based on period
@@ -111,48 +237,15 @@ def usage_summary(request):
     
     end_date = now
     
-    # Get instances if IDs provided
-    workspace = None
-    user = None
-    organization = None
-    
-    if workspace_id:
-        from accounts.models import Workspace
-        try:
-            workspace = Workspace.objects.get(id=workspace_id)
-        except Workspace.DoesNotExist:
-            return Response(
-                {'error': 'Workspace not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-    
-    if user_id:
-        from accounts.models import User
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-    
-    if organization_id:
-        from accounts.models import Organization
-        try:
-            organization = Organization.objects.get(id=organization_id)
-        except Organization.DoesNotExist:
-            return Response(
-                {'error': 'Organization not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    filters, error_response = _get_usage_filters(request)
+    if error_response:
+        return error_response
     
     # Get summary
     summary = get_usage_summary(
-        workspace=workspace,
-        user=user,
-        organization=organization,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        **filters
     )
     
     serializer = UsageSummarySerializer(summary)
@@ -163,3 +256,155 @@ def usage_summary(request):
         'end_date': end_date.isoformat(),
         'summary': serializer.data
     })
+
+
+@api_view(['GET'])
+def usage_timeseries(request):
+    """
+    Get usage per time bucket for charts.
+    
+    GET /api/ai/usage/timeseries/?bucket=day&group_by=model&workspace_id=1
+    
+    Query params:
+        - bucket: 'hour', 'day' (default), 'week' or 'month'
+        - group_by: Optional 'model', 'user', 'workspace' or 'project'
+        - start: Range start (ISO 8601), defaults to 30 days before end
+        - end: Range end (ISO 8601), defaults to now
+        - workspace_id: Filter by workspace
+        - user_id: Filter by user
+        - organization_id: Filter by organization
+    """
+    from .rollups import get_usage_timeseries
+    
+    query = UsageTimeseriesQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    
+    filters, error_response = _get_usage_filters(request)
+    if error_response:
+        return error_response
+    
+    series = get_usage_timeseries(
+        params['bucket'],
+        params['start'],
+        params['end'],
+        group_by=params.get('group_by'),
+        **filters
+    )
+    
+    return Response({
+        'bucket': params['bucket'],
+        'group_by': params.get('group_by'),
+        'start_date': params['start'].isoformat(),
+        'end_date': params['end'].isoformat(),
+        'series': series
+    })
+
+
+def _authenticate_event_stream(request):
+    """
+    Authenticate an event stream request.
+    
+    EventSource can't send headers, so the JWT access token may also be
+    passed as a ``token`` query parameter.
+    
+    Returns:
+        User instance or None
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    
+    auth = JWTAuthentication()
+    try:
+        token = request.GET.get('token')
+        if token:
+            return auth.get_user(auth.get_validated_token(token))
+        
+        result = auth.authenticate(request)
+        return result[0] if result else None
+    except (InvalidToken, TokenError):
+        return None
+
+
+async def job_events(request, pk):
+    """
+    Stream job status transitions and partial output as Server-Sent Events.
+    
+    GET /api/ai/jobs/:id/events/
+    
+    Events:
+        - status: job status snapshot (sent on connect and on every transition)
+        - partial: {"offset": int, "text": str} chunk of streamed output
+    
+    The view is async so an open connection doesn't hold a worker; the
+    stream closes once the job reaches a terminal status or after
+    AI_SSE_MAX_DURATION seconds (clients reconnect automatically).
+    """
+    from accounts.models import OrganizationMember
+    
+    user = await sync_to_async(_authenticate_event_stream)(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=401
+        )
+    
+    job = await AiJob.objects.select_related('workspace').filter(pk=pk).afirst()
+    if job is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    
+    if not (user.is_staff or job.user_id == user.id):
+        is_member = await OrganizationMember.objects.filter(
+            user=user,
+            organization_id=job.workspace.organization_id
+        ).aexists()
+        if not is_member:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+    
+    heartbeat = getattr(settings, 'AI_SSE_HEARTBEAT_INTERVAL', 15)
+    max_duration = getattr(settings, 'AI_SSE_MAX_DURATION', 600)
+    
+    async def event_stream():
+        from core.redis import get_async_redis_client
+        
+        client = get_async_redis_client()
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before taking the snapshot so no transition is missed
+            await pubsub.subscribe(get_job_channel(pk))
+            
+            current = await AiJob.objects.aget(pk=pk)
+            yield f"retry: {heartbeat * 1000}\n\n"
+            yield format_sse('status', get_job_status_payload(current))
+            
+            if current.status in TERMINAL_STATUSES:
+                return
+            
+            partial = await cache.aget(get_partial_output_key(pk))
+            if partial:
+                yield format_sse('partial', {'offset': 0, 'text': partial['text']})
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max_duration
+            while loop.time() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=heartbeat
+                )
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                payload = json.loads(message['data'])
+                yield format_sse(payload['event'], payload['data'])
+                
+                if payload['event'] == 'status' and payload['data']['status'] in TERMINAL_STATUSES:
+                    break
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
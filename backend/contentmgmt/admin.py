@@ -42,7 +42,8 @@ class ContentVersionAdmin(admin.ModelAdmin):
     list_display = ['id', 'content', 'version_number', 'word_count', 'ai_job', 'created_at']
     list_filter = ['created_at']
     search_fields = ['content__title', 'title']
-    readonly_fields = ['version_number', 'word_count', 'created_at']
+    exclude = ['stored_body', 'delta', 'base_version']
+    readonly_fields = ['version_number', 'body_markdown', 'word_count', 'created_at']
 
 
 @admin.register(Version)
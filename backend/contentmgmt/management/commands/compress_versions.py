@@ -0,0 +1,70 @@
+"""
+Convert existing content version history between full and delta storage.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from contentmgmt.models import ContentVersion
+from contentmgmt.versioning import repack_versions, stored_size
+
+
+class Command(BaseCommand):
+    help = 'Re-encode content version bodies as deltas between snapshots (or back to full bodies), in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Contents whose history is converted per transaction'
+        )
+        parser.add_argument(
+            '--interval', type=int,
+            help='Versions per full snapshot, defaults to CONTENT_VERSION_SNAPSHOT_INTERVAL'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Store every version in full again'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval'] or getattr(settings, 'CONTENT_VERSION_SNAPSHOT_INTERVAL', 10)
+        storage = 'full' if options['full'] else 'delta'
+        if batch_size < 1 or interval < 1:
+            raise CommandError('--batch-size and --interval must be positive')
+
+        content_ids = ContentVersion.objects.order_by('content_id').values_list('content_id', flat=True).distinct()
+        stats = {'contents': 0, 'versions': 0, 'updated': 0, 'before': 0, 'after': 0}
+
+        batch = []
+        for content_id in content_ids.iterator():
+            batch.append(content_id)
+            if len(batch) >= batch_size:
+                self._convert(batch, storage, interval, stats)
+                batch = []
+        if batch:
+            self._convert(batch, storage, interval, stats)
+
+        saved = 1 - stats['after'] / stats['before'] if stats['before'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted {stats['updated']} of {stats['versions']} versions of {stats['contents']} contents "
+            f"to {storage} storage, body storage {stats['before']} -> {stats['after']} characters ({saved:.0%} saved)"
+        ))
+
+    def _convert(self, content_ids, storage, interval, stats):
+        with transaction.atomic():
+            versions = list(ContentVersion.objects.filter(content_id__in=content_ids).only(
+                'id', 'content_id', 'version_number', 'stored_body', 'delta', 'base_version_id'
+            ))
+            before = sum(map(stored_size, versions))
+            changed = repack_versions(versions, storage, interval)
+            ContentVersion.objects.bulk_update(changed, ['stored_body', 'delta', 'base_version'], batch_size=500)
+
+        stats['contents'] += len(content_ids)
+        stats['versions'] += len(versions)
+        stats['updated'] += len(changed)
+        stats['before'] += before
+        stats['after'] += sum(map(stored_size, versions))
+        self.stdout.write(
+            f"{stats['contents']} contents, {stats['versions']} versions, {stats['updated']} updated"
+        )
@@ -0,0 +1,26 @@
+# Generated migration for full-text search over content
+
+import contentmgmt.search
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contentmgmt', '0002_contentversion_content_current_version'),
+    ]
+
+    operations = [
+        # Computing the stored column rewrites the contents table once
+        migrations.AddField(
+            model_name='content',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(contentmgmt.search.NormalizePersian('title'), config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector(contentmgmt.search.NormalizePersian('body'), config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), help_text='Normalized title and body for full-text search, maintained by the database', output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='contents_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated migration for trigram indexes behind title suggestions
+
+import contentmgmt.search
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contentmgmt', '0003_content_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='content',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(contentmgmt.search.NormalizePersian('title')), name='gin_trgm_ops'), name='contents_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(contentmgmt.search.NormalizePersian('name')), name='gin_trgm_ops'), name='projects_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(contentmgmt.search.NormalizePersian('title')), name='gin_trgm_ops'), name='prompts_title_trgm'),
+        ),
+    ]
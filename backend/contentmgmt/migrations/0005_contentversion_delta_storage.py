@@ -0,0 +1,39 @@
+# Generated migration for delta-compressed content version storage
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contentmgmt', '0004_title_trigram_indexes'),
+    ]
+
+    operations = [
+        # The body_markdown column keeps its name, body_markdown becomes a property
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='contentversion',
+                    old_name='body_markdown',
+                    new_name='stored_body',
+                ),
+                migrations.AlterField(
+                    model_name='contentversion',
+                    name='stored_body',
+                    field=models.TextField(blank=True, db_column='body_markdown', help_text='Content body in Markdown format with RTL support, empty for delta versions'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contentversion',
+            name='delta',
+            field=models.JSONField(blank=True, help_text='Word-level edits against base_version, null for full snapshots', null=True),
+        ),
+        migrations.AddField(
+            model_name='contentversion',
+            name='base_version',
+            field=models.ForeignKey(blank=True, help_text='Previous version the delta applies to', null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='+', to='contentmgmt.contentversion'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated migration for the denormalized organization on contents and versions
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_CONTENTS = """
+UPDATE contents
+SET organization_id = workspaces.organization_id
+FROM projects JOIN workspaces ON workspaces.id = projects.workspace_id
+WHERE projects.id = contents.project_id
+"""
+
+BACKFILL_VERSIONS = """
+UPDATE content_versions
+SET organization_id = contents.organization_id
+FROM contents
+WHERE contents.id = content_versions.content_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_workspace_ai_cache_enabled'),
+        ('contentmgmt', '0005_contentversion_delta_storage'),
+    ]
+
+    operations = [
+        # Added nullable, backfilled, then made required
+        migrations.AddField(
+            model_name='content',
+            name='organization',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Denormalized project.workspace.organization, for tenant scoping', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contents', to='accounts.organization'),
+        ),
+        migrations.AddField(
+            model_name='contentversion',
+            name='organization',
+            field=models.ForeignKey(editable=False, help_text='Denormalized content.organization, for tenant scoping', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='content_versions', to='accounts.organization'),
+        ),
+        migrations.RunSQL(BACKFILL_CONTENTS, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_VERSIONS, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='content',
+            name='organization',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Denormalized project.workspace.organization, for tenant scoping', on_delete=django.db.models.deletion.CASCADE, related_name='contents', to='accounts.organization'),
+        ),
+        migrations.AlterField(
+            model_name='contentversion',
+            name='organization',
+            field=models.ForeignKey(editable=False, help_text='Denormalized content.organization, for tenant scoping', on_delete=django.db.models.deletion.CASCADE, related_name='content_versions', to='accounts.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['organization', '-created_at'], name='contents_organiz_d12758_idx'),
+        ),
+    ]
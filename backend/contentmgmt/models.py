@@ -3,7 +3,10 @@ Models for content management.
 """
 from django.db import models
 from django.conf import settings
-from accounts.models import Workspace
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from accounts.models import Organization, Workspace
+from .search import SEARCH_CONFIG, NormalizePersian, trigram_index_expression
 
 
 class Project(models.Model):
@@ -34,10 +37,30 @@ class Project(models.Model):
             models.Index(fields=['workspace']),
             models.Index(fields=['created_by']),
             models.Index(fields=['is_active']),
+            GinIndex(OpClass(trigram_index_expression('name'), name='gin_trgm_ops'), name='projects_name_trgm'),
         ]
     
+    # workspace_id as loaded, to notice moves
+    _loaded_workspace_id = None
+    
     def __str__(self):
         return f"{self.workspace.name} - {self.name}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_workspace_id = instance.__dict__.get('workspace_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Re-sync the organization of the project's contents when it moves workspace."""
+        moved = not self._state.adding and self.workspace_id != self._loaded_workspace_id
+        super().save(*args, **kwargs)
+        self._loaded_workspace_id = self.workspace_id
+        
+        if moved:
+            from accounts.tenancy import sync_organization_ids
+            sync_organization_ids(self.workspace.organization_id, project_id=self.id)
 
 
 class Prompt(models.Model):
@@ -80,6 +103,7 @@ class Prompt(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['is_public']),
             models.Index(fields=['-usage_count']),
+            GinIndex(OpClass(trigram_index_expression('title'), name='gin_trgm_ops'), name='prompts_title_trgm'),
         ]
     
     def __str__(self):
@@ -108,6 +132,14 @@ class Content(models.Model):
         on_delete=models.CASCADE,
         related_name='contents'
     )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        editable=False,
+        db_index=False,
+        related_name='contents',
+        help_text="Denormalized project.workspace.organization, for tenant scoping"
+    )
     prompt = models.ForeignKey(
         Prompt,
         on_delete=models.SET_NULL,
@@ -145,6 +177,15 @@ class Content(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     approved_at = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True, null=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector(NormalizePersian('title'), config=SEARCH_CONFIG, weight='A')
+            + SearchVector(NormalizePersian('body'), config=SEARCH_CONFIG, weight='B')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        help_text='Normalized title and body for full-text search, maintained by the database'
+    )
     
     class Meta:
         db_table = 'contents'
@@ -154,17 +195,46 @@ class Content(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created_by']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['organization', '-created_at']),
             models.Index(fields=['has_pii']),
+            GinIndex(fields=['search_vector'], name='contents_search_vector_gin'),
+            GinIndex(OpClass(trigram_index_expression('title'), name='gin_trgm_ops'), name='contents_title_trgm'),
         ]
     
+    # project_id as loaded, to notice moves
+    _loaded_project_id = None
+    
     def __str__(self):
         return self.title
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Set the organization from the project, re-syncing the versions when the content moves."""
+        moved = not self._state.adding and self.project_id != self._loaded_project_id
+        if self.organization_id is None or moved:
+            self.organization_id = self.project.workspace.organization_id
+        
+        super().save(*args, **kwargs)
+        self._loaded_project_id = self.project_id
+        
+        if moved:
+            self.versions.exclude(organization_id=self.organization_id).update(
+                organization_id=self.organization_id
+            )
 
 
 class ContentVersion(models.Model):
     """
     Content version snapshots with Markdown RTL support.
-    Each version stores the full content at a point in time.
+    Each version holds the full content at a point in time. With delta
+    storage enabled most versions store a diff against the previous one,
+    and body_markdown rebuilds the full body (see contentmgmt.versioning).
+    Versions must not be edited once later versions exist.
     """
     
     content = models.ForeignKey(
@@ -172,10 +242,32 @@ class ContentVersion(models.Model):
         on_delete=models.CASCADE,
         related_name='versions'
     )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        editable=False,
+        related_name='content_versions',
+        help_text="Denormalized content.organization, for tenant scoping"
+    )
     version_number = models.IntegerField()
     title = models.CharField(max_length=500)
-    body_markdown = models.TextField(
-        help_text='Content body in Markdown format with RTL support'
+    stored_body = models.TextField(
+        db_column='body_markdown',
+        blank=True,
+        help_text='Content body in Markdown format with RTL support, empty for delta versions'
+    )
+    delta = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='Word-level edits against base_version, null for full snapshots'
+    )
+    base_version = models.ForeignKey(
+        'self',
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Previous version the delta applies to'
     )
     metadata = models.JSONField(
         default=dict,
@@ -198,6 +290,9 @@ class ContentVersion(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Full body once set or rebuilt
+    _body_markdown = None
+    
     class Meta:
         db_table = 'content_versions'
         unique_together = [['content', 'version_number']]
@@ -211,12 +306,40 @@ class ContentVersion(models.Model):
     def __str__(self):
         return f"{self.content.title} - v{self.version_number}"
     
+    @property
+    def body_markdown(self):
+        """Full body in Markdown, rebuilt from the delta chain for delta versions."""
+        if self._body_markdown is None:
+            from .versioning import get_version_body
+            self._body_markdown = get_version_body(self)
+        return self._body_markdown
+    
+    @body_markdown.setter
+    def body_markdown(self, value):
+        self._body_markdown = value
+        self.stored_body = value
+        self.delta = None
+        self.base_version = None
+    
     def save(self, *args, **kwargs):
-        """Calculate word count on save."""
-        if self.body_markdown:
+        """Calculate word count, set the organization and compress the body on save."""
+        if self.organization_id is None:
+            self.organization_id = self.content.organization_id
+        
+        body = self.body_markdown
+        if body:
             # Simple word count (split by whitespace)
-            self.word_count = len(self.body_markdown.split())
+            self.word_count = len(body.split())
+        
+        if self._state.adding and self.delta is None:
+            from .versioning import compress_version
+            compress_version(self)
+        
         super().save(*args, **kwargs)
+        
+        if self.delta is not None:
+            from .versioning import cache_version_body
+            cache_version_body(self, body)
 
 
 # Keep old Version model for backward compatibility
@@ -0,0 +1,150 @@
+"""
+Full-text search and title suggestions with Persian normalization.
+
+Content.search_vector is a generated tsvector column over the normalized
+title and body, kept up to date by PostgreSQL and indexed with GIN. Text
+and queries go through the same normalization, once in SQL for the column
+and once in Python for the query:
+
+- Arabic ي/ى/ك become Persian ی/ک
+- Persian and Arabic-Indic digits become ASCII digits
+- ZWNJ, ZWJ, tatweel and diacritics are dropped, so می‌خواهم, میخواهم
+  and مي‌خواهم all index and search the same
+
+Title suggestions match substrings of the normalized, uppercased titles of
+contents, prompts and projects through pg_trgm GIN expression indexes.
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Func, Q, Value, TextField
+from django.db.models.functions import Upper
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+# PostgreSQL has no Persian stemmer, so words are only lowercased
+SEARCH_CONFIG = 'simple'
+
+# Shorter terms have no trigram to look up, so they would scan every title
+SUGGEST_MIN_LENGTH = 3
+
+# Characters replaced by the character at the same position in NORMALIZED_TO
+NORMALIZED_FROM = 'يىك' + ''.join(map(chr, range(0x06f0, 0x06fa))) + ''.join(map(chr, range(0x0660, 0x066a)))
+NORMALIZED_TO = 'ییک' + '0123456789' * 2
+# Characters dropped: ZWNJ, ZWJ, tatweel, harakat and superscript alef
+DROPPED = '\u200c\u200d\u0640' + ''.join(map(chr, range(0x064b, 0x0653))) + '\u0670'
+
+_TRANSLATION = str.maketrans(NORMALIZED_FROM, NORMALIZED_TO, DROPPED)
+
+
+def normalize_persian(text: str) -> str:
+    """
+    Normalize Persian text for search.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Text normalized the same way as the indexed content
+    """
+    return text.translate(_TRANSLATION) if text else text
+
+
+class NormalizePersian(Func):
+    """SQL counterpart of normalize_persian(), immutable so it can back a generated column."""
+
+    function = 'TRANSLATE'
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value(NORMALIZED_FROM + DROPPED), Value(NORMALIZED_TO), **extra)
+
+
+class ContentSearchFilter(SearchFilter):
+    """
+    Search contents with the full-text index instead of ILIKE.
+
+    Takes a web search style query (quoted phrases, OR, -word) in the usual
+    search parameter. Results are annotated with search_rank, title matches
+    weighing more than body matches, and search_headline, a snippet of the
+    body with matches in <mark>. Without an explicit ordering they are
+    ordered by rank. Must come after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = normalize_persian(request.query_params.get(self.search_param, '')).strip()
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            search_headline=SearchHeadline(
+                NormalizePersian('body'),
+                query,
+                config=SEARCH_CONFIG,
+                start_sel='<mark>',
+                stop_sel='</mark>',
+                max_fragments=2
+            )
+        )
+
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
+
+
+def trigram_index_expression(field: str) -> Upper:
+    """
+    Expression indexed with gin_trgm_ops for title suggestions.
+
+    Args:
+        field: Title field name
+
+    Returns:
+        Expression that icontains lookups on NormalizePersian(field) use
+    """
+    return Upper(NormalizePersian(field))
+
+
+def suggest_titles(user, query: str, limit: int = 10, workspace_id=None) -> dict:
+    """
+    Suggest contents, prompts and projects whose title contains the query.
+
+    Args:
+        user: User whose workspaces are searched
+        query: Typed text
+        limit: Maximum suggestions of each kind
+        workspace_id: Optional workspace to narrow the search to
+
+    Returns:
+        Dict with contents, prompts and projects lists, most similar first
+    """
+    from accounts.models import Workspace
+    from .models import Content, Project, Prompt
+
+    term = normalize_persian(query).strip()
+    if len(term) < SUGGEST_MIN_LENGTH:
+        return {'contents': [], 'prompts': [], 'projects': []}
+
+    workspaces = Workspace.objects.filter(organization__members__user=user)
+    if workspace_id is not None:
+        workspaces = workspaces.filter(id=workspace_id)
+    workspace_ids = list(workspaces.values_list('id', flat=True))
+
+    def top(queryset, field, *fields):
+        return list(
+            queryset.annotate(normalized_title=NormalizePersian(field))
+            .filter(normalized_title__icontains=term)
+            .annotate(similarity=TrigramSimilarity('normalized_title', term))
+            .order_by('-similarity', field)
+            .values('id', field, *fields)[:limit]
+        )
+
+    return {
+        'contents': top(
+            Content.objects.filter(project__workspace_id__in=workspace_ids), 'title', 'project', 'status'
+        ),
+        'prompts': top(
+            Prompt.objects.filter(Q(workspace_id__in=workspace_ids) | Q(is_public=True)), 'title', 'workspace'
+        ),
+        'projects': top(Project.objects.filter(workspace_id__in=workspace_ids), 'name', 'workspace'),
+    }
@@ -2,6 +2,7 @@
 Serializers for content management.
 """
 from rest_framework import serializers
+from accounts.tenancy import check_member_organization
 from .models import Project, Prompt, Content, Version, ContentVersion
 
 
@@ -21,8 +22,13 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
     
+    def validate_workspace(self, value):
+        return check_member_organization(value, self.context['request'])
+    
     def get_content_count(self, obj):
-        return obj.contents.count()
+        # Annotated by ProjectViewSet
+        count = getattr(obj, 'content_count', None)
+        return obj.contents.count() if count is None else count
 
 
 class PromptSerializer(serializers.ModelSerializer):
@@ -39,6 +45,9 @@ class PromptSerializer(serializers.ModelSerializer):
             'created_by', 'created_by_name', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_by', 'usage_count', 'created_at', 'updated_at']
+    
+    def validate_workspace(self, value):
+        return check_member_organization(value, self.context['request'])
 
 
 class ContentSerializer(serializers.ModelSerializer):
@@ -62,18 +71,31 @@ class ContentSerializer(serializers.ModelSerializer):
             'id', 'created_by', 'word_count', 'has_pii', 'pii_warnings',
             'metadata', 'created_at', 'updated_at', 'approved_at'
         ]
+    
+    def validate_project(self, value):
+        return check_member_organization(value, self.context['request'])
+    
+    def validate_prompt(self, value):
+        # Public prompts of other organizations can be used, like they can be read
+        if value is not None and value.is_public:
+            return value
+        return check_member_organization(value, self.context['request'])
 
 
 class ContentListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for content list."""
     
     project_name = serializers.CharField(source='project.name', read_only=True)
+    # Only present in search results
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True)
     
     class Meta:
         model = Content
         fields = [
             'id', 'title', 'status', 'project', 'project_name',
-            'word_count', 'has_pii', 'created_at', 'updated_at'
+            'word_count', 'has_pii', 'created_at', 'updated_at',
+            'search_rank', 'search_headline'
         ]
 
 
@@ -91,6 +113,21 @@ class ContentVersionSerializer(serializers.ModelSerializer):
             'ai_job', 'created_by', 'created_by_name', 'created_at'
         ]
         read_only_fields = ['id', 'version_number', 'word_count', 'created_by', 'created_at']
+        # Model fields read by the body_markdown property, for sparse fieldsets
+        field_sources = {'body_markdown': ['stored_body', 'delta', 'version_number']}
+
+
+class ContentVersionListSerializer(ContentVersionSerializer):
+    """Serializer for version lists, with body and metadata only when included."""
+    
+    # ?include= names of the fields left out by default
+    OPTIONAL_FIELDS = {'body': 'body_markdown', 'metadata': 'metadata'}
+    
+    def __init__(self, *args, include=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field_name in self.OPTIONAL_FIELDS.items():
+            if name not in include:
+                self.fields.pop(field_name)
 
 
 class VersionSerializer(serializers.ModelSerializer):
@@ -158,3 +195,47 @@ class GenerateContentSerializer(serializers.Serializer):
         allow_blank=True,
         help_text='Any additional instructions for the AI'
     )
+    stream = serializers.BooleanField(
+        required=False,
+        help_text='Stream the completion and publish partial output while generating'
+    )
+    use_cache = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text='Reuse a cached generation for an identical prompt'
+    )
+    execution_mode = serializers.ChoiceField(
+        choices=['realtime', 'batch'],
+        required=False,
+        default='realtime',
+        help_text='Run now, or queue for the cheaper offline batch API'
+    )
+    dry_run = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text='Only estimate tokens and cost, without queueing the job'
+    )
+    
+    def validate(self, attrs):
+        if attrs.get('execution_mode') == 'batch' and attrs.get('stream'):
+            raise serializers.ValidationError({'stream': 'Streaming is not available in batch mode'})
+        return attrs
+
+
+class BulkGenerateContentSerializer(GenerateContentSerializer):
+    """Serializer for bulk content generation over a project."""
+    
+    content_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text='Contents to generate; defaults to every content in the project not already in progress'
+    )
+
+
+class SearchSuggestQuerySerializer(serializers.Serializer):
+    """Serializer for title suggestion query params."""
+    
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=50)
+    workspace_id = serializers.IntegerField(required=False)
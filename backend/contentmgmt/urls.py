@@ -14,5 +14,6 @@ router.register(r'content-versions', views.ContentVersionViewSet, basename='cont
 router.register(r'versions', views.VersionViewSet, basename='version')
 
 urlpatterns = [
+    path('search/suggest/', views.search_suggest, name='search-suggest'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,329 @@
+"""
+Delta-compressed storage of content version bodies.
+
+With CONTENT_VERSION_STORAGE = 'delta', a new version stores its body as a
+word-level diff against the previous version of the same content. Every
+CONTENT_VERSION_SNAPSHOT_INTERVAL versions, and whenever the diff would not
+be smaller than the body (e.g. a full regeneration), the full body is
+stored instead, so rebuilding a body never applies more than interval - 1
+diffs. ContentVersion.body_markdown rebuilds bodies transparently, and as
+versions never change once written, rebuilt bodies are cached.
+"""
+import difflib
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery
+
+from .models import ContentVersion
+
+# Words and the whitespace between them, so joining the tokens gives the text back
+TOKEN = re.compile(r'\s+|\S+')
+
+CACHE_KEY = 'content_version_body:{}'
+
+
+def make_delta(base: str, text: str) -> list:
+    """
+    Diff two bodies word by word.
+
+    Args:
+        base: Body of the previous version
+        text: Body of the new version
+
+    Returns:
+        List of [start, end, replacement] edits replacing base tokens
+        start:end with the replacement text, in order
+    """
+    base_tokens = TOKEN.findall(base or '')
+    tokens = TOKEN.findall(text or '')
+    matcher = difflib.SequenceMatcher(None, base_tokens, tokens)
+    return [
+        [i1, i2, ''.join(tokens[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def apply_delta(base: str, delta: list) -> str:
+    """
+    Rebuild a body from the previous body and a delta from make_delta().
+
+    Args:
+        base: Body of the previous version
+        delta: Edits against base
+
+    Returns:
+        Body of the new version
+    """
+    base_tokens = TOKEN.findall(base or '')
+    parts = []
+    position = 0
+    for start, end, replacement in delta:
+        parts.extend(base_tokens[position:start])
+        parts.append(replacement)
+        position = end
+    parts.extend(base_tokens[position:])
+    return ''.join(parts)
+
+
+def encode_body(base: str, text: str):
+    """
+    Diff a body against its base if the diff is smaller than the body.
+
+    Returns:
+        Delta from make_delta(), or None to store the full body
+    """
+    if not text:
+        return None
+    delta = make_delta(base, text)
+    if len(json.dumps(delta, ensure_ascii=False)) >= len(text):
+        return None
+    return delta
+
+
+def _load_chain(content_id, before):
+    """
+    Load the versions of a content from its last snapshot up to a version.
+
+    Args:
+        content_id: Content ID
+        before: Version number the chain stops before
+
+    Returns:
+        List of (id, stored_body, delta) in version order, starting with a
+        full snapshot, or an empty list if there are no earlier versions
+    """
+    snapshot = ContentVersion.objects.filter(
+        content_id=content_id, version_number__lt=before, delta__isnull=True
+    ).order_by('-version_number').values('version_number')[:1]
+
+    return list(
+        ContentVersion.objects.filter(
+            content_id=content_id, version_number__lt=before, version_number__gte=Subquery(snapshot)
+        ).order_by('version_number').values_list('id', 'stored_body', 'delta')
+    )
+
+
+def _rebuild_chain(chain) -> str:
+    """Rebuild the body at the end of a chain, starting from the latest cached body."""
+    keys = [CACHE_KEY.format(version_id) for version_id, _, delta in chain if delta is not None]
+    cached = cache.get_many(keys) if keys else {}
+
+    start = 0
+    body = ''
+    for index in range(len(chain) - 1, -1, -1):
+        version_id, stored_body, delta = chain[index]
+        if delta is None:
+            body = stored_body
+        elif CACHE_KEY.format(version_id) in cached:
+            body = cached[CACHE_KEY.format(version_id)]
+        else:
+            continue
+        start = index + 1
+        break
+
+    for _, stored_body, delta in chain[start:]:
+        body = stored_body if delta is None else apply_delta(body, delta)
+    return body
+
+
+def cache_version_body(version, body: str):
+    """Cache the rebuilt body of a delta version."""
+    cache.set(CACHE_KEY.format(version.id), body, getattr(settings, 'CONTENT_VERSION_CACHE_TTL', 3600))
+
+
+def get_version_body(version) -> str:
+    """
+    Get the full body of a version, rebuilding it from its delta chain.
+
+    Args:
+        version: ContentVersion instance
+
+    Returns:
+        Body markdown
+    """
+    if version.delta is None:
+        return version.stored_body
+
+    body = cache.get(CACHE_KEY.format(version.id))
+    if body is None:
+        base = _rebuild_chain(_load_chain(version.content_id, version.version_number))
+        body = apply_delta(base, version.delta)
+        cache_version_body(version, body)
+    return body
+
+
+def compress_version(version):
+    """
+    Store a new version as a delta against the previous version when due.
+
+    Does nothing unless CONTENT_VERSION_STORAGE is 'delta'. The version keeps
+    its full body when it is the first one, a snapshot is due or the delta
+    would not be smaller.
+
+    Args:
+        version: Unsaved ContentVersion with its full body in stored_body
+    """
+    if getattr(settings, 'CONTENT_VERSION_STORAGE', 'full') != 'delta':
+        return
+
+    chain = _load_chain(version.content_id, version.version_number)
+    interval = getattr(settings, 'CONTENT_VERSION_SNAPSHOT_INTERVAL', 10)
+    if not chain or len(chain) >= interval:
+        return
+
+    delta = encode_body(_rebuild_chain(chain), version.stored_body)
+    if delta is not None:
+        version.delta = delta
+        version.base_version_id = chain[-1][0]
+        version.stored_body = ''
+
+
+def fill_version_bodies(versions):
+    """
+    Rebuild the bodies of loaded versions in memory.
+
+    A delta version whose base is also in versions is rebuilt without
+    queries, so listing a content's history costs no query per version.
+    Others are left to rebuild on access.
+
+    Args:
+        versions: ContentVersion instances
+    """
+    by_id = {version.id: version for version in versions}
+    for version in sorted(versions, key=lambda version: (version.content_id, version.version_number)):
+        if version.delta is None or version._body_markdown is not None:
+            continue
+        base = by_id.get(version.base_version_id)
+        if base is not None:
+            version._body_markdown = apply_delta(base.body_markdown, version.delta)
+
+
+def stored_size(version) -> int:
+    """Characters a version stores for its body."""
+    return len(version.stored_body) + (len(json.dumps(version.delta, ensure_ascii=False)) if version.delta else 0)
+
+
+def repack_versions(versions, storage: str, interval: int) -> list:
+    """
+    Re-encode the loaded history of contents for a storage mode.
+
+    Args:
+        versions: Every ContentVersion of some contents
+        storage: 'delta' or 'full'
+        interval: Versions per full snapshot
+
+    Returns:
+        Versions whose stored_body, delta or base_version changed
+    """
+    fill_version_bodies(versions)
+
+    changed = []
+    previous = None
+    chain_length = 0
+    for version in sorted(versions, key=lambda version: (version.content_id, version.version_number)):
+        body = version.body_markdown
+        if previous is not None and previous.content_id != version.content_id:
+            previous = None
+
+        delta = None
+        if storage == 'delta' and previous is not None and chain_length < interval:
+            delta = encode_body(previous.body_markdown, body)
+        base_version_id = previous.id if delta is not None else None
+        stored_body = '' if delta is not None else body
+
+        if (version.stored_body, version.delta, version.base_version_id) != (stored_body, delta, base_version_id):
+            version.stored_body = stored_body
+            version.delta = delta
+            version.base_version_id = base_version_id
+            changed.append(version)
+
+        chain_length = chain_length + 1 if delta is not None else 1
+        previous = version
+    return changed
+
+
+def diff_bodies(old: str, new: str, context: int = 5) -> dict:
+    """
+    Word-level diff of two bodies, with a few words of context per change.
+
+    Words keep their ZWNJ and attached Markdown markers, so RTL text and
+    formatting changes show up as whole-word changes.
+
+    Args:
+        old: Body diffed from
+        new: Body diffed to
+        context: Words of unchanged text kept before and after each change
+
+    Returns:
+        Dict with changes, each with op (insert, delete or replace), the line
+        of old it starts on, old and new text, and before and after context,
+        and stats counting words added and removed
+    """
+    old_tokens = TOKEN.findall(old or '')
+    new_tokens = TOKEN.findall(new or '')
+
+    changes = []
+    stats = {'words_added': 0, 'words_removed': 0}
+    line = 1
+    position = 0
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        line += sum(token.count('\n') for token in old_tokens[position:i1])
+        position = i1
+        removed = old_tokens[i1:i2]
+        added = new_tokens[j1:j2]
+        stats['words_removed'] += sum(1 for token in removed if not token.isspace())
+        stats['words_added'] += sum(1 for token in added if not token.isspace())
+        changes.append({
+            'op': tag,
+            'line': line,
+            'old': ''.join(removed),
+            'new': ''.join(added),
+            'before': ''.join(old_tokens[_context_start(old_tokens, i1, context):i1]),
+            'after': ''.join(old_tokens[i2:_context_end(old_tokens, i2, context)]),
+        })
+
+    return {'changes': changes, 'stats': stats}
+
+
+def _context_start(tokens, start, words):
+    """Index of the token starting the last words words before start."""
+    while start > 0 and words > 0:
+        start -= 1
+        if not tokens[start].isspace():
+            words -= 1
+    return start
+
+
+def _context_end(tokens, end, words):
+    """Index of the token ending the first words words from end."""
+    while end < len(tokens) and words > 0:
+        if not tokens[end].isspace():
+            words -= 1
+        end += 1
+    return end
+
+
+def diff_versions(old_version, new_version, context: int = 5) -> dict:
+    """
+    Diff two versions, cached by the version pair.
+
+    Args:
+        old_version: ContentVersion diffed from
+        new_version: ContentVersion diffed to
+        context: Words of context per change
+
+    Returns:
+        Result of diff_bodies()
+    """
+    key = f'content_version_diff:{old_version.id}:{new_version.id}:{context}'
+    diff = cache.get(key)
+    if diff is None:
+        diff = diff_bodies(old_version.body_markdown, new_version.body_markdown, context)
+        cache.set(key, diff, getattr(settings, 'CONTENT_VERSION_DIFF_CACHE_TTL', 24 * 3600))
+    return diff
@@ -2,30 +2,42 @@
 Views for content management.
 """
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action, api_view
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 import logging
 
 from .models import Project, Prompt, Content, Version, ContentVersion
+from .search import ContentSearchFilter, suggest_titles
 from .serializers import (
     ProjectSerializer, PromptSerializer,
     ContentSerializer, ContentListSerializer, 
-    VersionSerializer, ContentVersionSerializer,
-    GenerateContentSerializer
+    VersionSerializer, ContentVersionSerializer, ContentVersionListSerializer,
+    GenerateContentSerializer, BulkGenerateContentSerializer,
+    SearchSuggestQuerySerializer
 )
-from ai.models import AiJob, AuditLog
+from accounts.tenancy import TenantScopedMixin, get_member_organization_ids
+from core.counts import AnnotatedCountsMixin, count_related
+from core.fieldsets import SparseFieldsetsMixin
+from core.pagination import KeysetPagination
+from ai.models import AiJob, AiJobBatch, AuditLog, BudgetReservation
 
 logger = logging.getLogger(__name__)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    """ViewSet for Project CRUD."""
+class ProjectViewSet(TenantScopedMixin, SparseFieldsetsMixin, AnnotatedCountsMixin, viewsets.ModelViewSet):
+    """ViewSet for Project CRUD. ?counts=false leaves out the counts."""
     
     queryset = Project.objects.select_related('workspace', 'created_by')
+    count_annotations = {
+        'content_count': count_related(Content.objects.all(), 'project'),
+    }
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -33,12 +45,174 @@ class ProjectViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'slug', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
+    tenant_field = 'workspace__organization'
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+    
+    @action(detail=True, methods=['post'], url_path='generate-bulk')
+    def generate_bulk(self, request, pk=None):
+        """
+        Queue AI generation for many contents of a project in one request.
+        
+        POST /api/projects/:id/generate-bulk/
+        {
+            "kind": "caption",
+            "content_ids": [1, 2, 3],
+            "tone": "دوستانه"
+        }
+        
+        The budget is checked and the estimated cost reserved once, jobs
+        and audit logs are bulk-inserted and the tasks are enqueued as one
+        Celery group (or left for the batch API with "execution_mode":
+        "batch"). "dry_run": true only returns the estimate. Progress is
+        exposed at /api/ai/job-batches/:batch_id/.
+        """
+        project = self.get_object()
+        serializer = BulkGenerateContentSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = dict(serializer.validated_data)
+        content_ids = params.pop('content_ids', None)
+        dry_run = params.pop('dry_run')
+        
+        contents = project.contents.only('id', 'project_id', 'title', 'status')
+        if content_ids is not None:
+            contents = contents.filter(id__in=content_ids)
+        else:
+            contents = contents.exclude(status=Content.Status.IN_PROGRESS)
+        contents = list(contents)
+        
+        if not contents:
+            return Response(
+                {'error': 'No contents to generate'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_items = getattr(settings, 'AI_BULK_GENERATE_MAX_ITEMS', 500)
+        if len(contents) > max_items:
+            return Response(
+                {'error': f'Too many contents in one request: {len(contents)}/{max_items}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        workspace = project.workspace
+        
+        # Check user, workspace and organization limits once for the whole batch
+        from ai.services import evaluate_usage_limits
+        limits_ok, limits_message, limit_scope = evaluate_usage_limits(
+            user=request.user, workspace=workspace
+        )
+        
+        if not limits_ok:
+            return Response(
+                {
+                    'error': 'Usage limit exceeded',
+                    'detail': limits_message,
+                    'scope': limit_scope
+                },
+                status=status.HTTP_402_PAYMENT_REQUIRED
+            )
+        
+        from ai.estimation import estimate_generation_cost
+        from ai.services import get_workspace_budget_status, reserve_workspace_budget
+        estimates = [estimate_generation_cost(content, params) for content in contents]
+        
+        if dry_run:
+            return Response({
+                'total_jobs': len(contents),
+                'estimate': {
+                    'prompt_tokens': sum(estimate['prompt_tokens'] for estimate in estimates),
+                    'completion_tokens': sum(estimate['completion_tokens'] for estimate in estimates),
+                    'estimated_cost': sum(estimate['estimated_cost'] for estimate in estimates),
+                },
+                'budget': get_workspace_budget_status(workspace)
+            })
+        
+        ip_address = request.META.get('REMOTE_ADDR')
+        user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
+        
+        with transaction.atomic():
+            reservations, reserve_message = reserve_workspace_budget(workspace, estimates)
+            
+            if reservations is None:
+                return Response(
+                    {
+                        'error': 'Usage limit exceeded',
+                        'detail': reserve_message
+                    },
+                    status=status.HTTP_402_PAYMENT_REQUIRED
+                )
+            
+            batch = AiJobBatch.objects.create(
+                project=project,
+                workspace=workspace,
+                user=request.user,
+                kind=params['kind'],
+                params=params,
+                total_jobs=len(contents)
+            )
+            
+            jobs = AiJob.objects.bulk_create([
+                AiJob(
+                    content=content,
+                    user=request.user,
+                    workspace=workspace,
+                    organization_id=workspace.organization_id,
+                    batch=batch,
+                    kind=params['kind'],
+                    params=params,
+                    execution_mode=params['execution_mode'],
+                    status=AiJob.Status.PENDING
+                )
+                for content in contents
+            ])
+            
+            for reservation, job in zip(reservations, jobs):
+                reservation.ai_job = job
+            BudgetReservation.objects.bulk_update(reservations, ['ai_job'])
+            
+            Content.objects.filter(id__in=[content.id for content in contents]).update(
+                status=Content.Status.IN_PROGRESS,
+                updated_at=timezone.now()
+            )
+            
+            AuditLog.objects.bulk_create([
+                AuditLog(
+                    content=content,
+                    user=request.user,
+                    action=AuditLog.Action.STATUS_CHANGED,
+                    old_status=content.status,
+                    new_status=Content.Status.IN_PROGRESS,
+                    changes={'job_id': job.id, 'batch_id': batch.id},
+                    notes=f"AI bulk generation job created: {params['kind']}",
+                    ip_address=ip_address,
+                    user_agent=user_agent
+                )
+                for content, job in zip(contents, jobs)
+            ])
+        
+        # Batch-mode jobs are picked up by the submit_batch_jobs beat task,
+        # everything else is queued as one group
+        if params['execution_mode'] != AiJob.ExecutionMode.BATCH:
+            from celery import group
+            from ai.tasks import generate_content_task
+            
+            result = group(
+                generate_content_task.s(job.content_id, params, job.id) for job in jobs
+            ).apply_async()
+            batch.group_id = result.id
+            batch.save(update_fields=['group_id', 'updated_at'])
+        
+        logger.info(f"Bulk generation batch {batch.id} queued {len(jobs)} jobs for project {project.id}")
+        
+        from ai.serializers import AiJobBatchSerializer
+        return Response(AiJobBatchSerializer(batch).data, status=status.HTTP_202_ACCEPTED)
 
 
-class PromptViewSet(viewsets.ModelViewSet):
+class PromptViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     """ViewSet for Prompt CRUD."""
     
     queryset = Prompt.objects.select_related('workspace', 'created_by')
@@ -50,20 +224,27 @@ class PromptViewSet(viewsets.ModelViewSet):
     ordering_fields = ['title', 'usage_count', 'created_at']
     ordering = ['-usage_count', '-created_at']
     
+    def get_queryset(self):
+        """Prompts of the caller's organizations, and public prompts for reading."""
+        tenant = Q(workspace__organization__in=get_member_organization_ids(self.request.user, self.request))
+        if self.request.method in SAFE_METHODS:
+            tenant |= Q(is_public=True)
+        return super().get_queryset().filter(tenant)
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class ContentViewSet(viewsets.ModelViewSet):
+class ContentViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ModelViewSet):
     """ViewSet for Content CRUD."""
     
     queryset = Content.objects.select_related(
         'project', 'prompt', 'created_by', 'approved_by'
     )
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ContentSearchFilter]
     filterset_fields = ['project', 'status', 'has_pii']
-    search_fields = ['title', 'body']
     ordering_fields = ['title', 'created_at', 'updated_at']
     ordering = ['-created_at']
     
@@ -99,6 +280,13 @@ class ContentViewSet(viewsets.ModelViewSet):
             "keywords": "هوش مصنوعی، نوآوری، کسب‌وکار",
             "min_words": 800
         }
+        
+        With "execution_mode": "batch" the job waits for the next provider
+        batch instead of running immediately. With "dry_run": true only the
+        token and cost estimate is returned.
+        
+        The estimated cost is reserved against the workspace budget and
+        settled with the actual cost once the job logs its usage.
         """
         content = self.get_object()
         serializer = GenerateContentSerializer(data=request.data)
@@ -106,33 +294,65 @@ class ContentViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        params = serializer.validated_data
+        params = dict(serializer.validated_data)
+        dry_run = params.pop('dry_run')
         
         # Get workspace from content's project
         workspace = content.project.workspace
         
-        # Check usage limits before creating job
-        from ai.services import check_workspace_usage_limits
-        limits_ok, limits_message = check_workspace_usage_limits(workspace)
+        # Check user, workspace and organization limits before creating job
+        from ai.services import evaluate_usage_limits
+        limits_ok, limits_message, limit_scope = evaluate_usage_limits(
+            user=request.user, workspace=workspace
+        )
         
         if not limits_ok:
             return Response(
                 {
                     'error': 'Usage limit exceeded',
-                    'detail': limits_message
+                    'detail': limits_message,
+                    'scope': limit_scope
                 },
                 status=status.HTTP_402_PAYMENT_REQUIRED
             )
         
-        # Create AI job
-        job = AiJob.objects.create(
-            content=content,
-            user=request.user,
-            workspace=workspace,
-            kind=params['kind'],
-            params=params,
-            status=AiJob.Status.PENDING
-        )
+        from ai.estimation import estimate_generation_cost
+        from ai.services import get_workspace_budget_status, reserve_workspace_budget
+        estimate = estimate_generation_cost(content, params)
+        
+        if dry_run:
+            return Response({
+                'estimate': estimate,
+                'budget': get_workspace_budget_status(workspace)
+            })
+        
+        with transaction.atomic():
+            # Hold the estimated cost until the task logs the actual usage
+            reservations, reserve_message = reserve_workspace_budget(workspace, [estimate])
+            
+            if reservations is None:
+                return Response(
+                    {
+                        'error': 'Usage limit exceeded',
+                        'detail': reserve_message
+                    },
+                    status=status.HTTP_402_PAYMENT_REQUIRED
+                )
+            
+            # Create AI job
+            job = AiJob.objects.create(
+                content=content,
+                user=request.user,
+                workspace=workspace,
+                kind=params['kind'],
+                params=params,
+                execution_mode=params['execution_mode'],
+                status=AiJob.Status.PENDING
+            )
+            
+            reservation = reservations[0]
+            reservation.ai_job = job
+            reservation.save(update_fields=['ai_job'])
         
         # Update content status to in_progress
         old_status = content.status
@@ -152,30 +372,109 @@ class ContentViewSet(viewsets.ModelViewSet):
             user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
         )
         
-        # Queue the task
-        from ai.tasks import generate_content_task
-        generate_content_task.delay(content.id, params, job.id)
+        if job.execution_mode == AiJob.ExecutionMode.BATCH:
+            # Picked up by the submit_batch_jobs beat task
+            message = 'Content generation scheduled for batch processing'
+        else:
+            # Queue the task
+            from ai.tasks import generate_content_task
+            generate_content_task.delay(content.id, params, job.id)
+            message = 'Content generation started'
         
         logger.info(f"Content generation job {job.id} queued for content {content.id}")
         
         return Response({
             'job_id': job.id,
             'status': job.status,
-            'message': 'Content generation started',
+            'message': message,
             'content': ContentSerializer(content).data
         }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def versions(self, request, pk=None):
         """
-        Get all versions for a content.
+        List the versions of a content, newest first, paginated.
         
-        GET /api/contents/:id/versions/
+        GET /api/contents/:id/versions/?include=body,metadata
+        
+        Query params:
+            - include: Comma-separated 'body' and/or 'metadata' to include
+              body_markdown and metadata, left out by default
+        
+        Single versions with their body are at /api/content-versions/:id/.
         """
+        from .versioning import fill_version_bodies
+        
         content = self.get_object()
-        versions = content.versions.all()
-        serializer = ContentVersionSerializer(versions, many=True)
-        return Response(serializer.data)
+        include = set(request.query_params.get('include', '').split(','))
+        
+        versions = content.versions.select_related('created_by')
+        if 'body' not in include:
+            versions = versions.defer('stored_body', 'delta')
+        if 'metadata' not in include:
+            versions = versions.defer('metadata')
+        
+        page = self.paginate_queryset(versions)
+        if 'body' in include:
+            fill_version_bodies(page)
+        serializer = ContentVersionListSerializer(page, many=True, include=include)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path='versions/diff')
+    def versions_diff(self, request, pk=None):
+        """
+        Get a word-level diff between two versions.
+        
+        GET /api/contents/:id/versions/diff/?from=3&to=5&context=5
+        
+        Query params:
+            - from: Version number diffed from
+            - to: Version number diffed to
+            - context: Words of unchanged text around each change (default 5, max 50)
+        
+        Only the changes with their context are returned, not the bodies.
+        Diffs are cached per version pair.
+        """
+        from .versioning import diff_versions
+        
+        content = self.get_object()
+        
+        try:
+            numbers = [int(request.query_params[param]) for param in ('from', 'to')]
+            context = int(request.query_params.get('context', 5))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'from and to must be version numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not 0 <= context <= 50:
+            return Response(
+                {'error': 'context must be between 0 and 50'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Bodies are only loaded when the diff isn't cached
+        versions = {
+            version.version_number: version
+            for version in content.versions.filter(version_number__in=numbers).defer('stored_body')
+        }
+        missing = [number for number in numbers if number not in versions]
+        if missing:
+            return Response(
+                {'error': f'Version {missing[0]} not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        old_version, new_version = versions[numbers[0]], versions[numbers[1]]
+        diff = diff_versions(old_version, new_version, context)
+        
+        return Response({
+            'content': content.id,
+            'from': {'id': old_version.id, 'version_number': old_version.version_number},
+            'to': {'id': new_version.id, 'version_number': new_version.version_number},
+            **diff
+        })
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -246,7 +545,7 @@ class ContentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ContentVersionViewSet(viewsets.ReadOnlyModelViewSet):
+class ContentVersionViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for ContentVersion (read-only)."""
     
     queryset = ContentVersion.objects.select_related('content', 'created_by', 'ai_job')
@@ -256,9 +555,17 @@ class ContentVersionViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['content', 'ai_job']
     ordering_fields = ['version_number', 'created_at']
     ordering = ['-version_number']
+    
+    def paginate_queryset(self, queryset):
+        from .versioning import fill_version_bodies
+        
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.get_requested_fields(['body_markdown']):
+            fill_version_bodies(page)
+        return page
 
 
-class VersionViewSet(viewsets.ReadOnlyModelViewSet):
+class VersionViewSet(TenantScopedMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for legacy Version (read-only)."""
     
     queryset = Version.objects.select_related('content', 'created_by')
@@ -268,3 +575,33 @@ class VersionViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['content']
     ordering_fields = ['version_number', 'created_at']
     ordering = ['-version_number']
+    tenant_field = 'content__organization'
+
+
+@api_view(['GET'])
+def search_suggest(request):
+    """
+    Suggest content, prompt and project titles as the user types.
+    
+    GET /api/search/suggest/?q=بازار&limit=5
+    
+    Query params:
+        - q: Typed text, matched anywhere in the title; fewer than 3
+          characters returns no suggestions
+        - limit: Maximum suggestions of each kind (default 10, max 50)
+        - workspace_id: Only suggest from this workspace
+    
+    Only the caller's workspaces (and public prompts) are searched.
+    """
+    query = SearchSuggestQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    
+    suggestions = suggest_titles(
+        request.user,
+        params['q'],
+        limit=params['limit'],
+        workspace_id=params.get('workspace_id')
+    )
+    
+    return Response({'query': params['q'], **suggestions})
@@ -0,0 +1,13 @@
+"""
+ASGI config for Contexor project.
+
+Served by gunicorn with uvicorn workers so long-lived streaming responses
+(Server-Sent Events) don't tie up a worker process per connection.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+application = get_asgi_application()
@@ -4,6 +4,7 @@ Celery configuration for Contexor project.
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_shutting_down
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -27,8 +28,39 @@ app.conf.beat_schedule = {
         'task': 'ai.tasks.monthly_usage_reset',
         'schedule': crontab(day_of_month='1', hour='0', minute='0'),  # First day of month
     },
+    'flush-usage-log-buffer': {
+        'task': 'ai.tasks.flush_usage_log_buffer',
+        'schedule': float(os.getenv('AI_USAGE_LOG_FLUSH_INTERVAL', '10')),  # Every 10 seconds
+    },
+    'reconcile-usage-counters': {
+        'task': 'ai.tasks.reconcile_usage_counters',
+        'schedule': crontab(minute='*/30'),  # Every 30 minutes
+    },
+    'maintain-log-partitions': {
+        'task': 'ai.tasks.maintain_log_partitions',
+        'schedule': crontab(hour='1', minute='0'),  # Daily at 1 AM
+    },
+    'submit-batch-jobs': {
+        'task': 'ai.tasks.submit_batch_jobs',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+    'poll-batch-jobs': {
+        'task': 'ai.tasks.poll_batch_jobs',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
 }
 
+
+@worker_shutting_down.connect
+def flush_usage_log_buffer_on_shutdown(**kwargs):
+    """Write buffered usage logs before the worker exits."""
+    from django.conf import settings
+    
+    if getattr(settings, 'AI_USAGE_LOG_BUFFERED', False):
+        from ai.usage_writer import flush_usage_log_buffer
+        flush_usage_log_buffer()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,60 @@
+"""
+Related-object counts annotated on list querysets.
+
+Serializers fall back to counting per object when a count isn't annotated
+(e.g. the response to a create), so annotating is purely an optimization.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(queryset, field: str):
+    """
+    Count related rows per outer row as a correlated subquery.
+
+    A subquery per count, rather than Count() over joins, keeps several
+    counts on one queryset from multiplying each other's rows.
+
+    Args:
+        queryset: Related rows to count, already filtered
+        field: Name of the foreign key on queryset's model pointing at the outer row
+
+    Returns:
+        Expression for annotate(), 0 when there are no related rows
+    """
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        count=Count('pk')
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class AnnotatedCountsMixin:
+    """
+    ViewSet mixin annotating the counts its serializer shows.
+
+    count_annotations maps serializer field names to count_related()
+    expressions. ?counts=false leaves the counts out of both the query and
+    the response.
+    """
+
+    count_annotations = {}
+
+    def include_counts(self) -> bool:
+        request = getattr(self, 'request', None)
+        if request is None:
+            return True
+        return request.query_params.get('counts', '').lower() not in ('false', '0', 'no')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_counts():
+            queryset = queryset.annotate(**self.count_annotations)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if not self.include_counts():
+            fields = serializer.child.fields if kwargs.get('many') else serializer.fields
+            for name in self.count_annotations:
+                fields.pop(name, None)
+        return serializer
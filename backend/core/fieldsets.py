@@ -0,0 +1,93 @@
+"""
+Sparse fieldsets for read endpoints.
+
+?fields=id,title returns only the listed fields and ?exclude=body all but
+the listed ones. The fields left out of the response are also left out of
+the query, so large columns (bodies, JSON results) are only read from the
+database when they are returned.
+"""
+
+
+def split_fields(value: str) -> list:
+    """Split a comma-separated query param into field names."""
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetsMixin:
+    """
+    ViewSet mixin for ?fields= and ?exclude= on list and retrieve.
+
+    Model fields no returned serializer field reads are deferred. A field's
+    source is taken to be what it reads; serializers with fields reading
+    other model fields (properties, methods) list them in Meta.field_sources,
+    e.g. {'body_markdown': ['stored_body', 'delta']}.
+    """
+
+    sparse_actions = ('list', 'retrieve')
+
+    def uses_sparse_fieldsets(self) -> bool:
+        return getattr(self, 'request', None) is not None and getattr(self, 'action', None) in self.sparse_actions
+
+    def get_requested_fields(self, field_names) -> list:
+        """
+        Filter serializer field names by ?fields= and ?exclude=.
+
+        Args:
+            field_names: Names of all the serializer's fields
+
+        Returns:
+            Names of the fields to return, in order
+        """
+        if not self.uses_sparse_fieldsets():
+            return list(field_names)
+        only = set(split_fields(self.request.query_params.get('fields', '')))
+        exclude = set(split_fields(self.request.query_params.get('exclude', '')))
+        return [name for name in field_names if (not only or name in only) and name not in exclude]
+
+    def get_deferred_fields(self, model) -> list:
+        """
+        Get the model fields none of the returned serializer fields read.
+
+        Fields the view orders by are kept, as cursor pagination reads them
+        from the rows. Primary keys and relations are never deferred.
+
+        Args:
+            model: Model of the queryset
+
+        Returns:
+            Model field names for defer()
+        """
+        serializer_class = self.get_serializer_class()
+        fields = serializer_class(context=self.get_serializer_context()).fields
+        field_sources = getattr(getattr(serializer_class, 'Meta', None), 'field_sources', {})
+
+        ordering = list(getattr(self, 'ordering', None) or [])
+        ordering += split_fields(self.request.query_params.get('ordering', ''))
+        used = {name.lstrip('-') for name in ordering}
+        for name in self.get_requested_fields(fields):
+            if fields[name].source != '*':
+                used.add(fields[name].source.split('.')[0])
+            used.update(field_sources.get(name, ()))
+
+        return [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in used
+        ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.uses_sparse_fieldsets():
+            deferred = self.get_deferred_fields(queryset.model)
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.uses_sparse_fieldsets():
+            fields = serializer.child.fields if kwargs.get('many') else serializer.fields
+            requested = set(self.get_requested_fields(fields))
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+        return serializer
@@ -0,0 +1,70 @@
+"""
+Keyset pagination for high-volume list endpoints.
+
+Page-number pagination counts every matching row and skips OFFSET rows on
+each page, so deep pages of large tables get slower and slower. A cursor
+instead continues from the last row's position in the view's default
+ordering, which an index on that column turns into an index range scan,
+however deep the page.
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a view's default ordering, with page numbers as fallback.
+
+    List requests are paginated by ?cursor= unless they ask for ?page=,
+    search or order by something other than the view's default ordering,
+    which are paginated by page number as before. Other actions (e.g.
+    detail routes listing related objects) always use page numbers.
+    """
+
+    fallback_class = PageNumberPagination
+
+    def __init__(self):
+        self.fallback = None
+
+    def use_cursor(self, request, view) -> bool:
+        """Whether a request is paginated by cursor rather than page number."""
+        params = request.query_params
+        if getattr(view, 'action', 'list') != 'list' or self.fallback_class.page_query_param in params:
+            return False
+        if params.get(api_settings.SEARCH_PARAM):
+            return False
+        ordering = params.get(api_settings.ORDERING_PARAM)
+        return not ordering or ordering.split(',') == list(getattr(view, 'ordering', None) or [])
+
+    def get_ordering(self, request, queryset, view):
+        """
+        The view's ordering with the primary key as tie-breaker.
+
+        The cursor holds the first ordering field and an offset among rows
+        sharing its value, which only works if those rows keep their order
+        from one page to the next.
+        """
+        ordering = super().get_ordering(request, queryset, view)
+        if not {'pk', 'id'} & {field.lstrip('-') for field in ordering}:
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.fallback = None
+            return super().paginate_queryset(queryset, request, view)
+        self.fallback = self.fallback_class()
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.fallback is not None:
+            return self.fallback.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + self.fallback_class().get_schema_operation_parameters(view)
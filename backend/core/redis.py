@@ -0,0 +1,27 @@
+"""
+Shared Redis connections for features that need more than the cache API
+(pub/sub, counters, streams).
+"""
+from django.conf import settings
+import redis
+import redis.asyncio
+
+_client = None
+
+
+def get_redis_client():
+    """Get the shared synchronous Redis client."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+def get_async_redis_client():
+    """
+    Create an asyncio Redis client.
+
+    A new client is returned on every call because connections can't be
+    shared between event loops; callers must close it with ``aclose()``.
+    """
+    return redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
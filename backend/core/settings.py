@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -72,6 +73,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -238,6 +240,9 @@ OTP_TTL = 300  # 5 minutes
 OTP_MAX_ATTEMPTS = 5
 OTP_RATE_LIMIT = 60  # 1 minute between requests
 
+# Per-user organization role maps used by permission checks
+ORGANIZATION_ROLES_CACHE_TTL = int(os.getenv('ORGANIZATION_ROLES_CACHE_TTL', '3600'))  # 1 hour
+
 # Kavenegar Configuration
 KAVENEGAR_API_KEY = os.getenv('KAVENEGAR_API_KEY', '')
 KAVENEGAR_TEMPLATE = os.getenv('KAVENEGAR_TEMPLATE', 'login-otp')
@@ -265,6 +270,72 @@ AI_WORKSPACE_MONTHLY_BUDGET_USD = float(os.getenv('AI_WORKSPACE_MONTHLY_BUDGET_U
 # User-level budget (overrides default if set)
 AI_USER_MONTHLY_BUDGET_USD = float(os.getenv('AI_USER_MONTHLY_BUDGET_USD', '50.0'))
 
+# Organization-level budget (unlimited unless set)
+AI_ORGANIZATION_MONTHLY_BUDGET_USD = (
+    float(os.getenv('AI_ORGANIZATION_MONTHLY_BUDGET_USD'))
+    if os.getenv('AI_ORGANIZATION_MONTHLY_BUDGET_USD') else None
+)
+
+# AI Streaming Configuration
+AI_STREAMING_ENABLED = os.getenv('AI_STREAMING_ENABLED', 'False') == 'True'
+AI_STREAM_FLUSH_INTERVAL = float(os.getenv('AI_STREAM_FLUSH_INTERVAL', '0.5'))  # seconds between partial writes
+AI_STREAM_PARTIAL_TTL = int(os.getenv('AI_STREAM_PARTIAL_TTL', '3600'))  # 1 hour
+
+# AI Generation Cache (exact-match on the rendered request)
+AI_GENERATION_CACHE_ENABLED = os.getenv('AI_GENERATION_CACHE_ENABLED', 'True') == 'True'
+AI_GENERATION_CACHE_TTL = int(os.getenv('AI_GENERATION_CACHE_TTL', str(7 * 24 * 3600)))  # 7 days
+AI_GENERATION_CACHE_MAX_ENTRIES = int(os.getenv('AI_GENERATION_CACHE_MAX_ENTRIES', '10000'))
+
+# Bulk generation
+AI_BULK_GENERATE_MAX_ITEMS = int(os.getenv('AI_BULK_GENERATE_MAX_ITEMS', '500'))
+
+# Offline batch API execution
+AI_BATCH_BACKEND = os.getenv('AI_BATCH_BACKEND', 'openai')  # openai or local
+AI_BATCH_LOCAL_DIR = os.getenv('AI_BATCH_LOCAL_DIR', str(BASE_DIR / 'batches'))
+AI_BATCH_COMPLETION_WINDOW = os.getenv('AI_BATCH_COMPLETION_WINDOW', '24h')
+AI_BATCH_MAX_REQUESTS = int(os.getenv('AI_BATCH_MAX_REQUESTS', '50000'))
+AI_BATCH_COST_DISCOUNT = float(os.getenv('AI_BATCH_COST_DISCOUNT', '0.5'))
+
+# Real-time usage counters (Redis)
+AI_USAGE_COUNTER_GRACE = int(os.getenv('AI_USAGE_COUNTER_GRACE', str(24 * 3600)))  # kept 1 day past their period
+
+# Buffered usage log writes (Redis stream flushed in bulk)
+AI_USAGE_LOG_BUFFERED = os.getenv('AI_USAGE_LOG_BUFFERED', 'False') == 'True'
+AI_USAGE_LOG_FLUSH_BATCH_SIZE = int(os.getenv('AI_USAGE_LOG_FLUSH_BATCH_SIZE', '1000'))
+AI_USAGE_LOG_FLUSH_MAX_BATCHES = int(os.getenv('AI_USAGE_LOG_FLUSH_MAX_BATCHES', '50'))  # per flush task run
+AI_USAGE_LOG_CLAIM_IDLE = int(os.getenv('AI_USAGE_LOG_CLAIM_IDLE', '60'))  # seconds before a stalled flusher's events are reclaimed
+
+# Monthly partitions of usage_logs and audit_logs
+AI_LOG_PARTITIONS_AHEAD = int(os.getenv('AI_LOG_PARTITIONS_AHEAD', '3'))  # months created in advance
+AI_USAGE_LOG_RETENTION_MONTHS = (
+    int(os.getenv('AI_USAGE_LOG_RETENTION_MONTHS'))
+    if os.getenv('AI_USAGE_LOG_RETENTION_MONTHS') else None
+)  # kept forever unless set
+AI_AUDIT_LOG_RETENTION_MONTHS = (
+    int(os.getenv('AI_AUDIT_LOG_RETENTION_MONTHS'))
+    if os.getenv('AI_AUDIT_LOG_RETENTION_MONTHS') else None
+)  # kept forever unless set
+
+# Usage time-series API
+AI_USAGE_TIMESERIES_DEFAULT_DAYS = int(os.getenv('AI_USAGE_TIMESERIES_DEFAULT_DAYS', '30'))
+AI_USAGE_TIMESERIES_MAX_POINTS = int(os.getenv('AI_USAGE_TIMESERIES_MAX_POINTS', '2000'))
+
+# Pre-flight cost estimation and budget reservations
+AI_ESTIMATE_HISTORY_DAYS = int(os.getenv('AI_ESTIMATE_HISTORY_DAYS', '30'))  # completion stats window
+AI_ESTIMATE_MIN_SAMPLES = int(os.getenv('AI_ESTIMATE_MIN_SAMPLES', '10'))  # below this, assume max_tokens
+AI_ESTIMATE_STATS_TTL = int(os.getenv('AI_ESTIMATE_STATS_TTL', '3600'))  # 1 hour
+AI_BUDGET_RESERVATION_TTL = int(os.getenv('AI_BUDGET_RESERVATION_TTL', str(24 * 3600)))  # 1 day
+
+# Server-Sent Events for AI jobs
+AI_SSE_HEARTBEAT_INTERVAL = int(os.getenv('AI_SSE_HEARTBEAT_INTERVAL', '15'))  # seconds
+AI_SSE_MAX_DURATION = int(os.getenv('AI_SSE_MAX_DURATION', '600'))  # seconds before clients reconnect
+
+# Content version storage: 'full' stores every body, 'delta' stores diffs between snapshots
+CONTENT_VERSION_STORAGE = os.getenv('CONTENT_VERSION_STORAGE', 'full')
+CONTENT_VERSION_SNAPSHOT_INTERVAL = int(os.getenv('CONTENT_VERSION_SNAPSHOT_INTERVAL', '10'))  # versions per full snapshot
+CONTENT_VERSION_CACHE_TTL = int(os.getenv('CONTENT_VERSION_CACHE_TTL', '3600'))  # reconstructed bodies, 1 hour
+CONTENT_VERSION_DIFF_CACHE_TTL = int(os.getenv('CONTENT_VERSION_DIFF_CACHE_TTL', str(24 * 3600)))  # 1 day
+
 # Logging
 LOGGING = {
     'version': 1,
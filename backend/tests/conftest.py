@@ -0,0 +1,33 @@
+"""
+Shared test fixtures.
+"""
+import os
+from urllib.parse import urlsplit
+
+import pytest
+import redis
+
+from core import redis as core_redis
+
+# Redis database the tests own, apart from the broker and cache databases
+REDIS_TEST_DB = int(os.getenv('REDIS_TEST_DB', '15'))
+
+
+@pytest.fixture(autouse=True)
+def isolated_redis(settings, monkeypatch):
+    """
+    Point core.redis at an emptied test database.
+
+    Counters, buffered usage events and job events then start empty in
+    every test, and a test run can't touch live keys.
+    """
+    settings.REDIS_URL = urlsplit(settings.REDIS_URL)._replace(path=f'/{REDIS_TEST_DB}').geturl()
+    client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    monkeypatch.setattr(core_redis, '_client', client)
+    try:
+        client.flushdb()
+    except redis.ConnectionError:
+        # Tests that need Redis fail on their own
+        pass
+    yield client
+    client.close()
@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from accounts.models import Organization, Workspace
+from accounts.models import Organization, OrganizationMember, Workspace
 from contentmgmt.models import Project, Content, Prompt
 from ai.models import AuditLog
 
@@ -29,6 +29,11 @@ class AuditLogTestCase(TestCase):
             name='Test Org',
             slug='test-org'
         )
+        OrganizationMember.objects.create(
+            user=self.user,
+            organization=self.org,
+            role=OrganizationMember.Role.ADMIN
+        )
         self.workspace = Workspace.objects.create(
             organization=self.org,
             name='Test Workspace',
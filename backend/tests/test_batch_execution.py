@@ -0,0 +1,143 @@
+"""
+Tests for offline batch API execution.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from ai.models import AiJob, ProviderBatch, UsageLog
+from ai.batch import LocalBatchBackend, parse_custom_id
+from ai.tasks import submit_batch_jobs, poll_batch_jobs
+
+
+def respond(body):
+    """Answer a batch request like the chat completions endpoint."""
+    topic = body['messages'][1]['content'].splitlines()[0]
+    if 'خطا' in topic:
+        raise RuntimeError('model overloaded')
+    return {
+        'object': 'chat.completion',
+        'model': body['model'],
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': f'# {topic}'}}],
+        'usage': {'prompt_tokens': 1000, 'completion_tokens': 2000, 'total_tokens': 3000},
+    }
+
+
+@pytest.fixture(autouse=True)
+def local_backend(settings, tmp_path):
+    """Submit batches to a local directory."""
+    settings.AI_BATCH_BACKEND = 'local'
+    settings.AI_BATCH_LOCAL_DIR = str(tmp_path)
+    settings.OPENAI_DEFAULT_MODEL = 'gpt-4o-mini'
+    return LocalBatchBackend()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def project(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    return Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+
+
+def create_batch_job(project, user, topic):
+    content = Content.objects.create(
+        title=topic, project=project, created_by=user, status=Content.Status.IN_PROGRESS
+    )
+    return AiJob.objects.create(
+        content=content,
+        user=user,
+        workspace=project.workspace,
+        kind='caption',
+        execution_mode=AiJob.ExecutionMode.BATCH,
+        params={'kind': 'caption', 'topic': topic, 'execution_mode': 'batch'}
+    )
+
+
+@pytest.mark.django_db
+class TestBatchExecution:
+    """Test submitting and collecting provider batches."""
+
+    def test_generate_endpoint_defers_batch_jobs(self, project, user):
+        """Test that batch-mode requests are not queued for realtime generation."""
+        content = Content.objects.create(title="Caption", project=project, created_by=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with patch('ai.tasks.generate_content_task.delay') as mock_delay:
+            response = client.post(
+                f'/api/contents/{content.id}/generate/',
+                {'kind': 'caption', 'execution_mode': 'batch'},
+                format='json'
+            )
+
+        assert response.status_code == 202
+        mock_delay.assert_not_called()
+        assert AiJob.objects.get(id=response.data['job_id']).execution_mode == AiJob.ExecutionMode.BATCH
+
+    def test_submit_writes_jsonl_batch(self, project, user, local_backend):
+        """Test that pending batch jobs are submitted as one JSONL file."""
+        jobs = [create_batch_job(project, user, f'محصول {i}') for i in range(3)]
+        realtime = AiJob.objects.create(
+            content=jobs[0].content, user=user, workspace=project.workspace, kind='caption'
+        )
+
+        provider_batch = ProviderBatch.objects.get(id=submit_batch_jobs())
+
+        requests = local_backend.read_requests(provider_batch.provider_batch_id)
+        assert sorted(parse_custom_id(r['custom_id']) for r in requests) == sorted(j.id for j in jobs)
+        assert requests[0]['url'] == '/v1/chat/completions'
+        assert provider_batch.request_count == 3
+
+        assert set(AiJob.objects.filter(provider_batch=provider_batch).values_list('status', flat=True)) == {
+            AiJob.Status.RUNNING
+        }
+        realtime.refresh_from_db()
+        assert realtime.provider_batch is None
+
+        # Nothing left to submit
+        assert submit_batch_jobs() is None
+
+    def test_poll_writes_results_back(self, project, user, local_backend):
+        """Test that finished batches create versions and discounted usage logs."""
+        ok_job = create_batch_job(project, user, 'کیف چرمی')
+        failed_job = create_batch_job(project, user, 'خطا')
+        provider_batch = ProviderBatch.objects.get(id=submit_batch_jobs())
+
+        # Still in progress
+        assert poll_batch_jobs() == 0
+
+        local_backend.complete(provider_batch.provider_batch_id, respond)
+        assert poll_batch_jobs() == 1
+
+        provider_batch.refresh_from_db()
+        assert provider_batch.status == ProviderBatch.Status.COMPLETED
+        assert (provider_batch.completed_count, provider_batch.failed_count) == (1, 1)
+
+        ok_job.refresh_from_db()
+        assert ok_job.status == AiJob.Status.COMPLETED
+        version = ContentVersion.objects.get(ai_job=ok_job)
+        assert version.body_markdown.startswith('# موضوع: کیف چرمی')
+        assert version.metadata['execution_mode'] == 'batch'
+        assert Content.objects.get(id=ok_job.content_id).status == Content.Status.REVIEW
+
+        # gpt-4o-mini: 1000 * 0.15/1M + 2000 * 0.6/1M = 0.00135, at half price
+        usage = UsageLog.objects.get(ai_job=ok_job, success=True)
+        assert usage.total_tokens == 3000
+        assert usage.estimated_cost == Decimal('0.000675')
+
+        failed_job.refresh_from_db()
+        assert failed_job.status == AiJob.Status.FAILED
+        assert 'model overloaded' in failed_job.error_message
+        assert Content.objects.get(id=failed_job.content_id).status == Content.Status.DRAFT
+
+        # Finished batches are not polled again
+        assert poll_batch_jobs() == 0
@@ -8,7 +8,7 @@ from rest_framework import status
 from unittest.mock import patch
 from decimal import Decimal
 
-from accounts.models import Organization, Workspace
+from accounts.models import Organization, OrganizationMember, Workspace
 from contentmgmt.models import Project, Content, Prompt
 from ai.models import UsageLimit, UsageLog
 
@@ -31,6 +31,11 @@ class BudgetEnforcementTestCase(TestCase):
             name='Test Org',
             slug='test-org'
         )
+        OrganizationMember.objects.create(
+            user=self.user,
+            organization=self.org,
+            role=OrganizationMember.Role.ADMIN
+        )
         self.workspace = Workspace.objects.create(
             organization=self.org,
             name='Test Workspace',
@@ -87,7 +92,8 @@ class BudgetEnforcementTestCase(TestCase):
                 'kind': 'draft',
                 'topic': 'Test Topic',
                 'min_words': 100
-            }
+            },
+            format='json'
         )
         
         # Should return 402 Payment Required
@@ -126,7 +132,8 @@ class BudgetEnforcementTestCase(TestCase):
                     'kind': 'draft',
                     'topic': 'Test Topic',
                     'min_words': 100
-                }
+                },
+                format='json'
             )
         
         # Should be accepted
@@ -156,7 +163,8 @@ class BudgetEnforcementTestCase(TestCase):
                 'kind': 'draft',
                 'topic': 'Test Topic',
                 'min_words': 100
-            }
+            },
+            format='json'
         )
         
         # Should return 402
@@ -211,7 +219,8 @@ class BudgetEnforcementTestCase(TestCase):
                     'kind': 'draft',
                     'topic': 'Test Topic',
                     'min_words': 100
-                }
+                },
+                format='json'
             )
         
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
@@ -246,7 +255,8 @@ class BudgetEnforcementTestCase(TestCase):
                 'kind': 'draft',
                 'topic': 'Test Topic',
                 'min_words': 100
-            }
+            },
+            format='json'
         )
         
         # May return 402 if user limit is also checked
@@ -283,7 +293,8 @@ class BudgetEnforcementTestCase(TestCase):
                 'kind': 'draft',
                 'topic': 'Test Topic',
                 'min_words': 100
-            }
+            },
+            format='json'
         )
         
         self.assertEqual(response.status_code, status.HTTP_402_PAYMENT_REQUIRED)
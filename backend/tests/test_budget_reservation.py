@@ -0,0 +1,158 @@
+"""
+Tests for pre-flight cost estimation and budget reservations.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from ai.models import AiJob, BudgetReservation, UsageLimit, UsageLog
+from ai.estimation import count_message_tokens, estimate_generation_cost, predict_completion_tokens
+from ai.services import get_workspace_budget_status, log_ai_usage
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    """Keep completion stats in a local cache during tests."""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    settings.OPENAI_DEFAULT_MODEL = 'gpt-4o-mini'
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def content(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    project = Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+    return Content.objects.create(title="کفش ورزشی", project=project, created_by=user)
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_completed_job(content, completion_tokens):
+    job = AiJob.objects.create(content=content, workspace=content.project.workspace, kind='caption')
+    UsageLog.objects.create(
+        ai_job=job,
+        workspace=job.workspace,
+        model='gpt-4o-mini',
+        prompt_tokens=100,
+        completion_tokens=completion_tokens,
+        total_tokens=100 + completion_tokens,
+        estimated_cost=Decimal('0.0001')
+    )
+
+
+@pytest.mark.django_db
+class TestEstimation:
+    """Test token and cost estimation."""
+
+    def test_prompt_tokens_counted_on_rendered_request(self, content):
+        """Test that the estimate counts the full rendered prompt."""
+        estimate = estimate_generation_cost(content, {'kind': 'draft', 'topic': 'هوش مصنوعی'})
+
+        assert estimate['model'] == 'gpt-4o-mini'
+        # The draft template is far longer than the topic alone
+        assert estimate['prompt_tokens'] > count_message_tokens(
+            [{'role': 'user', 'content': 'هوش مصنوعی'}], 'gpt-4o-mini'
+        ) * 10
+        assert estimate['estimated_cost'] > 0
+
+    def test_completion_uses_history_per_kind(self, content):
+        """Test that completion size comes from recent usage of the same kind."""
+        # Without enough history the request's max_tokens is assumed
+        assert predict_completion_tokens('caption', 2000) == 2000
+
+        for _ in range(10):
+            create_completed_job(content, 300)
+        cache.clear()
+
+        assert predict_completion_tokens('caption', 2000) == 300
+        assert predict_completion_tokens('outline', 2000) == 2000
+
+    def test_batch_estimate_is_discounted(self, content):
+        """Test that batch jobs are estimated at the batch price."""
+        realtime = estimate_generation_cost(content, {'kind': 'caption'})
+        batch = estimate_generation_cost(content, {'kind': 'caption', 'execution_mode': 'batch'})
+
+        assert batch['estimated_cost'] == pytest.approx(realtime['estimated_cost'] / 2, abs=Decimal('0.000001'))
+
+
+@pytest.mark.django_db
+class TestBudgetReservation:
+    """Test reserving and settling budget on the generate endpoint."""
+
+    def test_dry_run_returns_estimate_only(self, client, content):
+        """Test that a dry run neither creates a job nor reserves budget."""
+        response = client.post(
+            f'/api/contents/{content.id}/generate/',
+            {'kind': 'caption', 'dry_run': True},
+            format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['estimate']['completion_tokens'] == 2000
+        assert response.data['budget']['reserved'] == 0
+        assert not AiJob.objects.exists()
+        assert not BudgetReservation.objects.exists()
+
+    @patch('ai.tasks.generate_content_task.delay')
+    def test_reservations_stop_overspending(self, mock_delay, client, content):
+        """Test that queued jobs can't together exceed the budget."""
+        estimate = estimate_generation_cost(content, {'kind': 'caption'})
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.WORKSPACE,
+            scope_id=content.project.workspace_id,
+            cost_limit=Decimal('0.01')
+        )
+        fits = int(Decimal('0.01') // estimate['estimated_cost'])
+
+        statuses = [
+            client.post(f'/api/contents/{content.id}/generate/', {'kind': 'caption'}, format='json').status_code
+            for _ in range(fits + 2)
+        ]
+
+        assert statuses == [202] * fits + [402] * 2
+        assert mock_delay.call_count == fits
+        assert BudgetReservation.objects.filter(status=BudgetReservation.Status.ACTIVE).count() == fits
+
+        budget = get_workspace_budget_status(content.project.workspace)
+        assert budget['reserved'] == estimate['estimated_cost'] * fits
+        assert budget['remaining'] < estimate['estimated_cost']
+
+    @patch('ai.tasks.generate_content_task.delay')
+    def test_usage_settles_and_failure_releases(self, mock_delay, client, content):
+        """Test that logged usage settles the reservation and failures release it."""
+        for _ in range(2):
+            client.post(f'/api/contents/{content.id}/generate/', {'kind': 'caption'}, format='json')
+        settled_job, failed_job = AiJob.objects.order_by('id')
+
+        log_ai_usage(
+            content=content,
+            ai_job=settled_job,
+            workspace=settled_job.workspace,
+            model='gpt-4o-mini',
+            prompt_tokens=100,
+            completion_tokens=200,
+            total_tokens=300,
+            estimated_cost=0.000135
+        )
+        failed_job.mark_failed('API error')
+
+        settled = BudgetReservation.objects.get(ai_job=settled_job)
+        assert settled.status == BudgetReservation.Status.SETTLED
+        assert settled.actual_cost == Decimal('0.000135')
+        assert BudgetReservation.objects.get(ai_job=failed_job).status == BudgetReservation.Status.RELEASED
@@ -0,0 +1,133 @@
+"""
+Tests for bulk content generation.
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch, MagicMock
+from decimal import Decimal
+from django.core.cache import cache
+
+from accounts.models import User, Organization, OrganizationMember, Workspace
+from accounts.tenancy import get_organization_roles
+from contentmgmt.models import Project, Content
+from ai.models import AiJob, AiJobBatch, AuditLog, UsageLimit, UsageLog
+
+
+class BulkGenerationTestCase(TestCase):
+    """Test POST /api/projects/:id/generate-bulk/."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number='+989123456789')
+        self.org = Organization.objects.create(name='Test Org', slug='test-org')
+        OrganizationMember.objects.create(
+            user=self.user, organization=self.org, role=OrganizationMember.Role.ADMIN
+        )
+        self.workspace = Workspace.objects.create(
+            organization=self.org,
+            name='Test Workspace',
+            slug='test-workspace'
+        )
+        self.project = Project.objects.create(
+            workspace=self.workspace,
+            name='Test Project',
+            slug='test-project',
+            created_by=self.user
+        )
+        self.contents = [
+            Content.objects.create(project=self.project, title=f'Content {i}', created_by=self.user)
+            for i in range(5)
+        ]
+        self.url = f'/api/projects/{self.project.id}/generate-bulk/'
+        self.client.force_authenticate(user=self.user)
+        cache.delete('ai_completion_stats:caption')
+
+    @patch('celery.group')
+    def test_bulk_generate_creates_batch(self, mock_group):
+        """Test that one request creates all jobs, audit logs and a batch."""
+        mock_group.return_value.apply_async.return_value = MagicMock(id='group-1')
+
+        # Query count must not grow with the number of contents
+        get_organization_roles(self.user)  # cached from an earlier request
+        with self.assertNumQueries(22):
+            response = self.client.post(self.url, {'kind': 'caption'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['total_jobs'], 5)
+
+        batch = AiJobBatch.objects.get(id=response.data['id'])
+        self.assertEqual(batch.group_id, 'group-1')
+        self.assertEqual(batch.jobs.count(), 5)
+        self.assertEqual(
+            AuditLog.objects.filter(action=AuditLog.Action.STATUS_CHANGED).count(), 5
+        )
+        self.assertFalse(
+            Content.objects.exclude(status=Content.Status.IN_PROGRESS).exists()
+        )
+
+        # One task signature per job in a single group
+        signatures = list(mock_group.call_args.args[0])
+        self.assertEqual(len(signatures), 5)
+
+    @patch('celery.group')
+    def test_bulk_generate_selected_contents(self, mock_group):
+        """Test generating only the requested content ids."""
+        mock_group.return_value.apply_async.return_value = MagicMock(id='group-1')
+        ids = [self.contents[0].id, self.contents[1].id]
+
+        response = self.client.post(self.url, {'kind': 'outline', 'content_ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            set(AiJob.objects.values_list('content_id', flat=True)), set(ids)
+        )
+
+    def test_bulk_generate_budget_exceeded(self):
+        """Test that the budget check rejects the whole batch."""
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.WORKSPACE,
+            scope_id=self.workspace.id,
+            cost_limit=Decimal('1.00')
+        )
+        UsageLog.objects.create(
+            workspace=self.workspace,
+            model='gpt-4o-mini',
+            prompt_tokens=1000,
+            completion_tokens=1000,
+            total_tokens=2000,
+            estimated_cost=Decimal('2.00')
+        )
+
+        response = self.client.post(self.url, {'kind': 'caption'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_402_PAYMENT_REQUIRED)
+        self.assertFalse(AiJob.objects.exists())
+
+    def test_batch_progress(self):
+        """Test that finished jobs update the batch progress."""
+        batch = AiJobBatch.objects.create(
+            project=self.project,
+            workspace=self.workspace,
+            kind='caption',
+            total_jobs=2
+        )
+        jobs = [
+            AiJob.objects.create(
+                content=content, workspace=self.workspace, batch=batch, kind='caption'
+            )
+            for content in self.contents[:2]
+        ]
+
+        jobs[0].mark_completed({'version_id': 1})
+        batch.refresh_from_db()
+        self.assertEqual(batch.completed_jobs, 1)
+        self.assertEqual(batch.progress, 0.5)
+        self.assertEqual(batch.status, AiJobBatch.Status.RUNNING)
+
+        jobs[1].mark_failed('API error')
+        batch.refresh_from_db()
+        self.assertEqual(batch.failed_jobs, 1)
+        self.assertEqual(batch.status, AiJobBatch.Status.COMPLETED)
+        self.assertIsNotNone(batch.completed_at)
@@ -0,0 +1,115 @@
+"""
+Tests for full-text content search.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from contentmgmt.search import normalize_persian
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def project(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    return Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_content(project, title, body=''):
+    return Content.objects.create(title=title, body=body, project=project, created_by=project.created_by)
+
+
+def search(client, query, **params):
+    response = client.get('/api/contents/', {'search': query, **params})
+    assert response.status_code == 200
+    return response.data['results']
+
+
+class TestNormalizePersian:
+    """Test Persian text normalization."""
+
+    def test_arabic_letters_become_persian(self):
+        assert normalize_persian('كتاب علي') == 'کتاب علی'
+
+    def test_digits_are_folded(self):
+        assert normalize_persian('سال ۱۴۰۳ و ٢٠٢٤') == 'سال 1403 و 2024'
+
+    def test_zwnj_and_diacritics_are_dropped(self):
+        assert normalize_persian('می‌خواهم کتابـها را بِخوانم') == 'میخواهم کتابها را بخوانم'
+
+
+@pytest.mark.django_db
+class TestContentSearch:
+    """Test searching contents through the API."""
+
+    def test_matches_regardless_of_arabic_letters_and_zwnj(self, client, project):
+        """Test that differently typed forms of a word find each other."""
+        content = create_content(project, 'راهنما', 'من مي‌خواهم يك كتاب بخوانم')
+
+        for query in ('میخواهم', 'می‌خواهم', 'یک کتاب'):
+            assert [result['id'] for result in search(client, query)] == [content.id]
+
+    def test_matches_digits_in_any_script(self, client, project):
+        """Test that Persian and ASCII digits match each other."""
+        content = create_content(project, 'گزارش سال ۱۴۰۳')
+
+        assert [result['id'] for result in search(client, '1403')] == [content.id]
+
+    def test_title_matches_rank_first(self, client, project):
+        """Test ranking and the highlighted snippet."""
+        in_body = create_content(project, 'یادداشت', 'درباره بازاریابی محتوا برای فروشگاه')
+        in_title = create_content(project, 'بازاریابی محتوا', 'مقدمه')
+        create_content(project, 'نامرتبط', 'متن دیگر')
+
+        results = search(client, 'بازاریابی')
+
+        assert [result['id'] for result in results] == [in_title.id, in_body.id]
+        assert results[0]['search_rank'] > results[1]['search_rank']
+        assert '<mark>بازاریابی</mark>' in results[1]['search_headline']
+
+    def test_explicit_ordering_overrides_rank(self, client, project):
+        """Test that ?ordering= still applies to search results."""
+        first = create_content(project, 'بازاریابی', 'بازاریابی')
+        second = create_content(project, 'یادداشت', 'بازاریابی')
+
+        results = search(client, 'بازاریابی', ordering='created_at')
+
+        assert [result['id'] for result in results] == [first.id, second.id]
+
+    def test_list_without_search_has_no_search_fields(self, client, project):
+        create_content(project, 'یادداشت')
+
+        result, = client.get('/api/contents/').data['results']
+
+        assert 'search_rank' not in result
+
+    def test_uses_gin_index(self, client, project):
+        """Test that the search query can use the GIN index instead of ILIKE."""
+        with CaptureQueriesContext(connection) as queries:
+            search(client, 'بازاریابی')
+
+        sql = [query['sql'] for query in queries if 'FROM "contents"' in query['sql']][-1]
+        assert 'ILIKE' not in sql.upper()
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            # A test-sized table would be read through the organization index; rolled back with the test
+            cursor.execute('DROP INDEX contents_organiz_d12758_idx')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row for row, in cursor.fetchall())
+        assert 'contents_search_vector_gin' in plan
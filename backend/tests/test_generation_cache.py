@@ -0,0 +1,139 @@
+"""
+Tests for the exact-match generation cache.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from accounts.models import Organization, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from ai.models import AiJob, UsageLog
+from ai.cache import GenerationCache
+from ai.services import get_usage_summary
+
+
+MESSAGES = [
+    {'role': 'system', 'content': 'شما یک نویسنده هستید.'},
+    {'role': 'user', 'content': 'موضوع: هوش مصنوعی'},
+]
+
+
+@pytest.fixture
+def generation_cache():
+    cache = GenerationCache(ttl=60, max_entries=2)
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+class TestCacheKey:
+    """Test content-addressed key construction."""
+
+    def test_key_is_stable_and_whitespace_insensitive(self):
+        """Test that formatting differences don't change the key."""
+        spaced = [
+            {'role': 'system', 'content': '  شما یک   نویسنده هستید.'},
+            {'role': 'user', 'content': 'موضوع:\nهوش مصنوعی '},
+        ]
+
+        assert GenerationCache.make_key('gpt-4o-mini', MESSAGES, 0.7, 0.9, 2000) == \
+            GenerationCache.make_key('gpt-4o-mini', spaced, 0.7, 0.9, 2000)
+
+    def test_key_depends_on_sampling_params(self):
+        """Test that model and sampling parameters are part of the key."""
+        base = GenerationCache.make_key('gpt-4o-mini', MESSAGES, 0.7, 0.9, 2000)
+
+        assert base != GenerationCache.make_key('gpt-4o', MESSAGES, 0.7, 0.9, 2000)
+        assert base != GenerationCache.make_key('gpt-4o-mini', MESSAGES, 0.2, 0.9, 2000)
+        assert base != GenerationCache.make_key('gpt-4o-mini', MESSAGES, 0.7, 1.0, 2000)
+        assert base != GenerationCache.make_key('gpt-4o-mini', MESSAGES, 0.7, 0.9, 500)
+
+
+class TestGenerationCache:
+    """Test cache storage and eviction."""
+
+    def test_set_and_get(self, generation_cache):
+        """Test storing and reading an entry."""
+        generation_cache.set('a', {'text': 'متن'})
+
+        assert generation_cache.get('a') == {'text': 'متن'}
+        assert generation_cache.get('missing') is None
+
+    def test_lru_eviction(self, generation_cache):
+        """Test that the least recently used entry is evicted over the cap."""
+        generation_cache.set('a', {'text': 'a'})
+        generation_cache.set('b', {'text': 'b'})
+        generation_cache.get('a')  # 'b' is now least recently used
+        generation_cache.set('c', {'text': 'c'})
+
+        assert generation_cache.get('b') is None
+        assert generation_cache.get('a') is not None
+        assert generation_cache.get('c') is not None
+
+
+@pytest.mark.django_db
+class TestCachedGeneration:
+    """Test the cache in generate_content_task."""
+
+    @pytest.fixture
+    def setup_data(self, generation_cache):
+        org = Organization.objects.create(name="Test Org", slug="test-org")
+        workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+        user = User.objects.create_user(phone_number="09121111111")
+        project = Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+        content = Content.objects.create(title="Test Content", project=project, created_by=user)
+        return {'workspace': workspace, 'user': user, 'content': content}
+
+    def run_job(self, setup_data):
+        from ai.tasks import generate_content_task
+
+        params = {'kind': 'caption', 'topic': 'هوش مصنوعی', 'tone': 'دوستانه', 'audience': 'عمومی'}
+        job = AiJob.objects.create(
+            content=setup_data['content'],
+            user=setup_data['user'],
+            workspace=setup_data['workspace'],
+            kind='caption',
+            params=params
+        )
+        return generate_content_task(setup_data['content'].id, params, job.id)
+
+    @patch('ai.client.get_openai_client')
+    def test_second_generation_served_from_cache(self, mock_client, setup_data):
+        """Test that an identical request skips the API and is logged as a hit."""
+        response = Mock()
+        response.choices = [Mock(message=Mock(content="کپشن تولید شده"))]
+        response.usage = Mock(prompt_tokens=100, completion_tokens=200, total_tokens=300)
+        mock_client.return_value.chat.completions.create.return_value = response
+
+        self.run_job(setup_data)
+        result = self.run_job(setup_data)
+
+        assert mock_client.return_value.chat.completions.create.call_count == 1
+        assert result['cost'] == 0.0
+        assert ContentVersion.objects.filter(content=setup_data['content']).count() == 2
+
+        hit = UsageLog.objects.get(cache_hit=True)
+        assert hit.total_tokens == 300
+        assert hit.estimated_cost == Decimal('0')
+
+        summary = get_usage_summary(workspace=setup_data['workspace'])
+        assert summary['cache_hits'] == 1
+        assert summary['cache_saved_cost'] > 0
+
+    @patch('ai.client.get_openai_client')
+    def test_workspace_opt_out(self, mock_client, setup_data):
+        """Test that workspaces can opt out of the cache."""
+        workspace = setup_data['workspace']
+        workspace.ai_cache_enabled = False
+        workspace.save()
+
+        response = Mock()
+        response.choices = [Mock(message=Mock(content="کپشن"))]
+        response.usage = Mock(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+        mock_client.return_value.chat.completions.create.return_value = response
+
+        self.run_job(setup_data)
+        self.run_job(setup_data)
+
+        assert mock_client.return_value.chat.completions.create.call_count == 2
+        assert not UsageLog.objects.filter(cache_hit=True).exists()
@@ -0,0 +1,91 @@
+"""
+Tests for AiJob real-time events and the SSE endpoint.
+"""
+import json
+import pytest
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from ai.models import AiJob
+from ai.events import format_sse
+
+
+async def read_stream(response):
+    """Consume an async streaming response."""
+    return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+
+@pytest.fixture
+def job():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    user = User.objects.create_user(phone_number="+989121111111")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.WRITER)
+    project = Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+    content = Content.objects.create(title="Test Content", project=project, created_by=user)
+    return AiJob.objects.create(content=content, user=user, workspace=workspace, kind='outline', params={})
+
+
+@pytest.mark.django_db
+class TestJobEvents:
+    """Test status events published from AiJob transitions."""
+
+    def test_transitions_publish_status(self, job, django_capture_on_commit_callbacks):
+        """Test that each transition publishes a status event after commit."""
+        with patch('ai.events.publish_job_event') as mock_publish:
+            with django_capture_on_commit_callbacks(execute=True):
+                job.mark_running()
+                job.mark_completed({'version_id': 1})
+
+        statuses = [call.args[2]['status'] for call in mock_publish.call_args_list]
+        assert statuses == [AiJob.Status.RUNNING, AiJob.Status.COMPLETED]
+        assert all(call.args[1] == 'status' for call in mock_publish.call_args_list)
+
+    def test_format_sse(self):
+        """Test SSE message framing."""
+        message = format_sse('partial', {'offset': 0, 'text': 'سلام'})
+
+        assert message.startswith('event: partial\ndata: ')
+        assert message.endswith('\n\n')
+        assert json.loads(message.split('data: ')[1])['text'] == 'سلام'
+
+
+@pytest.mark.django_db
+class TestJobEventsEndpoint:
+    """Test the /api/ai/jobs/:id/events/ endpoint."""
+
+    def test_requires_authentication(self, job):
+        """Test that anonymous requests are rejected."""
+        response = Client().get(f'/api/ai/jobs/{job.id}/events/')
+
+        assert response.status_code == 401
+
+    def test_non_member_gets_404(self, job):
+        """Test that users outside the job's organization can't subscribe."""
+        outsider = User.objects.create_user(phone_number="+989125555555")
+        token = AccessToken.for_user(outsider)
+
+        response = Client().get(f'/api/ai/jobs/{job.id}/events/?token={token}')
+
+        assert response.status_code == 404
+
+    def test_finished_job_streams_snapshot_and_closes(self, job):
+        """Test that a finished job sends its final status and ends the stream."""
+        job.mark_completed({'version_id': 1})
+        token = AccessToken.for_user(job.user)
+
+        response = Client().get(
+            f'/api/ai/jobs/{job.id}/events/',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+
+        body = async_to_sync(read_stream)(response)
+        assert 'event: status' in body
+        assert '"status": "completed"' in body
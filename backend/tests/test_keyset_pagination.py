@@ -0,0 +1,122 @@
+"""
+Tests for cursor pagination of high-volume list endpoints.
+"""
+import re
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from ai.models import UsageLog
+
+NOW = datetime.now(dt_timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def workspace(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def logs(workspace):
+    """45 usage logs, with runs of three sharing a timestamp."""
+    return UsageLog.objects.bulk_create([
+        UsageLog(
+            workspace=workspace, organization=workspace.organization, model='gpt-4o-mini', prompt_tokens=10, completion_tokens=20,
+            total_tokens=i, estimated_cost=Decimal('0.01'), timestamp=NOW - timedelta(minutes=i // 3)
+        )
+        for i in range(45)
+    ])
+
+
+def walk(client, url, **params):
+    """Follow next links from the first page, returning the pages' result IDs."""
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        pages.append([item['id'] for item in response.data['results']])
+        if not response.data['next']:
+            return pages
+        response = client.get(response.data['next'])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cursor pagination and its page-number fallback."""
+
+    def test_walks_every_row_once_in_order(self, client, logs):
+        """Test that rows sharing a timestamp aren't skipped or repeated across pages."""
+        pages = walk(client, '/api/ai/usage-logs/')
+
+        assert [len(page) for page in pages] == [20, 20, 5]
+        expected = UsageLog.objects.order_by('-timestamp').values_list('timestamp', flat=True)
+        ids = [log_id for page in pages for log_id in page]
+        assert sorted(ids) == sorted(log.id for log in logs)
+        timestamps = dict(UsageLog.objects.values_list('id', 'timestamp'))
+        assert [timestamps[log_id] for log_id in ids] == list(expected)
+
+    def test_previous_link(self, client, logs):
+        first = client.get('/api/ai/usage-logs/').data
+        second = client.get(first['next']).data
+
+        assert client.get(second['previous']).data['results'] == first['results']
+
+    def test_no_count_or_deep_offset(self, client, logs):
+        """Test that a page is a range query on the timestamp, only skipping rows tied with the cursor."""
+        first = client.get('/api/ai/usage-logs/').data
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(first['next'])
+
+        assert 'count' not in response.data
+        sql, = [query['sql'] for query in queries if '"usage_logs"' in query['sql']]
+        assert 'COUNT(' not in sql.upper()
+        assert '"timestamp" <' in sql
+        offset = re.search(r'OFFSET (\d+)', sql)
+        assert offset is None or int(offset.group(1)) < 3
+
+    def test_page_number_fallback(self, client, logs):
+        response = client.get('/api/ai/usage-logs/', {'page': 3})
+
+        assert response.data['count'] == 45
+        assert len(response.data['results']) == 5
+
+    def test_other_ordering_uses_page_numbers(self, client, logs):
+        response = client.get('/api/ai/usage-logs/', {'ordering': 'total_tokens'})
+
+        assert response.data['count'] == 45
+        assert [log['total_tokens'] for log in response.data['results']] == list(range(20))
+
+    def test_audit_logs_and_jobs_use_cursors(self, client):
+        for url in ('/api/ai/audit-logs/', '/api/ai/jobs/'):
+            data = client.get(url).data
+            assert set(data) == {'next', 'previous', 'results'}
+
+    def test_contents_cursor_and_search_fallback(self, client, user, workspace):
+        project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+        contents = [Content.objects.create(title=f"Post {i}", project=project, created_by=user) for i in range(25)]
+
+        pages = walk(client, '/api/contents/')
+        assert [content_id for page in pages for content_id in page] == [content.id for content in contents[::-1]]
+
+        response = client.get('/api/contents/', {'search': 'Post'})
+        assert response.data['count'] == 25
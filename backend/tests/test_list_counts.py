@@ -0,0 +1,103 @@
+"""
+Tests for related-object counts annotated on list endpoints.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from accounts.tenancy import get_organization_roles
+from contentmgmt.models import Project, Content
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def organizations(user):
+    """Three organizations, each with members, workspaces, projects and contents."""
+    organizations = []
+    for i in range(3):
+        org = Organization.objects.create(name=f"Org {i}", slug=f"org-{i}")
+        for j in range(i + 1):
+            member = user if j == 0 else User.objects.create_user(phone_number=f"+98912222{i}{j:03d}")
+            OrganizationMember.objects.create(user=member, organization=org)
+        for j in range(2):
+            workspace = Workspace.objects.create(
+                name=f"Workspace {i}-{j}", slug=f"workspace-{i}-{j}", organization=org, is_active=j == 0
+            )
+            for k in range(2):
+                project = Project.objects.create(
+                    name=f"Project {k}", slug=f"project-{i}-{j}-{k}", workspace=workspace,
+                    created_by=user, is_active=k == 0
+                )
+                for _ in range(k + 1):
+                    Content.objects.create(title="Post", project=project, created_by=user)
+        organizations.append(org)
+    get_organization_roles(user)  # cached from an earlier request
+    return organizations
+
+
+@pytest.mark.django_db
+class TestListCounts:
+    """Test that list endpoints count related objects in the list query."""
+
+    def test_organization_counts(self, client, organizations, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get('/api/auth/organizations/')
+
+        counts = {org['slug']: (org['member_count'], org['workspace_count']) for org in response.data['results']}
+        assert counts == {'org-0': (1, 1), 'org-1': (2, 1), 'org-2': (3, 1)}
+
+    def test_workspace_counts(self, client, organizations, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get('/api/auth/workspaces/')
+
+        assert len(response.data['results']) == 6
+        assert {workspace['project_count'] for workspace in response.data['results']} == {1}
+
+    def test_project_counts(self, client, organizations, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get('/api/projects/')
+
+        assert len(response.data['results']) == 12
+        assert sorted(project['content_count'] for project in response.data['results']) == [1] * 6 + [2] * 6
+
+    def test_query_count_does_not_grow_with_page(self, client, user, organizations, django_assert_num_queries):
+        """Test that a full page of organizations still costs two queries."""
+        for i in range(3, 20):
+            org = Organization.objects.create(name=f"Org {i}", slug=f"org-{i}")
+            OrganizationMember.objects.create(user=user, organization=org)
+        get_organization_roles(user)
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/auth/organizations/')
+
+        assert len(response.data['results']) == 20
+
+    def test_counts_opt_out(self, client, organizations, django_assert_num_queries):
+        with django_assert_num_queries(2) as queries:
+            response = client.get('/api/auth/organizations/', {'counts': 'false'})
+
+        assert 'member_count' not in response.data['results'][0]
+        assert 'workspace_count' not in response.data['results'][0]
+        assert 'organization_members' not in queries.captured_queries[-1]['sql']
+
+    def test_detail_and_create_still_count(self, client, organizations):
+        org = organizations[2]
+
+        assert client.get(f'/api/auth/organizations/{org.id}/').data['member_count'] == 3
+
+        response = client.post('/api/projects/', {
+            'name': 'New', 'slug': 'new', 'workspace': Workspace.objects.filter(organization=org).first().id
+        }, format='json')
+        assert response.status_code == 201
+        assert response.data['content_count'] == 0
@@ -0,0 +1,148 @@
+"""
+Tests for monthly partitioning of usage_logs and audit_logs.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from ai.models import AuditLog, UsageLog
+from ai.partitions import (
+    add_months, create_partition, drop_expired_partitions, get_partitions, is_partitioned,
+    maintain_log_partitions, partition_name
+)
+from ai.rollups import truncate
+from ai.services import get_usage_summary
+
+CURRENT_MONTH = truncate('month', datetime.now(dt_timezone.utc))
+
+
+@pytest.fixture
+def workspace(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def content(workspace, user):
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+    return Content.objects.create(title="Post", project=project, created_by=user)
+
+
+def create_log_at(workspace, timestamp):
+    return UsageLog.objects.create(
+        workspace=workspace,
+        model='gpt-4o-mini',
+        prompt_tokens=10,
+        completion_tokens=20,
+        total_tokens=30,
+        estimated_cost=Decimal('0.01'),
+        timestamp=timestamp
+    )
+
+
+def partition_of(model, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT tableoid::regclass::text FROM {model._meta.db_table} WHERE id = %s', [pk])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestPartitionMaintenance:
+    """Test creating and dropping monthly partitions."""
+
+    def test_tables_are_partitioned_ahead(self, settings):
+        """Test that both tables have partitions for the coming months."""
+        for table in ('usage_logs', 'audit_logs'):
+            assert is_partitioned(table)
+            months = get_partitions(table)
+            for ahead in range(settings.AI_LOG_PARTITIONS_AHEAD + 1):
+                assert add_months(CURRENT_MONTH, ahead) in months
+
+    def test_maintenance_creates_missing_months(self, settings):
+        """Test that the beat task adds the next month once it is due."""
+        settings.AI_LOG_PARTITIONS_AHEAD = 5
+
+        results = maintain_log_partitions()
+
+        assert partition_name('usage_logs', add_months(CURRENT_MONTH, 5)) in results['usage_logs']['created']
+        assert maintain_log_partitions()['audit_logs']['created'] == []
+
+    def test_new_partition_takes_rows_from_default(self, workspace):
+        """Test that rows in the default partition move to their month's partition."""
+        month = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        log = create_log_at(workspace, month + timedelta(days=3))
+        assert partition_of(UsageLog, log.id) == 'usage_logs_default'
+
+        create_partition('usage_logs', month)
+
+        assert partition_of(UsageLog, log.id) == 'usage_logs_p2020_01'
+        assert UsageLog.objects.get(id=log.id).timestamp == log.timestamp
+
+    def test_retention_drops_whole_months(self, workspace, settings):
+        """Test that partitions past the retention period are dropped."""
+        old_month = add_months(CURRENT_MONTH, -3)
+        create_partition('usage_logs', old_month)
+        create_log_at(workspace, old_month)
+        recent = create_log_at(workspace, CURRENT_MONTH)
+        # Run the deferred foreign key checks, which would block the drop
+        connection.check_constraints()
+        settings.AI_USAGE_LOG_RETENTION_MONTHS = 2
+
+        dropped = maintain_log_partitions()['usage_logs']['dropped']
+
+        assert dropped == [partition_name('usage_logs', old_month)]
+        assert list(UsageLog.objects.values_list('id', flat=True)) == [recent.id]
+        assert drop_expired_partitions('usage_logs', 2) == []
+
+
+@pytest.mark.django_db
+class TestPartitionPruning:
+    """Test that time-filtered queries only scan the months they cover."""
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row for row, in cursor.fetchall())
+
+    def test_usage_summary_prunes_partitions(self, workspace):
+        """Test that the raw usage_logs edges skip other months."""
+        now = datetime.now(dt_timezone.utc)
+
+        with CaptureQueriesContext(connection) as queries:
+            get_usage_summary(workspace=workspace, start_date=now - timedelta(hours=1, minutes=30), end_date=now)
+
+        sql, = [query['sql'] for query in queries if '"usage_logs"' in query['sql']]
+        plan = self.explain(sql)
+        assert partition_name('usage_logs', CURRENT_MONTH) in plan
+        assert partition_name('usage_logs', add_months(CURRENT_MONTH, 1)) not in plan
+
+    def test_audit_logs_filter_by_time(self, content, user):
+        """Test the audit log time filters and that they prune partitions."""
+        old = AuditLog.objects.create(content=content, user=user, action=AuditLog.Action.CREATED)
+        AuditLog.objects.filter(id=old.id).update(timestamp=add_months(CURRENT_MONTH, -2))
+        recent = AuditLog.objects.create(content=content, user=user, action=AuditLog.Action.UPDATED)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/ai/audit-logs/', {
+                'timestamp__gte': CURRENT_MONTH.isoformat(),
+                'timestamp__lt': add_months(CURRENT_MONTH, 1).isoformat(),
+            })
+
+        assert [log['id'] for log in response.data['results']] == [recent.id]
+        sql = [query['sql'] for query in queries if 'FROM "audit_logs"' in query['sql']][-1]
+        plan = self.explain(sql)
+        assert partition_name('audit_logs', CURRENT_MONTH) in plan
+        assert 'audit_logs_default' not in plan
@@ -0,0 +1,116 @@
+"""
+Tests for the cached per-user role map behind the permission classes.
+"""
+import pytest
+from django.test import RequestFactory
+from unittest.mock import Mock
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from accounts.permissions import CanApproveContent, CanEditContent, IsOrganizationMember
+from accounts.tenancy import get_organization_roles
+from contentmgmt.models import Project, Content
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def membership(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    return OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.EDITOR)
+
+
+@pytest.fixture
+def content(membership):
+    workspace = Workspace.objects.create(
+        name="Test Workspace", slug="test-workspace", organization=membership.organization
+    )
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace)
+    return Content.objects.get(id=Content.objects.create(title="Post", project=project).id)
+
+
+def post_request(user):
+    request = RequestFactory().post('/')
+    request.user = user
+    return request
+
+
+@pytest.mark.django_db
+class TestOrganizationRoles:
+    """Test loading, caching and invalidating role maps."""
+
+    def test_loaded_once_per_request(self, user, membership, django_assert_num_queries):
+        request = post_request(user)
+
+        with django_assert_num_queries(1):
+            assert get_organization_roles(user, request) == {membership.organization_id: membership.role}
+            get_organization_roles(user, request)
+
+    def test_cached_between_requests(self, user, membership, django_assert_num_queries):
+        get_organization_roles(user, post_request(user))
+
+        with django_assert_num_queries(0):
+            assert get_organization_roles(user, post_request(user)) == {membership.organization_id: membership.role}
+
+    def test_role_change_invalidates(self, user, membership):
+        get_organization_roles(user)
+
+        membership.role = OrganizationMember.Role.VIEWER
+        membership.save()
+
+        assert get_organization_roles(user) == {membership.organization_id: OrganizationMember.Role.VIEWER}
+
+    def test_removal_invalidates(self, user, membership):
+        get_organization_roles(user)
+
+        membership.delete()
+
+        assert get_organization_roles(user) == {}
+
+    def test_queryset_delete_invalidates(self, user, membership):
+        """Test removal by a queryset delete, as the admin's delete action does."""
+        get_organization_roles(user)
+
+        OrganizationMember.objects.filter(id=membership.id).delete()
+
+        assert get_organization_roles(user) == {}
+
+    def test_cascade_delete_invalidates(self, user, membership):
+        get_organization_roles(user)
+
+        membership.organization.delete()
+
+        assert get_organization_roles(user) == {}
+
+    def test_queryset_update_invalidates(self, user, membership):
+        get_organization_roles(user)
+
+        OrganizationMember.objects.filter(user=user).update(role=OrganizationMember.Role.VIEWER)
+
+        assert get_organization_roles(user) == {membership.organization_id: OrganizationMember.Role.VIEWER}
+
+
+@pytest.mark.django_db
+class TestCachedPermissionChecks:
+    """Test that permission checks read roles from the cached map."""
+
+    def test_content_checks_run_no_queries(self, user, content, django_assert_num_queries):
+        get_organization_roles(user)
+        view = Mock()
+
+        with django_assert_num_queries(0):
+            request = post_request(user)
+            assert CanEditContent().has_object_permission(request, view, content)
+            assert CanApproveContent().has_object_permission(request, view, content)
+            assert IsOrganizationMember().has_object_permission(request, view, content)
+
+    def test_demoted_member_loses_access(self, user, membership, content):
+        request = post_request(user)
+        assert CanEditContent().has_object_permission(request, Mock(), content)
+
+        membership.role = OrganizationMember.Role.WRITER
+        membership.save()
+
+        assert not CanEditContent().has_object_permission(post_request(user), Mock(), content)
@@ -137,6 +137,74 @@ class TestPIIRedactor:
         assert not redactor.has_pii("سلام این یک متن ساده است")
         assert not redactor.has_pii("")
     
+    def test_persian_digits(self):
+        """Test PII written with Persian and Arabic-Indic digits."""
+        redactor = PIIRedactor()
+        
+        text = "تماس با ۰۹۱۲۳۴۵۶۷۸۹ یا +٩٨٩١٢٣٤٥٦٧٨٩ و کد ملی ۱۲۳۴۵۶۷۸۹۰"
+        redacted, warnings = redactor.redact(text, redact_national_id=True)
+        
+        assert redacted == "تماس با [PHONE_1] یا [PHONE_2] و کد ملی [NATIONAL_ID_1]"
+        assert warnings['phone'] == ["Found 2 phone number(s)"]
+        assert redactor.restore(redacted) == text
+    
+    def test_placeholders_are_deterministic(self):
+        """Test that placeholders are numbered per type in order of appearance."""
+        text = "a@example.com 09123456789 b@example.com a@example.com"
+        
+        redacted, _ = PIIRedactor().redact(text)
+        
+        assert redacted == "[EMAIL_1] [PHONE_1] [EMAIL_2] [EMAIL_1]"
+        assert PIIRedactor().redact(text)[0] == redacted
+    
+    def test_iban_is_not_split_by_phone(self):
+        """Test that the digits of an IBAN aren't redacted as a phone number."""
+        redactor = PIIRedactor()
+        
+        redacted, warnings = redactor.redact("حساب IR123456789012345678901234")
+        
+        assert redacted == "حساب [IBAN_1]"
+        assert 'phone' not in warnings
+    
+    def test_word_boundaries_across_letters(self):
+        """Test that digits joined to Persian letters aren't a national ID."""
+        redactor = PIIRedactor()
+        
+        redacted, warnings = redactor.redact("کد۱۲۳۴۵۶۷۸۹۰ملی", redact_national_id=True)
+        
+        assert warnings == {}
+        assert not redactor.has_pii("content marketing برای ۲۰۲۴")
+    
+    def test_restore_leaves_unknown_placeholders(self):
+        """Test that placeholders without a mapping are kept as they are."""
+        redactor = PIIRedactor()
+        redactor.redact("شماره 09123456789")
+        
+        assert redactor.restore("[PHONE_1] [PHONE_2] [EMAIL_1]") == "09123456789 [PHONE_2] [EMAIL_1]"
+    
+    def test_restore_stream_matches_restore(self):
+        """Test that restoring chunk by chunk equals restoring the whole text."""
+        redactor = PIIRedactor()
+        redacted, _ = redactor.redact(
+            "تماس 09123456789 و 09351234567 ایمیل a@example.com حساب IR123456789012345678901234 " * 3
+        )
+        
+        for size in (1, 2, 3, 5, 7, 11):
+            stream = redactor.restore_stream()
+            chunks = [redacted[i:i + size] for i in range(0, len(redacted), size)]
+            restored = ''.join(stream.feed(chunk) for chunk in chunks) + stream.feed('', final=True)
+            assert restored == redactor.restore(redacted)
+    
+    def test_restore_stream_holds_only_placeholder_prefixes(self):
+        """Test that only a possible placeholder is held back."""
+        redactor = PIIRedactor()
+        redactor.redact("شماره 09123456789")
+        stream = redactor.restore_stream()
+        
+        assert stream.feed("متن [یادداشت") == "متن [یادداشت"
+        assert stream.feed(" [PHONE") == " "
+        assert stream.feed("_1] تمام") == "09123456789 تمام"
+    
     def test_empty_text(self):
         """Test handling of empty text."""
         redactor = PIIRedactor()
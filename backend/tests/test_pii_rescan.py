@@ -0,0 +1,103 @@
+"""
+Tests for the rescan_pii management command.
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Organization, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+
+
+@pytest.fixture
+def project():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    user = User.objects.create_user(phone_number="+989121111111")
+    return Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+
+
+def create_content(project, body, **kwargs):
+    return Content.objects.create(title="Post", body=body, project=project, created_by=project.created_by, **kwargs)
+
+
+def rescan(**options):
+    stdout = StringIO()
+    call_command('rescan_pii', workers=0, stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestRescanPII:
+    """Test re-scanning content for PII."""
+
+    def test_flags_pii_in_body_and_versions(self, project):
+        """Test that PII in the body or any version flags the content."""
+        in_body = create_content(project, "Call 09123456789 or 09351234567")
+        in_version = create_content(project, "Clean body")
+        ContentVersion.objects.create(
+            content=in_version, version_number=1, title="Post", body_markdown="Mail test@example.com",
+            created_by=project.created_by
+        )
+        clean = create_content(project, "Nothing to see")
+
+        output = rescan()
+
+        in_body.refresh_from_db()
+        in_version.refresh_from_db()
+        clean.refresh_from_db()
+        assert in_body.has_pii and in_body.pii_warnings == {'phone': ["Found 2 phone number(s)"]}
+        assert in_version.has_pii and in_version.pii_warnings == {'email': ["Found 1 email address(es)"]}
+        assert not clean.has_pii
+        assert "Scanned 3 contents and 1 versions" in output
+
+    def test_keeps_existing_flags_unless_reset(self, project):
+        """Test that flags from earlier scans are kept, and cleared with --reset."""
+        content = create_content(
+            project, "Now clean", has_pii=True, pii_warnings={'iban': ["Found 1 IBAN(s)"]}
+        )
+
+        rescan()
+        content.refresh_from_db()
+        assert content.has_pii and content.pii_warnings == {'iban': ["Found 1 IBAN(s)"]}
+
+        rescan(reset=True)
+        content.refresh_from_db()
+        assert not content.has_pii and content.pii_warnings == {}
+
+    def test_only_changed_rows_are_written(self, project):
+        """Test that a second scan finds nothing to update."""
+        for i in range(5):
+            create_content(project, f"Call 0912345678{i}")
+
+        assert "updated 5 contents" in rescan(batch_size=2)
+        with CaptureQueriesContext(connection) as queries:
+            output = rescan(batch_size=2)
+
+        assert "updated 0 contents" in output
+        assert not any(query['sql'].startswith('UPDATE') for query in queries)
+
+    def test_resumes_from_checkpoint(self, project, tmp_path):
+        """Test that the checkpoint file records progress and skips scanned contents."""
+        contents = [create_content(project, "Call 09123456789") for _ in range(3)]
+        checkpoint = tmp_path / 'rescan.checkpoint'
+        checkpoint.write_text(str(contents[0].id))
+
+        output = rescan(checkpoint_file=str(checkpoint), batch_size=1)
+
+        assert "Scanned 2 contents" in output
+        assert checkpoint.read_text() == str(contents[-1].id)
+        assert not Content.objects.get(id=contents[0].id).has_pii
+        assert Content.objects.get(id=contents[1].id).has_pii
+        assert "Scanned 0 contents" in rescan(checkpoint_file=str(checkpoint))
+
+    def test_worker_processes(self, project):
+        """Test scanning in a process pool."""
+        contents = [create_content(project, f"Call 0912345678{i}" if i % 2 else "Clean") for i in range(4)]
+
+        stdout = StringIO()
+        call_command('rescan_pii', workers=2, batch_size=1, stdout=stdout)
+
+        assert [Content.objects.get(id=c.id).has_pii for c in contents] == [False, True, False, True]
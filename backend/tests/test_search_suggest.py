@@ -0,0 +1,113 @@
+"""
+Tests for title suggestions.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Prompt, Content
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def workspace(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.WRITER)
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def other_workspace():
+    org = Organization.objects.create(name="Other Org", slug="other-org")
+    return Workspace.objects.create(name="Other Workspace", slug="other-workspace", organization=org)
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_project(workspace, name):
+    return Project.objects.create(name=name, slug=f"p{Project.objects.count()}", workspace=workspace)
+
+
+def suggest(client, q, **params):
+    response = client.get('/api/search/suggest/', {'q': q, **params})
+    assert response.status_code == 200
+    return response.data
+
+
+@pytest.mark.django_db
+class TestSearchSuggest:
+    """Test the /api/search/suggest/ endpoint."""
+
+    def test_suggests_each_kind(self, client, workspace):
+        """Test that contents, prompts and projects are matched anywhere in the title."""
+        project = create_project(workspace, 'کمپین بازاریابی')
+        content = Content.objects.create(title='راهنمای بازاریابی محتوا', project=project)
+        prompt = Prompt.objects.create(workspace=workspace, title='Marketing بازاریابی', prompt_template='...')
+        Content.objects.create(title='گزارش فروش', project=project)
+
+        data = suggest(client, 'بازار')
+
+        assert [item['id'] for item in data['contents']] == [content.id]
+        assert data['contents'][0]['project'] == project.id
+        assert [item['id'] for item in data['prompts']] == [prompt.id]
+        assert [item['name'] for item in data['projects']] == ['کمپین بازاریابی']
+
+    def test_scoped_to_callers_workspaces(self, client, workspace, other_workspace):
+        """Test that other organizations' titles only show up for public prompts."""
+        Content.objects.create(title='بازاریابی', project=create_project(other_workspace, 'دیگر'))
+        public = Prompt.objects.create(
+            workspace=other_workspace, title='بازاریابی عمومی', prompt_template='...', is_public=True
+        )
+        Prompt.objects.create(workspace=other_workspace, title='بازاریابی خصوصی', prompt_template='...')
+
+        data = suggest(client, 'بازاریابی')
+
+        assert data['contents'] == []
+        assert [item['id'] for item in data['prompts']] == [public.id]
+
+    def test_normalized_and_case_insensitive(self, client, workspace):
+        """Test that Arabic letters, digits and case don't affect matching."""
+        project = create_project(workspace, 'Blog')
+        content = Content.objects.create(title='كتاب ۱۴۰۳ SEO Guide', project=project)
+
+        assert [item['id'] for item in suggest(client, 'کتاب 1403')['contents']] == [content.id]
+        assert [item['id'] for item in suggest(client, 'seo gui')['contents']] == [content.id]
+
+    def test_closest_titles_first_and_limited(self, client, workspace):
+        project = create_project(workspace, 'Blog')
+        for title in ('بازاریابی محتوا در شبکه‌های اجتماعی', 'بازاریابی', 'بازاریابی محتوا'):
+            Content.objects.create(title=title, project=project)
+
+        data = suggest(client, 'بازاریابی', limit=2)
+
+        assert [item['title'] for item in data['contents']] == ['بازاریابی', 'بازاریابی محتوا']
+
+    def test_short_query_suggests_nothing(self, client, workspace):
+        Content.objects.create(title='ab', project=create_project(workspace, 'ab'))
+
+        data = suggest(client, 'ab')
+
+        assert data['contents'] == [] and data['projects'] == []
+
+    def test_uses_trigram_index(self, client, workspace):
+        """Test that the content title lookup can use its trigram index."""
+        with CaptureQueriesContext(connection) as queries:
+            suggest(client, 'بازاریابی')
+
+        sql = [query['sql'] for query in queries if 'FROM "contents"' in query['sql']][-1]
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row for row, in cursor.fetchall())
+        assert 'contents_title_trgm' in plan
@@ -0,0 +1,133 @@
+"""
+Tests for ?fields= and ?exclude= on read endpoints.
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from ai.models import AiJob
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def content(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+    return Content.objects.create(
+        title="Post", body="متن " * 500, metadata={'seo': 'x'}, project=project, created_by=user
+    )
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def get_with_sql(client, url, table, **params):
+    """GET url, returning the data and the SQL of the last query on table."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    sql = [query['sql'] for query in queries if f'FROM "{table}"' in query['sql']][-1]
+    return response.data, sql
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """Test choosing the returned fields and the columns read for them."""
+
+    def test_fields(self, client, content):
+        data, sql = get_with_sql(client, f'/api/contents/{content.id}/', 'contents', fields='id,title,project_name')
+
+        assert data == {'id': content.id, 'title': 'Post', 'project_name': 'Blog'}
+        assert '"contents"."body"' not in sql
+        assert '"contents"."metadata"' not in sql
+        assert '"contents"."title"' in sql
+
+    def test_exclude(self, client, content):
+        data, sql = get_with_sql(client, f'/api/contents/{content.id}/', 'contents', exclude='body,pii_warnings')
+
+        assert 'body' not in data and 'pii_warnings' not in data
+        assert data['metadata'] == {'seo': 'x'}
+        assert '"contents"."body"' not in sql
+        assert '"contents"."metadata"' in sql
+
+    def test_list_never_reads_body(self, client, content):
+        """Test that columns the list serializer doesn't return aren't read even without ?fields=."""
+        data, sql = get_with_sql(client, '/api/contents/', 'contents')
+
+        assert data['results'][0]['title'] == 'Post'
+        assert '"contents"."body"' not in sql
+        assert '"contents"."search_vector"' not in sql
+
+    def test_cursor_pages_keep_ordering_column(self, client, content):
+        """Test that a cursor page of only IDs doesn't reload created_at row by row."""
+        for i in range(25):
+            Content.objects.create(title=f"Post {i}", project=content.project, created_by=content.created_by)
+        first = client.get('/api/contents/', {'fields': 'id'}).data
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(first['next'])
+
+        assert set(response.data['results'][0]) == {'id'}
+        assert len([query for query in queries if 'FROM "contents"' in query['sql']]) == 1
+
+    def test_job_results_left_out_of_list(self, client, content):
+        AiJob.objects.create(
+            content=content, user=content.created_by, workspace=content.project.workspace,
+            kind='caption', params={'topic': 'x'}, result_data={'text': 'y' * 1000}
+        )
+
+        data, sql = get_with_sql(client, '/api/ai/jobs/', 'ai_jobs', exclude='params,result_data')
+
+        assert 'result_data' not in data['results'][0] and data['results'][0]['kind'] == 'caption'
+        assert '"result_data"' not in sql and '"params"' not in sql
+
+    def test_unknown_fields_are_ignored(self, client, content):
+        data = client.get(f'/api/contents/{content.id}/', {'fields': 'title,nope'}).data
+
+        assert data == {'title': 'Post'}
+
+    def test_writes_are_unaffected(self, client, content):
+        response = client.patch(f'/api/contents/{content.id}/?fields=id', {'title': 'New'}, format='json')
+
+        assert response.data['title'] == 'New'
+        assert 'body' in response.data
+
+
+@pytest.mark.django_db
+class TestVersionFieldsets:
+    """Test sparse fieldsets on delta-stored versions."""
+
+    @pytest.fixture(autouse=True)
+    def history(self, content, settings):
+        settings.CONTENT_VERSION_STORAGE = 'delta'
+        self.bodies = [f"نسخه {number} " + "متن " * 200 for number in range(1, 5)]
+        for number, body in enumerate(self.bodies, start=1):
+            ContentVersion.objects.create(content=content, version_number=number, title="Post", body_markdown=body)
+        cache.clear()
+
+    def test_without_body_reads_no_chain(self, client, content):
+        data, sql = get_with_sql(
+            client, '/api/content-versions/', 'content_versions', content=content.id, fields='id,version_number'
+        )
+
+        assert [version['version_number'] for version in data['results']] == [4, 3, 2, 1]
+        assert '"delta"' not in sql and '"body_markdown"' not in sql
+
+    def test_body_rebuilds(self, client, content):
+        data = client.get('/api/content-versions/', {'content': content.id, 'fields': 'body_markdown'}).data
+
+        assert [version['body_markdown'] for version in data['results']] == self.bodies[::-1]
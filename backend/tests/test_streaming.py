@@ -0,0 +1,156 @@
+"""
+Tests for streaming content generation.
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+from accounts.models import Organization, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from ai.models import AiJob, UsageLog
+from ai.pii import redact_pii
+from ai.streaming import PartialOutputWriter, consume_completion_stream, get_partial_output
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    """Keep partial output in a local cache during tests."""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_chunk(text=None, usage=None):
+    """Build a fake chat completion chunk."""
+    if text is None:
+        return Mock(choices=[], usage=usage)
+    return Mock(choices=[Mock(delta=Mock(content=text))], usage=usage)
+
+
+def make_stream(parts, prompt_tokens=100, completion_tokens=200):
+    """Build a fake stream ending with a usage-only chunk."""
+    chunks = [make_chunk(part) for part in parts]
+    chunks.append(make_chunk(usage=Mock(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )))
+    return chunks
+
+
+class TestPartialOutputWriter:
+    """Test partial output buffering."""
+
+    def test_flush_interval_bounds_writes(self):
+        """Test that chunks within the interval are not written individually."""
+        writer = PartialOutputWriter(job_id=1, flush_interval=60)
+
+        for part in ['سلام', ' ', 'دنیا']:
+            writer.append(part)
+
+        # Only the first append flushes, the rest wait for the interval
+        assert writer.flush_count == 1
+        assert get_partial_output(1)['text'] == 'سلام'
+
+        writer.flush()
+        assert writer.flush_count == 2
+        assert get_partial_output(1)['text'] == 'سلام دنیا'
+
+        writer.clear()
+        assert get_partial_output(1) is None
+
+    def test_transform_applied_on_flush(self):
+        """Test that the transform is applied to flushed text only."""
+        writer = PartialOutputWriter(job_id=2, flush_interval=0, transform=lambda text, final: text.upper())
+        writer.append('abc')
+
+        assert get_partial_output(2)['text'] == 'ABC'
+        assert writer.text == 'abc'
+
+    def test_pii_restored_across_chunks(self):
+        """Test that placeholders split between chunks are restored as they complete."""
+        _, _, redactor = redact_pii('تماس با 09123456789 یا test@example.com')
+        writer = PartialOutputWriter(job_id=4, flush_interval=0, transform=redactor.restore_stream().feed)
+
+        writer.append('تماس با [PHO')
+        assert get_partial_output(4)['text'] == 'تماس با '
+
+        writer.append('NE_1] یا [EMAIL_1')
+        assert get_partial_output(4)['text'] == 'تماس با 09123456789 یا '
+
+        writer.flush(final=True)
+        assert get_partial_output(4)['text'] == 'تماس با 09123456789 یا [EMAIL_1'
+
+    @patch('ai.streaming.publish_job_event')
+    def test_flushes_publish_only_new_text(self, mock_publish):
+        """Test that each partial event carries the new chunk and its offset."""
+        writer = PartialOutputWriter(job_id=5, flush_interval=0, transform=lambda text, final: text.upper())
+
+        for part in ['ab', 'cde', 'f']:
+            writer.append(part)
+
+        assert [call.args[2] for call in mock_publish.call_args_list] == [
+            {'offset': 0, 'text': 'AB'},
+            {'offset': 2, 'text': 'CDE'},
+            {'offset': 5, 'text': 'F'},
+        ]
+        assert get_partial_output(5)['text'] == 'ABCDEF'
+
+    def test_consume_stream_records_stats(self):
+        """Test that consuming a stream returns text, usage and timings."""
+        writer = PartialOutputWriter(job_id=3, flush_interval=0)
+
+        text, usage, stats = consume_completion_stream(
+            make_stream(['# عنوان', '\n\n', 'متن']), writer, start_time=0
+        )
+
+        assert text == '# عنوان\n\nمتن'
+        assert usage.total_tokens == 300
+        assert stats['chunks'] == 3
+        assert stats['time_to_first_token'] is not None
+        assert get_partial_output(3)['text'] == text
+
+
+@pytest.mark.django_db
+class TestStreamingGeneration:
+    """Test generate_content_task in streaming mode."""
+
+    @pytest.fixture
+    def job(self):
+        org = Organization.objects.create(name="Test Org", slug="test-org")
+        workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+        user = User.objects.create_user(phone_number="09121111111")
+        project = Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+        content = Content.objects.create(title="Test Blog Post", project=project, created_by=user)
+        return AiJob.objects.create(
+            content=content,
+            user=user,
+            workspace=workspace,
+            kind='outline',
+            params={'kind': 'outline', 'topic': 'تست', 'stream': True, 'use_cache': False}
+        )
+
+    @patch('ai.client.get_openai_client')
+    def test_streaming_creates_single_version(self, mock_client, job):
+        """Test that streaming writes one version at the end with stream stats."""
+        mock_client.return_value.chat.completions.create.return_value = make_stream(
+            ['# عنوان', '\n\n', 'محتوای تولید شده']
+        )
+
+        from ai.tasks import generate_content_task
+        result = generate_content_task(job.content_id, job.params, job.id)
+
+        _, kwargs = mock_client.return_value.chat.completions.create.call_args
+        assert kwargs['stream'] is True
+
+        assert result['success'] is True
+        assert ContentVersion.objects.filter(content_id=job.content_id).count() == 1
+
+        version = ContentVersion.objects.get(content_id=job.content_id)
+        assert version.body_markdown == '# عنوان\n\nمحتوای تولید شده'
+        assert version.metadata['stream_stats']['chunks'] == 3
+
+        job.refresh_from_db()
+        assert job.status == AiJob.Status.COMPLETED
+        assert 'time_to_first_token' in job.result_data['stream_stats']
+
+        # Partial output is cleared once the version is saved
+        assert get_partial_output(job.id) is None
+        assert UsageLog.objects.get(ai_job=job).total_tokens == 300
@@ -0,0 +1,328 @@
+"""
+Tests for organization (tenant) scoping.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Prompt, Content, ContentVersion
+from ai.models import AiJob, UsageLimit, UsageLog
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+def create_tenant(slug):
+    org = Organization.objects.create(name=slug, slug=slug)
+    workspace = Workspace.objects.create(name=slug, slug=slug, organization=org)
+    project = Project.objects.create(name=slug, slug=slug, workspace=workspace)
+    return project
+
+
+@pytest.fixture
+def project(user):
+    project = create_tenant('mine')
+    OrganizationMember.objects.create(
+        user=user, organization=project.workspace.organization, role=OrganizationMember.Role.WRITER
+    )
+    return project
+
+
+@pytest.fixture
+def other_project():
+    return create_tenant('other')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_history(project):
+    content = Content.objects.create(title=project.name, project=project)
+    ContentVersion.objects.create(content=content, version_number=1, title=content.title, body_markdown='متن')
+    AiJob.objects.create(content=content, workspace=project.workspace, kind='draft')
+    return content
+
+
+def ids(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200
+    return [item['id'] for item in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestDenormalizedOrganization:
+    """Test that organization_id follows the project and workspace."""
+
+    def test_set_on_create(self, project):
+        content = create_history(project)
+        organization_id = project.workspace.organization_id
+
+        assert content.organization_id == organization_id
+        assert ContentVersion.objects.get(content=content).organization_id == organization_id
+        assert AiJob.objects.get(content=content).organization_id == organization_id
+
+    def test_moving_content_moves_versions(self, project, other_project):
+        content = create_history(project)
+
+        content = Content.objects.get(id=content.id)
+        content.project = other_project
+        content.save()
+
+        organization_id = other_project.workspace.organization_id
+        assert Content.objects.get(id=content.id).organization_id == organization_id
+        assert ContentVersion.objects.get(content=content).organization_id == organization_id
+
+    def test_moving_project_and_workspace(self, project, other_project):
+        content = create_history(project)
+        other_organization = other_project.workspace.organization
+
+        moved_project = Project.objects.get(id=project.id)
+        moved_project.workspace = other_project.workspace
+        moved_project.save()
+
+        assert Content.objects.get(id=content.id).organization_id == other_organization.id
+        assert ContentVersion.objects.get(content=content).organization_id == other_organization.id
+
+        workspace = Workspace.objects.get(id=project.workspace_id)
+        workspace.organization = other_organization
+        workspace.save()
+
+        assert AiJob.objects.get(content=content).organization_id == other_organization.id
+
+    def test_unmoved_saves_run_no_sync(self, project, django_assert_num_queries):
+        content = create_history(project)
+        content = Content.objects.get(id=content.id)
+
+        with django_assert_num_queries(1):
+            content.save()
+
+
+@pytest.mark.django_db
+class TestTenantScoping:
+    """Test that API lists and lookups only see the caller's organizations."""
+
+    def test_contents_versions_and_jobs(self, client, project, other_project):
+        mine = create_history(project)
+        other = create_history(other_project)
+
+        assert ids(client, '/api/contents/') == [mine.id]
+        assert ids(client, '/api/content-versions/') == [mine.versions.get().id]
+        assert ids(client, '/api/ai/jobs/') == [mine.ai_jobs.get().id]
+        assert ids(client, '/api/projects/') == [project.id]
+        assert client.get(f'/api/contents/{other.id}/').status_code == 404
+        assert client.get(f'/api/contents/{other.id}/versions/').status_code == 404
+        assert client.patch(f'/api/contents/{other.id}/', {'title': 'x'}, format='json').status_code == 404
+
+    def test_usage_and_audit_logs(self, client, project, other_project):
+        for tenant in (project, other_project):
+            UsageLog.objects.create(
+                workspace=tenant.workspace, organization=tenant.workspace.organization, model='gpt-4o-mini',
+                prompt_tokens=1, completion_tokens=1, total_tokens=2, estimated_cost=0
+            )
+
+        assert [log['organization'] for log in client.get('/api/ai/usage-logs/').data['results']] == [
+            project.workspace.organization_id
+        ]
+
+    def test_public_prompts_are_readable_not_writable(self, client, project, other_project):
+        mine = Prompt.objects.create(workspace=project.workspace, title='mine', prompt_template='...')
+        public = Prompt.objects.create(
+            workspace=other_project.workspace, title='public', prompt_template='...', is_public=True
+        )
+        Prompt.objects.create(workspace=other_project.workspace, title='private', prompt_template='...')
+
+        assert sorted(ids(client, '/api/prompts/')) == sorted([mine.id, public.id])
+        assert client.patch(f'/api/prompts/{public.id}/', {'title': 'x'}, format='json').status_code == 404
+
+    def test_single_indexed_predicate(self, client, project):
+        """Test that contents are scoped on their own organization_id, not through workspaces."""
+        create_history(project)
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/api/contents/')
+
+        sql = [query['sql'] for query in queries if 'FROM "contents"' in query['sql']][-1]
+        assert f'"contents"."organization_id" IN ({project.workspace.organization_id})' in sql
+        assert '"workspaces"' not in sql
+
+
+@pytest.mark.django_db
+class TestMemberManagement:
+    """Test that memberships, which drive the scoping, are only managed by admins."""
+
+    def test_cannot_join_other_organization(self, client, user, other_project):
+        organization = other_project.workspace.organization
+
+        response = client.post('/api/auth/organization-members/', {
+            'user_id': user.id, 'organization': organization.id, 'role': OrganizationMember.Role.ADMIN
+        }, format='json')
+
+        assert response.status_code == 403
+        assert not OrganizationMember.objects.filter(user=user, organization=organization).exists()
+
+    def test_only_admins_manage_members(self, client, user, project):
+        organization = project.workspace.organization
+        colleague = User.objects.create_user(phone_number="+989122222222")
+        member = OrganizationMember.objects.create(user=colleague, organization=organization)
+        url = f'/api/auth/organization-members/{member.id}/'
+
+        assert client.patch(url, {'role': OrganizationMember.Role.ADMIN}, format='json').status_code == 403
+        assert client.delete(url).status_code == 403
+
+        membership = OrganizationMember.objects.get(user=user)
+        membership.role = OrganizationMember.Role.ADMIN
+        membership.save()
+        assert client.patch(url, {'role': OrganizationMember.Role.EDITOR}, format='json').status_code == 200
+        assert client.delete(url).status_code == 204
+
+    def test_members_of_other_organizations_are_hidden(self, client, project, other_project):
+        stranger = User.objects.create_user(phone_number="+989122222222")
+        member = OrganizationMember.objects.create(user=stranger, organization=other_project.workspace.organization)
+
+        assert len(ids(client, '/api/auth/organization-members/')) == 1
+        assert client.delete(f'/api/auth/organization-members/{member.id}/').status_code == 404
+
+    def test_creator_administers_new_organization(self, client, user):
+        response = client.post('/api/auth/organizations/', {'name': 'New', 'slug': 'new'}, format='json')
+
+        assert response.status_code == 201
+        assert OrganizationMember.objects.get(user=user, organization_id=response.data['id']).role == (
+            OrganizationMember.Role.ADMIN
+        )
+
+
+@pytest.mark.django_db
+class TestCrossTenantWrites:
+    """Test that rows can't be created in or moved to another organization."""
+
+    def test_foreign_project_and_workspace_rejected(self, client, project, other_project):
+        other_workspace = other_project.workspace
+
+        for url, data, field in (
+            ('/api/contents/', {'title': 'x', 'project': other_project.id}, 'project'),
+            ('/api/projects/', {'name': 'x', 'slug': 'x', 'workspace': other_workspace.id}, 'workspace'),
+            ('/api/prompts/', {'title': 'x', 'prompt_template': '...', 'workspace': other_workspace.id}, 'workspace'),
+        ):
+            response = client.post(url, data, format='json')
+
+            assert response.status_code == 400
+            assert field in response.data
+
+        assert not Content.objects.filter(organization=other_workspace.organization).exists()
+        assert not Project.objects.filter(workspace=other_workspace).exclude(id=other_project.id).exists()
+
+    def test_content_cannot_move_to_foreign_project(self, client, project, other_project):
+        content = Content.objects.create(title='Post', project=project)
+
+        response = client.patch(f'/api/contents/{content.id}/', {'project': other_project.id}, format='json')
+
+        assert response.status_code == 400
+        assert Content.objects.get(id=content.id).organization_id == project.workspace.organization_id
+
+    def test_foreign_private_prompt_rejected_public_allowed(self, client, project, other_project):
+        private = Prompt.objects.create(workspace=other_project.workspace, title='p', prompt_template='...')
+        public = Prompt.objects.create(
+            workspace=other_project.workspace, title='q', prompt_template='...', is_public=True
+        )
+
+        def create(prompt):
+            return client.post('/api/contents/', {
+                'title': 'x', 'project': project.id, 'prompt': prompt.id
+            }, format='json').status_code
+
+        assert create(private) == 400
+        assert create(public) == 201
+
+
+def make_admin(user):
+    membership = OrganizationMember.objects.get(user=user)
+    membership.role = OrganizationMember.Role.ADMIN
+    membership.save()
+
+
+@pytest.mark.django_db
+class TestOrganizationAdministration:
+    """Test that organizations, workspaces and usage limits are scoped and only changed by admins."""
+
+    def test_other_organizations_and_workspaces_are_hidden(self, client, project, other_project):
+        other_workspace = other_project.workspace
+
+        assert ids(client, '/api/auth/organizations/') == [project.workspace.organization_id]
+        assert ids(client, '/api/auth/workspaces/') == [project.workspace_id]
+        assert client.patch(
+            f'/api/auth/organizations/{other_workspace.organization_id}/', {'name': 'x'}, format='json'
+        ).status_code == 404
+        assert client.delete(f'/api/auth/workspaces/{other_workspace.id}/').status_code == 404
+
+    def test_only_admins_change_organizations_and_workspaces(self, client, user, project):
+        workspace = project.workspace
+        organization_url = f'/api/auth/organizations/{workspace.organization_id}/'
+        workspace_url = f'/api/auth/workspaces/{workspace.id}/'
+
+        assert client.patch(organization_url, {'name': 'x'}, format='json').status_code == 403
+        assert client.patch(workspace_url, {'name': 'x'}, format='json').status_code == 403
+        assert client.post('/api/auth/workspaces/', {
+            'name': 'x', 'slug': 'x', 'organization': workspace.organization_id
+        }, format='json').status_code == 403
+
+        make_admin(user)
+        assert client.patch(organization_url, {'name': 'x'}, format='json').status_code == 200
+        assert client.patch(workspace_url, {'name': 'x'}, format='json').status_code == 200
+
+    def test_workspace_cannot_move_to_foreign_organization(self, client, user, project, other_project):
+        make_admin(user)
+        other_organization = other_project.workspace.organization
+
+        for response in (
+            client.post('/api/auth/workspaces/', {
+                'name': 'x', 'slug': 'x', 'organization': other_organization.id
+            }, format='json'),
+            client.patch(f'/api/auth/workspaces/{project.workspace_id}/', {
+                'organization': other_organization.id
+            }, format='json'),
+        ):
+            assert response.status_code == 403
+
+        assert Workspace.objects.get(id=project.workspace_id).organization_id == project.workspace.organization_id
+
+    def test_usage_limits_of_other_organizations_are_hidden(self, client, user, project, other_project):
+        mine = UsageLimit.objects.create(scope=UsageLimit.Scope.WORKSPACE, scope_id=project.workspace_id)
+        UsageLimit.objects.create(scope=UsageLimit.Scope.WORKSPACE, scope_id=other_project.workspace_id)
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.ORGANIZATION, scope_id=other_project.workspace.organization_id
+        )
+        own = UsageLimit.objects.create(scope=UsageLimit.Scope.USER, scope_id=user.id)
+        stranger = User.objects.create_user(phone_number="+989122222222")
+        UsageLimit.objects.create(scope=UsageLimit.Scope.USER, scope_id=stranger.id)
+
+        assert sorted(ids(client, '/api/ai/usage-limits/')) == sorted([mine.id, own.id])
+
+    def test_only_admins_set_usage_limits(self, client, user, project, other_project):
+        url = '/api/ai/usage-limits/'
+        organization_id = project.workspace.organization_id
+
+        def create(scope, scope_id):
+            return client.post(url, {'scope': scope, 'scope_id': scope_id, 'tokens_limit': 100}, format='json')
+
+        assert create(UsageLimit.Scope.ORGANIZATION, organization_id).status_code == 403
+
+        make_admin(user)
+        response = create(UsageLimit.Scope.ORGANIZATION, organization_id)
+        assert response.status_code == 201
+        assert create(UsageLimit.Scope.WORKSPACE, project.workspace_id).status_code == 201
+        assert create(UsageLimit.Scope.WORKSPACE, other_project.workspace_id).status_code == 403
+        assert create(UsageLimit.Scope.USER, user.id).status_code == 403
+
+        # Nor can a limit be moved to another organization
+        assert client.patch(f"{url}{response.data['id']}/", {
+            'scope_id': other_project.workspace.organization_id
+        }, format='json').status_code == 403
+        assert UsageLimit.objects.get(id=response.data['id']).scope_id == organization_id
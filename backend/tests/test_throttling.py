@@ -8,7 +8,7 @@ from rest_framework import status
 from unittest.mock import patch
 from time import sleep
 
-from accounts.models import Organization, Workspace
+from accounts.models import Organization, OrganizationMember, Workspace
 from contentmgmt.models import Project, Content, Prompt
 
 User = get_user_model()
@@ -38,6 +38,11 @@ class ThrottlingTestCase(TestCase):
             name='Test Org',
             slug='test-org'
         )
+        OrganizationMember.objects.create(
+            user=self.user,
+            organization=self.org,
+            role=OrganizationMember.Role.ADMIN
+        )
         self.workspace = Workspace.objects.create(
             organization=self.org,
             name='Test Workspace',
@@ -71,7 +76,7 @@ class ThrottlingTestCase(TestCase):
         for i in range(5):
             response = self.client.post('/api/auth/otp/request/', {
                 'phone_number': phone
-            })
+            }, format='json')
             self.assertIn(
                 response.status_code,
                 [status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS],
@@ -81,7 +86,7 @@ class ThrottlingTestCase(TestCase):
         # 6th request should be throttled
         response = self.client.post('/api/auth/otp/request/', {
             'phone_number': phone
-        })
+        }, format='json')
         
         # Should be throttled (429) or rate limited by OTP service
         self.assertIn(
@@ -99,7 +104,7 @@ class ThrottlingTestCase(TestCase):
             for i in range(3):
                 response = self.client.post('/api/auth/otp/request/', {
                     'phone_number': phone
-                })
+                }, format='json')
                 # May get 200 OK or 429 from IP throttle
                 self.assertIn(
                     response.status_code,
@@ -110,7 +115,7 @@ class ThrottlingTestCase(TestCase):
             # Additional requests should eventually be throttled
             response = self.client.post('/api/auth/otp/request/', {
                 'phone_number': phone
-            })
+            }, format='json')
             # Should be throttled or rate limited
             self.assertIn(
                 response.status_code,
@@ -132,7 +137,8 @@ class ThrottlingTestCase(TestCase):
                         'kind': 'draft',
                         'topic': f'Test topic {i}',
                         'min_words': 100
-                    }
+                    },
+                    format='json'
                 )
                 # Should be accepted (202) or throttled (429)
                 self.assertIn(
@@ -148,7 +154,8 @@ class ThrottlingTestCase(TestCase):
                     'kind': 'draft',
                     'topic': 'Test topic overflow',
                     'min_words': 100
-                }
+                },
+                format='json'
             )
             
             # Should likely be throttled at this point
@@ -165,6 +172,11 @@ class ThrottlingTestCase(TestCase):
             phone_number='+989333333333',
             is_active=True
         )
+        OrganizationMember.objects.create(
+            user=user2,
+            organization=self.org,
+            role=OrganizationMember.Role.ADMIN
+        )
         
         content2 = Content.objects.create(
             project=self.project,
@@ -181,14 +193,16 @@ class ThrottlingTestCase(TestCase):
             for i in range(5):
                 response = self.client.post(
                     f'/api/contents/{self.content.id}/generate/',
-                    {'kind': 'draft', 'topic': f'User1 topic {i}', 'min_words': 100}
+                    {'kind': 'draft', 'topic': f'User1 topic {i}', 'min_words': 100},
+                    format='json'
                 )
             
             # User 2 should have their own throttle limit
             self.client.force_authenticate(user=user2)
             response = self.client.post(
                 f'/api/contents/{content2.id}/generate/',
-                {'kind': 'draft', 'topic': 'User2 topic', 'min_words': 100}
+                {'kind': 'draft', 'topic': 'User2 topic', 'min_words': 100},
+                format='json'
             )
             
             # User 2's first request should succeed
@@ -207,7 +221,7 @@ class ThrottleHeadersTestCase(TestCase):
         
         response = client.post('/api/auth/otp/request/', {
             'phone_number': '+989444444444'
-        })
+        }, format='json')
         
         # DRF may include throttle headers
         # (Exact headers depend on DRF configuration)
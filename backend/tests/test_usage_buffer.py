@@ -0,0 +1,176 @@
+"""
+Tests for buffered usage log writes and idempotency keys.
+"""
+import threading
+
+import pytest
+from decimal import Decimal
+from django.db import connection, transaction
+
+from accounts.models import Organization, Workspace, User
+from core.celery import flush_usage_log_buffer_on_shutdown
+from core.redis import get_redis_client
+from ai.counters import get_usage_counters
+from ai.models import UsageLog, UsageRollupHourly
+from ai.services import log_ai_usage
+from ai.usage_writer import (
+    CONSUMER_GROUP, STREAM_KEY, build_usage_log, buffer_usage_log, flush_usage_log_buffer, write_usage_logs
+)
+
+
+@pytest.fixture
+def buffered(settings):
+    settings.AI_USAGE_LOG_BUFFERED = True
+
+
+@pytest.fixture
+def workspace():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+def log_usage(workspace, user, **kwargs):
+    return log_ai_usage(
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model='gpt-4o-mini',
+        prompt_tokens=100,
+        completion_tokens=200,
+        total_tokens=300,
+        estimated_cost=0.25,
+        **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestBufferedWrites:
+    """Test buffering usage in Redis and flushing it in bulk."""
+
+    def test_usage_is_written_on_flush(self, buffered, workspace, user, django_capture_on_commit_callbacks):
+        """Test that buffered usage counts right away and is inserted on flush."""
+        get_usage_counters('workspace', workspace.id, 'monthly')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            log = log_usage(workspace, user)
+
+        assert not UsageLog.objects.exists()
+        assert get_redis_client().xlen(STREAM_KEY) == 1
+        assert get_usage_counters('workspace', workspace.id, 'monthly')['requests'] == 1
+
+        assert flush_usage_log_buffer() == 1
+
+        saved = UsageLog.objects.get()
+        assert saved.idempotency_key == log.idempotency_key
+        assert saved.timestamp == log.timestamp
+        assert saved.estimated_cost == Decimal('0.25')
+        assert UsageRollupHourly.objects.get().requests == 1
+        assert get_redis_client().xlen(STREAM_KEY) == 0
+
+    def test_flush_uses_bulk_insert(self, workspace, user, django_assert_num_queries):
+        """Test that a batch of events is written with a fixed number of queries."""
+        for _ in range(50):
+            buffer_usage_log(build_usage_log(
+                workspace=workspace, organization=workspace.organization, user=user, model='gpt-4o-mini',
+                prompt_tokens=1, completion_tokens=1, total_tokens=2, estimated_cost=Decimal('0.01')
+            ))
+
+        # Key locks, seen keys, the insert and two rollup upserts, with their savepoints
+        with django_assert_num_queries(9):
+            assert flush_usage_log_buffer() == 50
+
+        assert UsageRollupHourly.objects.get().requests == 50
+
+    def test_redelivered_events_count_once(self, workspace, user, settings):
+        """Test at-least-once delivery with idempotent inserts."""
+        settings.AI_USAGE_LOG_CLAIM_IDLE = 0
+        log = build_usage_log(
+            workspace=workspace, model='gpt-4o-mini', prompt_tokens=1, completion_tokens=1,
+            total_tokens=2, estimated_cost=Decimal('0.01')
+        )
+        buffer_usage_log(log)
+        buffer_usage_log(log)
+
+        # A flusher reads the events, then dies before acknowledging them
+        client = get_redis_client()
+        client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id='0')
+        client.xreadgroup(CONSUMER_GROUP, 'crashed', {STREAM_KEY: '>'})
+
+        assert flush_usage_log_buffer() == 1
+        assert UsageLog.objects.count() == 1
+        assert client.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'] == 0
+
+    def test_shutdown_hook_flushes(self, buffered, workspace, user, django_capture_on_commit_callbacks):
+        """Test that the worker shutdown hook drains the buffer."""
+        with django_capture_on_commit_callbacks(execute=True):
+            log_usage(workspace, user)
+
+        flush_usage_log_buffer_on_shutdown()
+
+        assert UsageLog.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestIdempotentLogging:
+    """Test idempotency keys on direct writes."""
+
+    def test_same_key_logs_once(self, workspace, user, django_capture_on_commit_callbacks):
+        """Test that usage logged twice under one key counts once."""
+        with django_capture_on_commit_callbacks(execute=True):
+            first = log_usage(workspace, user, idempotency_key='job-1-0')
+            second = log_usage(workspace, user, idempotency_key='job-1-0')
+
+        assert first.id == second.id
+        assert UsageLog.objects.count() == 1
+        assert UsageRollupHourly.objects.get().requests == 1
+        assert get_usage_counters('workspace', workspace.id, 'monthly')['requests'] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentWrites:
+    """Test idempotency keys under concurrent direct writes."""
+
+    def test_concurrent_redeliveries_insert_once(self, workspace):
+        """Test that two writers of one key, stamped apart, insert it once."""
+        written = threading.Event()
+        release = threading.Event()
+        results = {}
+
+        def write(name, hold=False):
+            try:
+                log = build_usage_log(
+                    idempotency_key='job-1-0', workspace=workspace, organization=workspace.organization,
+                    model='gpt-4o-mini', prompt_tokens=1, completion_tokens=1, total_tokens=2,
+                    estimated_cost=Decimal('0.01')
+                )
+                with transaction.atomic():
+                    results[name] = write_usage_logs([log])
+                    if hold:
+                        written.set()
+                        release.wait(5)
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=write, args=('first', True))
+        first.start()
+        assert written.wait(5)
+
+        second = threading.Thread(target=write, args=('second',))
+        second.start()
+        second.join(0.5)
+        # Waiting for the first writer to commit
+        assert second.is_alive()
+
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        assert len(results['first']) == 1
+        assert results['second'] == []
+        assert UsageLog.objects.count() == 1
+        assert UsageRollupHourly.objects.get().requests == 1
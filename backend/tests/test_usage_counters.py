@@ -0,0 +1,96 @@
+"""
+Tests for Redis-backed usage counters.
+"""
+import pytest
+from decimal import Decimal
+
+from accounts.models import Organization, Workspace, User
+from core.redis import get_redis_client
+from ai.counters import (
+    get_counter_key, get_period_start, get_usage_counters, reconcile_usage_counters
+)
+from ai.models import UsageLimit, UsageLog
+from ai.services import check_workspace_usage_limits, log_ai_usage
+
+
+@pytest.fixture
+def workspace():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+def log_usage(workspace, user, cost, success=True):
+    return log_ai_usage(
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model='gpt-4o-mini',
+        prompt_tokens=100,
+        completion_tokens=200,
+        total_tokens=300,
+        estimated_cost=cost,
+        success=success
+    )
+
+
+@pytest.mark.django_db
+class TestUsageCounters:
+    """Test counter maintenance and limit checks."""
+
+    def test_counters_follow_logged_usage(self, workspace, user, django_capture_on_commit_callbacks):
+        """Test that counters are built once and then incremented per log."""
+        UsageLog.objects.create(
+            workspace=workspace, model='gpt-4o-mini', prompt_tokens=10, completion_tokens=10,
+            total_tokens=20, estimated_cost=Decimal('0.5')
+        )
+        assert get_usage_counters('workspace', workspace.id, 'monthly') == {
+            'requests': 1, 'tokens': 20, 'cost': Decimal('0.5')
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            log_usage(workspace, user, 0.25)
+            log_usage(workspace, user, 0, success=False)
+
+        assert get_usage_counters('workspace', workspace.id, 'monthly') == {
+            'requests': 3, 'tokens': 320, 'cost': Decimal('0.75')
+        }
+        assert get_usage_counters('organization', workspace.organization_id, 'daily')['requests'] == 2
+        assert get_usage_counters('user', user.id, 'monthly')['cost'] == Decimal('0.25')
+
+    def test_limit_check_reads_counters(self, workspace, user, django_assert_num_queries,
+                                        django_capture_on_commit_callbacks):
+        """Test that the check no longer aggregates usage_logs."""
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.WORKSPACE,
+            scope_id=workspace.id,
+            cost_limit=Decimal('1.00')
+        )
+        get_usage_counters('workspace', workspace.id, 'monthly')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            log_usage(workspace, user, 1.5)
+
+        # Limit lookup and active reservations only
+        with django_assert_num_queries(2):
+            ok, message = check_workspace_usage_limits(workspace)
+
+        assert ok is False
+        assert 'budget exceeded' in message
+
+    def test_reconcile_rebuilds_from_usage_log(self, workspace, user):
+        """Test that reconciliation corrects drifted counters."""
+        log_usage(workspace, user, 0.25)
+        key = get_counter_key('workspace', workspace.id, 'monthly', get_period_start('monthly'))
+        get_redis_client().hset(key, mapping={'requests': 99, 'tokens': 0, 'cost_micros': 0, 'built': 1})
+
+        # user, workspace and organization for both periods
+        assert reconcile_usage_counters() == 6
+
+        assert get_usage_counters('workspace', workspace.id, 'monthly') == {
+            'requests': 1, 'tokens': 300, 'cost': Decimal('0.25')
+        }
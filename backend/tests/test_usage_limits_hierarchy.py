@@ -0,0 +1,141 @@
+"""
+Tests for the combined user, workspace and organization limit check.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content
+from ai.models import AiJob, UsageLimit, UsageLog
+from ai.services import evaluate_usage_limits
+from ai.tasks import generate_content_task
+
+
+@pytest.fixture(autouse=True)
+def clean_state(settings):
+    """Start every test without cached stats."""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+@pytest.fixture
+def content(user):
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    project = Project.objects.create(name="Test Project", slug="test-project", workspace=workspace, created_by=user)
+    return Content.objects.create(title="Test Content", project=project, created_by=user)
+
+
+def spend(workspace, cost, user=None):
+    """Record successful usage of a workspace."""
+    UsageLog.objects.create(
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model='gpt-4o-mini',
+        prompt_tokens=100,
+        completion_tokens=100,
+        total_tokens=200,
+        estimated_cost=Decimal(cost)
+    )
+
+
+@pytest.mark.django_db
+class TestEvaluateUsageLimits:
+    """Test evaluating every scope together."""
+
+    def test_within_limits(self, content, user):
+        """Test that nothing blocks a fresh workspace."""
+        assert evaluate_usage_limits(user, content.project.workspace) == (True, "Within limits", None)
+
+    def test_organization_limit_blocks_workspace(self, content, user):
+        """Test that spend elsewhere in the organization counts."""
+        workspace = content.project.workspace
+        sibling = Workspace.objects.create(name="Sibling", slug="sibling", organization=workspace.organization)
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.ORGANIZATION,
+            scope_id=workspace.organization_id,
+            cost_limit=Decimal('1.00')
+        )
+        spend(sibling, '1.50')
+
+        ok, message, scope = evaluate_usage_limits(user, workspace)
+
+        assert ok is False
+        assert scope == UsageLimit.Scope.ORGANIZATION
+        assert message.startswith('Organization')
+
+    def test_user_limit_reported_first(self, content, user):
+        """Test that the narrowest exceeded scope is reported."""
+        workspace = content.project.workspace
+        for scope, scope_id in [(UsageLimit.Scope.USER, user.id),
+                                (UsageLimit.Scope.ORGANIZATION, workspace.organization_id)]:
+            UsageLimit.objects.create(scope=scope, scope_id=scope_id, requests_limit=1)
+        spend(workspace, '0.01', user=user)
+
+        ok, message, scope = evaluate_usage_limits(user, workspace)
+
+        assert ok is False
+        assert scope == UsageLimit.Scope.USER
+        assert message == 'User request limit exceeded: 1/1'
+
+    def test_single_pass(self, content, user, django_assert_num_queries):
+        """Test that all scopes are checked with a fixed number of queries."""
+        workspace = content.project.workspace
+        evaluate_usage_limits(user, workspace)
+
+        # Limits of every scope and the workspace's active reservations
+        with django_assert_num_queries(2):
+            evaluate_usage_limits(user, workspace)
+
+
+@pytest.mark.django_db
+class TestHierarchicalEnforcement:
+    """Test enforcing limits on the generate endpoint and in the task."""
+
+    @patch('ai.tasks.generate_content_task.delay')
+    def test_generate_returns_blocking_scope(self, mock_delay, content, user):
+        """Test that a 402 names the scope that blocked the request."""
+        UsageLimit.objects.create(
+            scope=UsageLimit.Scope.ORGANIZATION,
+            scope_id=content.project.workspace.organization_id,
+            requests_limit=1
+        )
+        spend(content.project.workspace, '0.01')
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(f'/api/contents/{content.id}/generate/', {'kind': 'caption'}, format='json')
+
+        assert response.status_code == 402
+        assert response.data['scope'] == UsageLimit.Scope.ORGANIZATION
+        assert not mock_delay.called
+
+    @patch('ai.client.get_openai_client')
+    def test_task_refuses_when_limit_reached_while_queued(self, mock_client, content, user):
+        """Test that the task re-checks limits before calling the provider."""
+        workspace = content.project.workspace
+        job = AiJob.objects.create(content=content, workspace=workspace, user=user, kind='caption')
+        UsageLimit.objects.create(scope=UsageLimit.Scope.USER, scope_id=user.id, cost_limit=Decimal('1.00'))
+        spend(workspace, '2.00', user=user)
+        content.status = Content.Status.IN_PROGRESS
+        content.save(update_fields=['status'])
+
+        result = generate_content_task(content.id, {'kind': 'caption'}, job.id)
+
+        assert result['success'] is False
+        assert not mock_client.called
+        job.refresh_from_db()
+        assert job.status == AiJob.Status.FAILED
+        assert 'User' in job.error_message
+        content.refresh_from_db()
+        assert content.status == Content.Status.DRAFT
@@ -0,0 +1,148 @@
+"""
+Tests for hourly and daily usage rollups.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+
+from accounts.models import Organization, Workspace, User
+from ai.models import UsageLog, UsageRollupDaily, UsageRollupHourly
+from ai.services import get_usage_summary, log_ai_usage
+
+
+NOW = datetime(2026, 3, 10, 14, 30, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def workspace():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    return Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111")
+
+
+def log_usage(workspace, user, model='gpt-4o-mini', cost='0.01', success=True, cache_hit=False):
+    return log_ai_usage(
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model=model,
+        prompt_tokens=100,
+        completion_tokens=200,
+        total_tokens=300,
+        estimated_cost=Decimal(cost),
+        success=success,
+        cache_hit=cache_hit
+    )
+
+
+def create_log_at(workspace, user, timestamp, model='gpt-4o-mini'):
+    """Create a usage log at a past time, bypassing the rollups."""
+    log = UsageLog.objects.create(
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model=model,
+        prompt_tokens=10,
+        completion_tokens=20,
+        total_tokens=30,
+        estimated_cost=Decimal('0.001')
+    )
+    UsageLog.objects.filter(id=log.id).update(timestamp=timestamp)
+
+
+@pytest.mark.django_db
+class TestRollupMaintenance:
+    """Test that logged usage is added to the rollups."""
+
+    def test_logged_usage_updates_rollups(self, workspace, user):
+        """Test that each log is added to its hourly and daily bucket."""
+        log_usage(workspace, user, cost='0.25')
+        log_usage(workspace, user, cost='0.25', cache_hit=True)
+        log_usage(workspace, user, success=False)
+
+        for rollup_model in (UsageRollupHourly, UsageRollupDaily):
+            rollup = rollup_model.objects.get()
+            assert rollup.workspace_id == workspace.id
+            assert rollup.organization_id == workspace.organization_id
+            assert rollup.user_id == user.id
+            assert rollup.requests == 2
+            assert rollup.failed_requests == 1
+            assert rollup.total_tokens == 600
+            assert rollup.cost == Decimal('0.5')
+            assert rollup.cache_hits == 1
+            assert rollup.cache_completion_tokens == 200
+
+    def test_rollups_without_user(self, workspace):
+        """Test that logs without a user share one rollup row."""
+        log_usage(workspace, None)
+        log_usage(workspace, None)
+
+        assert UsageRollupHourly.objects.get().requests == 2
+
+
+@pytest.mark.django_db
+class TestUsageSummary:
+    """Test summaries read from the rollups."""
+
+    def test_summary_matches_usage_log(self, workspace, user):
+        """Test that rollups and partial-hour edges add up to the raw logs."""
+        times = [
+            NOW - timedelta(days=9, minutes=50),  # before the range
+            NOW - timedelta(days=9, minutes=10),  # partial first hour
+            NOW - timedelta(days=8, hours=20),    # whole hours of the first day
+            NOW - timedelta(days=3),              # whole days
+            NOW - timedelta(hours=5),             # whole hours of the last day
+            NOW - timedelta(minutes=10),          # partial last hour
+        ]
+        for i, timestamp in enumerate(times):
+            create_log_at(workspace, user, timestamp, model='gpt-4o' if i % 2 else 'gpt-4o-mini')
+        call_command('backfill_usage_rollups', stdout=StringIO())
+
+        summary = get_usage_summary(
+            workspace=workspace,
+            start_date=NOW - timedelta(days=9, minutes=30),
+            end_date=NOW
+        )
+
+        assert summary['total_requests'] == 5
+        assert summary['total_tokens'] == 150
+        assert summary['total_cost'] == pytest.approx(0.005)
+        assert summary['model_breakdown']['gpt-4o']['requests'] == 3
+        assert summary['model_breakdown']['gpt-4o-mini']['requests'] == 2
+
+    def test_summary_query_count_is_independent_of_models(self, workspace, user, django_assert_num_queries):
+        """Test that the model breakdown is no longer an N+1."""
+        for model in ('gpt-4o', 'gpt-4o-mini', 'gpt-4.1', 'gpt-4.1-mini'):
+            log_usage(workspace, user, model=model)
+
+        # Daily rollups, hourly rollups and the current partial hour
+        with django_assert_num_queries(3):
+            summary = get_usage_summary(
+                workspace=workspace,
+                start_date=NOW - timedelta(days=30, minutes=30),
+            )
+
+        assert len(summary['model_breakdown']) == 4
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Test rebuilding rollups from usage_logs."""
+
+    def test_backfill_replaces_drifted_rollups(self, workspace, user):
+        """Test that a backfill recomputes existing rollups."""
+        log_usage(workspace, user)
+        UsageRollupHourly.objects.update(requests=99)
+
+        out = StringIO()
+        call_command('backfill_usage_rollups', stdout=out)
+
+        assert UsageRollupHourly.objects.get().requests == 1
+        assert UsageRollupDaily.objects.get().requests == 1
+        assert 'Rebuilt 2 rollup rows' in out.getvalue()
@@ -0,0 +1,184 @@
+"""
+Tests for the usage time-series API.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from accounts.tenancy import get_organization_roles
+from contentmgmt.models import Project, Content
+from ai.models import UsageLog
+from ai.rollups import rebuild_usage_rollups
+
+URL = '/api/ai/usage/timeseries/'
+DAY = datetime(2026, 3, 11, tzinfo=dt_timezone.utc)  # a Wednesday
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(phone_number="+989121111111", full_name="Sara")
+
+
+def create_workspace(slug):
+    org = Organization.objects.create(name=slug, slug=slug)
+    return Workspace.objects.create(name=slug, slug=slug, organization=org)
+
+
+@pytest.fixture
+def workspace(user):
+    workspace = create_workspace('test-org')
+    OrganizationMember.objects.create(user=user, organization=workspace.organization)
+    return workspace
+
+
+@pytest.fixture
+def other_workspace():
+    """A workspace of an organization the user isn't a member of."""
+    return create_workspace('other-org')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_log_at(workspace, user, timestamp, model='gpt-4o-mini', content=None):
+    log = UsageLog.objects.create(
+        content=content,
+        user=user,
+        workspace=workspace,
+        organization=workspace.organization,
+        model=model,
+        prompt_tokens=10,
+        completion_tokens=20,
+        total_tokens=30,
+        estimated_cost=Decimal('0.5')
+    )
+    UsageLog.objects.filter(id=log.id).update(timestamp=timestamp)
+
+
+def get(client, **params):
+    params = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in params.items()}
+    return client.get(URL, params)
+
+
+@pytest.mark.django_db
+class TestUsageTimeseries:
+    """Test bucketing, grouping and zero-filling."""
+
+    def test_daily_buckets_are_zero_filled(self, client, workspace, user):
+        """Test that days without usage are returned as zeros."""
+        create_log_at(workspace, user, DAY - timedelta(days=2, hours=-3))
+        create_log_at(workspace, user, DAY + timedelta(hours=5))
+        create_log_at(workspace, user, DAY + timedelta(hours=6))
+        rebuild_usage_rollups(DAY - timedelta(days=3), DAY + timedelta(days=1))
+
+        response = get(client, bucket='day', start=DAY - timedelta(days=3, hours=-12),
+                       end=DAY + timedelta(hours=12), workspace_id=workspace.id)
+
+        assert response.status_code == 200
+        series, = response.data['series']
+        assert series['group'] is None
+        assert [point['timestamp'] for point in series['points']] == [
+            DAY - timedelta(days=days) for days in (3, 2, 1, 0)
+        ]
+        assert [point['requests'] for point in series['points']] == [0, 1, 0, 2]
+        assert series['points'][3]['cost'] == 1.0
+        assert series['points'][3]['total_tokens'] == 60
+
+    def test_weekly_buckets_start_on_monday(self, client, workspace, user):
+        """Test that weeks are truncated like date_trunc."""
+        create_log_at(workspace, user, DAY)
+        create_log_at(workspace, user, DAY + timedelta(days=5))
+        rebuild_usage_rollups(DAY, DAY + timedelta(days=6))
+
+        response = get(client, bucket='week', start=DAY, end=DAY + timedelta(days=5))
+
+        points = response.data['series'][0]['points']
+        assert [point['timestamp'] for point in points] == [DAY - timedelta(days=2), DAY + timedelta(days=5)]
+        assert [point['requests'] for point in points] == [1, 1]
+
+    def test_group_by_model(self, client, workspace, user):
+        """Test that each model gets its own series, largest first."""
+        create_log_at(workspace, user, DAY + timedelta(hours=1), model='gpt-4o')
+        create_log_at(workspace, user, DAY + timedelta(hours=1), model='gpt-4o-mini')
+        create_log_at(workspace, user, DAY + timedelta(hours=2), model='gpt-4o-mini')
+        rebuild_usage_rollups(DAY, DAY + timedelta(days=1))
+
+        response = get(client, bucket='hour', group_by='model', start=DAY, end=DAY + timedelta(hours=3))
+
+        assert [series['label'] for series in response.data['series']] == ['gpt-4o-mini', 'gpt-4o']
+        assert [point['requests'] for point in response.data['series'][0]['points']] == [0, 1, 1, 0]
+
+    def test_group_by_project_and_user(self, client, workspace, user):
+        """Test grouping by project from usage_logs and by user from rollups."""
+        project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+        content = Content.objects.create(title="Post", project=project, created_by=user)
+        create_log_at(workspace, user, DAY, content=content)
+        rebuild_usage_rollups(DAY, DAY + timedelta(days=1))
+
+        by_project = get(client, group_by='project', start=DAY, end=DAY).data['series']
+        by_user = get(client, group_by='user', start=DAY, end=DAY).data['series']
+
+        assert (by_project[0]['group'], by_project[0]['label']) == (project.id, "Blog")
+        assert (by_user[0]['group'], by_user[0]['label']) == (user.id, "Sara")
+
+    def test_long_range_reads_rollups(self, client, workspace, user, django_assert_max_num_queries):
+        """Test that a 90-day chart runs a constant number of queries."""
+        for days in range(0, 90, 7):
+            create_log_at(workspace, user, DAY - timedelta(days=days))
+        rebuild_usage_rollups(DAY - timedelta(days=90), DAY + timedelta(days=1))
+
+        # Workspace lookup and the grouped rollup query, with the role map cached
+        get_organization_roles(user)
+        with django_assert_max_num_queries(2):
+            response = get(client, start=DAY - timedelta(days=89), end=DAY, workspace_id=workspace.id)
+
+        points = response.data['series'][0]['points']
+        assert len(points) == 90
+        assert sum(point['requests'] for point in points) == 13
+
+    def test_too_many_points_rejected(self, client, settings):
+        """Test that oversized ranges are rejected."""
+        settings.AI_USAGE_TIMESERIES_MAX_POINTS = 100
+
+        response = get(client, bucket='hour', start=DAY - timedelta(days=30), end=DAY)
+
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestUsageTenancy:
+    """Test that usage endpoints only report the caller's organizations."""
+
+    @pytest.fixture(autouse=True)
+    def usage(self, workspace, other_workspace, user):
+        self.stranger = User.objects.create_user(phone_number="+989122222222", full_name="Other")
+        OrganizationMember.objects.create(user=self.stranger, organization=other_workspace.organization)
+        create_log_at(workspace, user, DAY)
+        create_log_at(other_workspace, self.stranger, DAY)
+        rebuild_usage_rollups(DAY, DAY + timedelta(days=1))
+
+    @pytest.mark.parametrize('url', [URL, '/api/ai/usage/summary/'])
+    def test_foreign_scopes_not_found(self, client, url, other_workspace):
+        for params in (
+            {'organization_id': other_workspace.organization_id},
+            {'workspace_id': other_workspace.id},
+            {'user_id': self.stranger.id},
+        ):
+            assert client.get(url, params).status_code == 404
+
+    def test_unfiltered_series_only_counts_own_usage(self, client, user):
+        series = get(client, group_by='user', start=DAY, end=DAY).data['series']
+
+        assert [(item['group'], item['label']) for item in series] == [(user.id, "Sara")]
+        assert series[0]['points'][0]['requests'] == 1
+
+    def test_unfiltered_summary_only_counts_own_usage(self, client):
+        response = client.get('/api/ai/usage/summary/', {'period': 'all'})
+
+        assert response.data['summary']['total_requests'] == 1
@@ -0,0 +1,103 @@
+"""
+Tests for the version diff endpoint.
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from contentmgmt.versioning import diff_bodies
+
+V1 = '# راهنمای بازاریابی\n\nاین یک متن **نمونه** است.\nمی‌خواهیم فروش را افزایش دهیم.'
+V2 = '# راهنمای بازاریابی محتوا\n\nاین یک متن **آزمایشی** است.\nمی‌خواهیم فروش را افزایش دهیم.'
+
+
+@pytest.fixture
+def content():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    user = User.objects.create_user(phone_number="+989121111111")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+    content = Content.objects.create(title="Post", project=project, created_by=user)
+    for number, body in enumerate([V1, V2, V2 + '\nپایان'], start=1):
+        ContentVersion.objects.create(content=content, version_number=number, title="Post", body_markdown=body)
+    return content
+
+
+@pytest.fixture
+def client(content):
+    client = APIClient()
+    client.force_authenticate(user=content.created_by)
+    return client
+
+
+class TestDiffBodies:
+    """Test word-level diffs for display."""
+
+    def test_changes_with_context(self):
+        diff = diff_bodies(V1, V2, context=2)
+
+        assert diff['changes'] == [
+            {'op': 'insert', 'line': 1, 'old': '', 'new': ' محتوا', 'before': 'راهنمای بازاریابی', 'after': '\n\nاین یک'},
+            {'op': 'replace', 'line': 3, 'old': '**نمونه**', 'new': '**آزمایشی**', 'before': 'یک متن ', 'after': ' است.\nمی‌خواهیم'},
+        ]
+        assert diff['stats'] == {'words_added': 2, 'words_removed': 1}
+
+    def test_zwnj_words_stay_whole(self):
+        diff = diff_bodies('می‌خواهیم بنویسیم', 'می‌توانیم بنویسیم')
+
+        assert [(change['old'], change['new']) for change in diff['changes']] == [('می‌خواهیم', 'می‌توانیم')]
+
+    def test_identical_bodies(self):
+        assert diff_bodies(V1, V1) == {'changes': [], 'stats': {'words_added': 0, 'words_removed': 0}}
+
+
+@pytest.mark.django_db
+class TestVersionDiffEndpoint:
+    """Test GET /api/contents/:id/versions/diff/."""
+
+    def test_returns_changes_only(self, client, content):
+        response = client.get(f'/api/contents/{content.id}/versions/diff/', {'from': 1, 'to': 3})
+
+        assert response.status_code == 200
+        assert response.data['from']['version_number'] == 1
+        assert response.data['to']['version_number'] == 3
+        assert [change['new'] for change in response.data['changes']] == [' محتوا', '**آزمایشی**', '\nپایان']
+        assert V1 not in str(response.data)
+
+    def test_cached_by_version_pair(self, client, content):
+        """Test that a repeated diff doesn't load the bodies again."""
+        cache.clear()
+        url = f'/api/contents/{content.id}/versions/diff/'
+        client.get(url, {'from': 1, 'to': 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'from': 1, 'to': 2})
+
+        assert response.data['stats']['words_added'] == 2
+        assert not any('"body_markdown"' in query['sql'] for query in queries)
+
+    def test_diffs_delta_versions(self, client, content, settings):
+        settings.CONTENT_VERSION_STORAGE = 'delta'
+        ContentVersion.objects.create(content=content, version_number=4, title="Post", body_markdown=V1)
+        cache.clear()
+
+        response = client.get(f'/api/contents/{content.id}/versions/diff/', {'from': 4, 'to': 1})
+
+        assert response.data['changes'] == []
+
+    def test_missing_version(self, client, content):
+        response = client.get(f'/api/contents/{content.id}/versions/diff/', {'from': 1, 'to': 9})
+
+        assert response.status_code == 404
+
+    def test_invalid_params(self, client, content):
+        url = f'/api/contents/{content.id}/versions/diff/'
+
+        assert client.get(url, {'from': 1}).status_code == 400
+        assert client.get(url, {'from': 'a', 'to': 2}).status_code == 400
+        assert client.get(url, {'from': 1, 'to': 2, 'context': 100}).status_code == 400
@@ -0,0 +1,67 @@
+"""
+Tests for the paginated content versions listing.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+
+
+@pytest.fixture
+def content():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    user = User.objects.create_user(phone_number="+989121111111")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+    content = Content.objects.create(title="Post", project=project, created_by=user)
+    for number in range(1, 26):
+        ContentVersion.objects.create(
+            content=content, version_number=number, title="Post", body_markdown=f"نسخه {number}",
+            metadata={'kind': 'draft', 'params': {'topic': 'x' * 100}}, created_by=user
+        )
+    return content
+
+
+@pytest.fixture
+def client(content):
+    client = APIClient()
+    client.force_authenticate(user=content.created_by)
+    return client
+
+
+@pytest.mark.django_db
+class TestVersionListing:
+    """Test GET /api/contents/:id/versions/."""
+
+    def test_paginated_without_bodies(self, client, content):
+        """Test that the default listing is a page of version summaries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/contents/{content.id}/versions/')
+
+        assert response.data['count'] == 25
+        assert [version['version_number'] for version in response.data['results']] == list(range(25, 5, -1))
+        assert response.data['next']
+        first = response.data['results'][0]
+        assert 'body_markdown' not in first and 'metadata' not in first
+        assert first['created_by_name'] == content.created_by.full_name
+        version_queries = [query['sql'] for query in queries if 'FROM "content_versions"' in query['sql']]
+        assert not any('"body_markdown"' in sql or '"metadata"' in sql for sql in version_queries)
+
+    def test_include_body_and_metadata(self, client, content):
+        response = client.get(f'/api/contents/{content.id}/versions/', {'include': 'body,metadata', 'page': 2})
+
+        assert [version['body_markdown'] for version in response.data['results']] == [
+            f"نسخه {number}" for number in range(5, 0, -1)
+        ]
+        assert response.data['results'][0]['metadata']['kind'] == 'draft'
+
+    def test_single_version_has_body(self, client, content):
+        version = content.versions.get(version_number=3)
+
+        response = client.get(f'/api/content-versions/{version.id}/')
+
+        assert response.data['body_markdown'] == "نسخه 3"
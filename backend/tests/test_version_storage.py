@@ -0,0 +1,188 @@
+"""
+Tests for delta-compressed content version storage.
+"""
+import random
+import pytest
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, OrganizationMember, Workspace, User
+from contentmgmt.models import Project, Content, ContentVersion
+from contentmgmt.versioning import apply_delta, make_delta
+
+WORDS = ['محتوا', 'بازاریابی', 'برای', 'و', 'content', '**مهم**', '۱۴۰۳', '-', '#']
+
+
+def random_body(rng, words=300):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice([' ', ' ', ' ', '\n', '\n\n', '  ']))
+    return ''.join(parts)
+
+
+def edit(rng, body, edits=3):
+    words = body.split(' ')
+    for _ in range(edits):
+        position = rng.randrange(len(words))
+        action = rng.choice(['insert', 'delete', 'replace'])
+        if action == 'insert':
+            words.insert(position, rng.choice(WORDS))
+        elif action == 'delete' and len(words) > 1:
+            del words[position]
+        else:
+            words[position] = rng.choice(WORDS)
+    return ' '.join(words)
+
+
+@pytest.fixture
+def content():
+    org = Organization.objects.create(name="Test Org", slug="test-org")
+    workspace = Workspace.objects.create(name="Test Workspace", slug="test-workspace", organization=org)
+    user = User.objects.create_user(phone_number="+989121111111")
+    OrganizationMember.objects.create(user=user, organization=org, role=OrganizationMember.Role.ADMIN)
+    project = Project.objects.create(name="Blog", slug="blog", workspace=workspace, created_by=user)
+    return Content.objects.create(title="Post", project=project, created_by=user)
+
+
+def create_history(content, bodies):
+    return [
+        ContentVersion.objects.create(content=content, version_number=number, title="Post", body_markdown=body)
+        for number, body in enumerate(bodies, start=1)
+    ]
+
+
+def edited_bodies(count, seed=0):
+    rng = random.Random(seed)
+    bodies = [random_body(rng)]
+    for _ in range(count - 1):
+        bodies.append(edit(rng, bodies[-1]))
+    return bodies
+
+
+class TestDelta:
+    """Test word-level diffs."""
+
+    def test_round_trip(self):
+        """Test that applying a diff always gives the new body back."""
+        rng = random.Random(1)
+        for _ in range(50):
+            base = random_body(rng, words=rng.randrange(0, 80))
+            text = edit(rng, base, edits=rng.randrange(1, 10)) if base else random_body(rng, 5)
+            assert apply_delta(base, make_delta(base, text)) == text
+
+    def test_small_edit_is_small(self):
+        base = 'این یک متن نمونه است\n\nبا دو پاراگراف'
+        delta = make_delta(base, base.replace('نمونه', 'آزمایشی'))
+
+        assert delta == [[6, 7, 'آزمایشی']]
+
+
+@pytest.mark.django_db
+class TestDeltaStorage:
+    """Test storing versions as deltas between snapshots."""
+
+    @pytest.fixture(autouse=True)
+    def delta_storage(self, settings):
+        settings.CONTENT_VERSION_STORAGE = 'delta'
+        settings.CONTENT_VERSION_SNAPSHOT_INTERVAL = 4
+
+    def test_snapshot_every_interval(self, content):
+        """Test that every fourth version is a full snapshot and the rest are deltas."""
+        bodies = edited_bodies(9)
+        create_history(content, bodies)
+
+        versions = ContentVersion.objects.filter(content=content).order_by('version_number')
+        assert [version.delta is None for version in versions] == [
+            True, False, False, False, True, False, False, False, True
+        ]
+        assert versions[1].base_version_id == versions[0].id
+        assert versions[1].stored_body == ''
+
+    def test_bodies_rebuild_transparently(self, content):
+        """Test that body_markdown is the full body after a reload, and is cached."""
+        bodies = edited_bodies(7)
+        create_history(content, bodies)
+        cache.clear()
+
+        version = ContentVersion.objects.get(content=content, version_number=7)
+        with CaptureQueriesContext(connection) as queries:
+            assert version.body_markdown == bodies[6]
+        assert len(queries) == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            assert ContentVersion.objects.get(id=version.id).body_markdown == bodies[6]
+        assert len(queries) == 1
+
+        for number, body in enumerate(bodies, start=1):
+            assert ContentVersion.objects.get(content=content, version_number=number).body_markdown == body
+
+    def test_rewrite_is_stored_in_full(self, content):
+        """Test that a regenerated body that shares nothing with the previous one is a snapshot."""
+        rng = random.Random(2)
+        create_history(content, [random_body(rng), 'A completely different text ' * 20])
+
+        assert ContentVersion.objects.get(content=content, version_number=2).delta is None
+
+    def test_word_count_uses_full_body(self, content):
+        bodies = edited_bodies(2)
+        version = create_history(content, bodies)[1]
+
+        assert version.word_count == len(bodies[1].split())
+
+    def test_versions_api_rebuilds_in_memory(self, content):
+        """Test that listing versions doesn't query per delta version."""
+        bodies = edited_bodies(6)
+        create_history(content, bodies)
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(user=content.created_by)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/contents/{content.id}/versions/', {'include': 'body'})
+
+        assert [version['body_markdown'] for version in response.data['results']] == bodies[::-1]
+        assert not any('content_versions' in query['sql'] and 'version_number" <' in query['sql'] for query in queries)
+
+    def test_deleting_content_deletes_history(self, content):
+        create_history(content, edited_bodies(3))
+
+        content.delete()
+
+        assert not ContentVersion.objects.exists()
+
+
+@pytest.mark.django_db
+class TestCompressVersionsCommand:
+    """Test converting existing history."""
+
+    def test_converts_and_restores(self, content, settings):
+        """Test converting full history to deltas and back without changing bodies."""
+        bodies = edited_bodies(6)
+        create_history(content, bodies)
+        assert not ContentVersion.objects.filter(delta__isnull=False).exists()
+
+        output = StringIO()
+        call_command('compress_versions', interval=3, batch_size=1, stdout=output)
+
+        versions = ContentVersion.objects.filter(content=content).order_by('version_number')
+        assert [version.delta is None for version in versions] == [True, False, False, True, False, False]
+        assert 'Converted 4 of 6 versions' in output.getvalue()
+        cache.clear()
+        assert [version.body_markdown for version in ContentVersion.objects.filter(content=content).order_by('version_number')] == bodies
+
+        call_command('compress_versions', interval=3, stdout=StringIO())
+        call_command('compress_versions', full=True, stdout=StringIO())
+
+        versions = ContentVersion.objects.filter(content=content).order_by('version_number')
+        assert [version.stored_body for version in versions] == bodies
+        assert not any(version.delta for version in versions)
+
+    def test_full_storage_is_default(self, content):
+        create_history(content, edited_bodies(3))
+
+        assert not ContentVersion.objects.filter(delta__isnull=False).exists()